@@ -1 +1,4 @@
+import time
 
+# Taken before any app module is imported; app.core.startup measures import time from here.
+IMPORT_STARTED = time.perf_counter()
@@ -1,10 +1,26 @@
+import json
 import logging
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import ValidationError
 
-from app.api.schemas import DraftRequest, DraftResponse, HealthResponse
-from app.middleware.rate_limit import rate_limit_dependency
-from app.services.llm import generate_reply_drafts
+from app.api.schemas import (
+    BatchDraftRequest,
+    BatchDraftResponse,
+    BatchDraftResult,
+    DraftRequest,
+    DraftResponse,
+    HealthResponse,
+)
+from app.core.config import get_settings
+from app.core.deadline import DeadlineExceeded, request_deadline_dependency
+from app.core.metrics import REGISTRY
+from app.middleware.rate_limit import enforce_rate_limit, rate_limit_dependency
+from app.services.circuit_breaker import get_circuit_breaker
+from app.services.executor import WorkerPoolSaturated
+from app.services.llm import generate_reply_drafts, generate_reply_drafts_batch, stream_reply_drafts
+from app.services.streaming import format_sse
 from app.auth import require_api_key
 
 router = APIRouter(tags=["reply"], responses={429: {"description": "Rate limit exceeded"}})
@@ -14,13 +30,33 @@ logger = logging.getLogger(__name__)
 
 @router.get("/health", response_model=HealthResponse)
 async def health() -> HealthResponse:
-    return HealthResponse(status="ok")
+    settings = get_settings()
+    circuit = get_circuit_breaker().state if settings.circuit_breaker_enabled and settings.openai_api_key else None
+    return HealthResponse(status="ok", upstream_circuit=circuit)
+
+
+@router.get(
+    "/metrics",
+    include_in_schema=False,
+    response_class=PlainTextResponse,
+    dependencies=[Depends(require_api_key)],
+)
+async def metrics() -> PlainTextResponse:
+    if not get_settings().metrics_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def _label_request(http_request: Request, request: DraftRequest) -> None:
+    # Read by the metrics middleware once the response is sent.
+    http_request.state.channel = request.channel
+    http_request.state.tone = request.tone
 
 
 @router.post(
     "/v1/reply/draft",
     response_model=DraftResponse,
-    dependencies=[Depends(require_api_key)],
+    dependencies=[Depends(require_api_key), Depends(request_deadline_dependency)],
     summary="Generate three channel-appropriate reply drafts",
     description=(
         "Generates three reply drafts tailored to the specified channel (email, Slack, LinkedIn). "
@@ -30,10 +66,11 @@ async def health() -> HealthResponse:
     ),
 )
 async def create_reply_draft(
-    request: DraftRequest, rate_limit=Depends(rate_limit_dependency)
+    request: DraftRequest, http_request: Request, rate_limit=Depends(rate_limit_dependency)
 ) -> DraftResponse:
     # Dependency order ensures auth and rate-limit are applied before draft generation.
-    response = generate_reply_drafts(request)
+    _label_request(http_request, request)
+    response = await generate_reply_drafts(request)
     logger.info(
         "drafts.generated",
         extra={
@@ -43,3 +80,85 @@ async def create_reply_draft(
         },
     )
     return response
+
+
+@router.post(
+    "/v1/reply/draft:stream",
+    dependencies=[Depends(require_api_key), Depends(request_deadline_dependency)],
+    summary="Stream reply drafts as Server-Sent Events",
+    description=(
+        "Same input as /v1/reply/draft, but responds with text/event-stream. Emits `delta` events with model "
+        "text as it arrives (LLM mode), a `draft` event for each draft as soon as it is finished, and a final "
+        "`summary` event carrying request_id, notes and confidence_score (or an `error` event)."
+    ),
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def stream_reply_draft(
+    request: DraftRequest, http_request: Request, rate_limit=Depends(rate_limit_dependency)
+) -> StreamingResponse:
+    _label_request(http_request, request)
+
+    async def events():
+        async for event, data in stream_reply_drafts(request):
+            yield format_sse(event, data)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            **http_request.state.rate_limit_headers,
+        },
+    )
+
+
+def _batch_error(exc: Exception) -> str:
+    """
+    Per-item error for a failed batch item, matching what the single-draft endpoints report.
+    """
+    if isinstance(exc, WorkerPoolSaturated):
+        return "Server busy, retry shortly."
+    if isinstance(exc, DeadlineExceeded):
+        return "Request deadline exceeded."
+    if isinstance(exc, (json.JSONDecodeError, ValidationError)):
+        return "Model returned an invalid draft payload."
+    return "Draft generation failed."
+
+
+@router.post(
+    "/v1/reply/draft:batch",
+    response_model=BatchDraftResponse,
+    dependencies=[Depends(require_api_key), Depends(request_deadline_dependency)],
+    summary="Generate reply drafts for a batch of requests",
+    description=(
+        "Accepts a list of draft requests and processes them with bounded concurrency through the same "
+        "pipeline as /v1/reply/draft. Results are returned in submission order with either a response or "
+        "an error per item. Each item counts against the rate limit."
+    ),
+)
+async def create_reply_drafts_batch(
+    batch: BatchDraftRequest, request: Request, response: Response
+) -> BatchDraftResponse:
+    settings = get_settings()
+    if len(batch.requests) > settings.batch_max_size:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"Batch size exceeds maximum of {settings.batch_max_size}.",
+        )
+    await enforce_rate_limit(request, cost=len(batch.requests), response=response)
+
+    outcomes = await generate_reply_drafts_batch(batch.requests, settings.batch_max_concurrency)
+    results = [
+        BatchDraftResult(index=index, error=_batch_error(outcome))
+        if isinstance(outcome, Exception)
+        else BatchDraftResult(index=index, response=outcome)
+        for index, outcome in enumerate(outcomes)
+    ]
+    failed = sum(result.error is not None for result in results)
+    logger.info(
+        "drafts.generated.batch",
+        extra={"items": len(results), "failed": failed},
+    )
+    return BatchDraftResponse(results=results, succeeded=len(results) - failed, failed=failed)
@@ -71,6 +71,31 @@ class DraftResponse(BaseModel):
     confidence_score: float = Field(ge=0.0, le=1.0)
 
 
+class BatchDraftRequest(BaseModel):
+    requests: list[DraftRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=100,
+        description="Draft requests to process; up to 100, or the configured max batch size if lower.",
+    )
+
+
+class BatchDraftResult(BaseModel):
+    index: int = Field(description="Position of the item in the submitted batch.")
+    response: DraftResponse | None = None
+    error: str | None = None
+
+
+class BatchDraftResponse(BaseModel):
+    results: list[BatchDraftResult]
+    succeeded: int
+    failed: int
+
+
 class HealthResponse(BaseModel):
     status: Literal["ok"]
     service: str = "smart-reply-service"
+    upstream_circuit: Literal["closed", "open", "half_open"] | None = Field(
+        default=None,
+        description="Upstream model circuit breaker state; null when the model path or breaker is disabled.",
+    )
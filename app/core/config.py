@@ -27,11 +27,72 @@ class Settings(BaseSettings):
 
     environment: Literal["local", "dev", "prod"] = "local"
     api_key: str | None = None
+    log_level: str = "INFO"
+    log_format: Literal["json", "text"] = "json"
+    log_sample_rates: dict[str, float] = {}
+    log_queue_size: int = 10_000
     rate_limit_per_minute: int = 60
+    rate_limit_max_keys: int = 10_000
+    rate_limit_sweep_interval_seconds: float = 60.0
+    rate_limit_backend: Literal["memory", "redis"] = "memory"
+    rate_limit_redis_url: str = "redis://localhost:6379/0"
+    rate_limit_redis_pool_size: int = 10
+    rate_limit_redis_timeout_seconds: float = 0.25
+    rate_limit_local_batch: int = 0
+    rate_limit_sync_interval_seconds: float = 1.0
+    rate_limit_failure_mode: Literal["open", "closed"] = "open"
+    rate_limit_key_source: Literal["ip", "api_key", "header"] = "ip"
+    rate_limit_key_header: str = "x-rapidapi-user"
+    rate_limit_tiers_file: str | None = None
+
+    response_cache_enabled: bool = True
+    response_cache_backend: Literal["memory", "shared"] = "memory"
+    response_cache_max_entries: int = 1024
+    response_cache_ttl_seconds: float = 300.0
+    request_coalescing_enabled: bool = True
+
+    request_deadline_seconds: float = 60.0
+    request_deadline_header: str = "x-request-timeout"
+    upstream_hedging_enabled: bool = False
+    upstream_hedge_quantile: float = 0.95
+    upstream_hedge_default_delay_seconds: float = 3.0
+
+    circuit_breaker_enabled: bool = True
+    circuit_failure_rate_threshold: float = 0.5
+    circuit_slow_call_seconds: float = 15.0
+    circuit_window_size: int = 20
+    circuit_min_calls: int = 10
+    circuit_open_seconds: float = 30.0
+    circuit_half_open_max_calls: int = 3
+
+    batch_max_size: int = 100
+    batch_max_concurrency: int = 16
+
+    stub_executor_mode: Literal["inline", "thread", "process"] = "thread"
+    stub_executor_workers: int = 4
+    stub_executor_max_queue: int = 64
+
+    metrics_enabled: bool = True
+    server_timing_enabled: bool = False
+    timing_log_sample_rate: float = 0.0
 
     openai_api_key: str | None = None
     openai_model: str = "gpt-4.1-mini"
     openai_base_url: str | None = None
+    openai_structured_outputs: bool = True
+    input_compaction_enabled: bool = True
+    # Estimated tokens of `context` sent upstream per channel; 0 sends it whole.
+    context_token_budgets: dict[str, int] = {"email": 800, "slack": 300, "linkedin": 500}
+    openai_max_connections: int = 100
+    openai_max_keepalive_connections: int = 20
+    openai_keepalive_expiry_seconds: float = 30.0
+    openai_http2: bool = True
+    openai_timeout_seconds: float = 30.0
+    openai_connect_timeout_seconds: float = 5.0
+    # When the shared client (and the `openai` import behind it) is built: during startup,
+    # in a worker thread once the app is serving, or on the first upstream call.
+    openai_client_warmup: Literal["startup", "background", "lazy"] = "startup"
+    static_openapi_enabled: bool = True
 
 
 @lru_cache(maxsize=1)
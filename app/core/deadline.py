@@ -0,0 +1,84 @@
+"""
+Per-request deadlines.
+
+A deadline is an absolute `time.monotonic()` instant held in a contextvar, so it follows the
+request into every await (and into tasks created from it) without being passed around. Work
+that may block on the network is wrapped in `run_within_deadline`, which raises
+`DeadlineExceeded` (served as 504) once the budget is spent.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Awaitable, TypeVar
+
+from fastapi import Request
+
+from app.core.config import get_settings
+
+T = TypeVar("T")
+
+_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a request runs past its deadline."""
+
+
+def set_deadline(seconds: float | None) -> None:
+    """
+    Start a deadline `seconds` from now for the current context; None or <= 0 clears it.
+    """
+    _deadline.set(time.monotonic() + seconds if seconds and seconds > 0 else None)
+
+
+def remaining() -> float | None:
+    """
+    Seconds left before the current deadline, or None when there is no deadline.
+    """
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def check_deadline() -> None:
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("Request deadline exceeded.")
+
+
+async def run_within_deadline(awaitable: Awaitable[T]) -> T:
+    """
+    Await `awaitable`, cancelling it and raising DeadlineExceeded if the deadline passes first.
+    """
+    left = remaining()
+    if left is None:
+        return await awaitable
+    if left <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded("Request deadline exceeded.")
+    try:
+        return await asyncio.wait_for(awaitable, timeout=left)
+    except asyncio.TimeoutError as exc:
+        raise DeadlineExceeded("Request deadline exceeded.") from exc
+
+
+async def request_deadline_dependency(request: Request) -> None:
+    """
+    Dependency that sets the request deadline: `request_deadline_seconds`, shortened (never
+    extended) by a client-supplied `request_deadline_header` value in seconds.
+    Async on purpose: sync dependencies run in a worker thread whose context is discarded.
+    """
+    settings = get_settings()
+    seconds = settings.request_deadline_seconds
+    raw = request.headers.get(settings.request_deadline_header)
+    if raw:
+        try:
+            requested = float(raw)
+        except ValueError:
+            requested = 0.0
+        if requested > 0:
+            seconds = min(seconds, requested) if seconds > 0 else requested
+    set_deadline(seconds)
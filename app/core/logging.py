@@ -1,20 +1,160 @@
+import json
 import logging
+import logging.handlers
+import queue
+import random
 import sys
+import time
+from copy import copy
+from typing import Literal
 
+# Attributes every LogRecord has; anything else on a record came from `extra=`.
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
 
-def configure_logging() -> None:
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: timestamp, level, logger, message, every `extra` field and the
+    traceback when present.
     """
-    Configure root logger for simple JSON-ish logs.
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+            + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc_info"] = record.exc_text
+        if record.stack_info:
+            payload["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
     """
-    formatter = logging.Formatter(
-        fmt='%(asctime)s %(levelname)s %(name)s - %(message)s',
-        datefmt='%Y-%m-%dT%H:%M:%S%z',
-    )
+    Keep only a fraction of high-volume INFO/DEBUG events, keyed by message
+    (e.g. {"drafts.generated": 0.1}). Warnings and errors are never sampled out.
+    """
+
+    def __init__(self, rates: dict[str, float], rng: random.Random | None = None):
+        super().__init__()
+        self.rates = dict(rates)
+        self._random = (rng or random.Random()).random
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(record.msg) if isinstance(record.msg, str) else None
+        return rate is None or self._random() < rate
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueue records for the listener thread without ever blocking the caller: when the
+    queue is full the record is dropped and counted.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Keep `extra` fields and the message/traceback split, unlike the base class which
+        # flattens everything into `msg`. Only the cheap string merge happens on this thread.
+        record = copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # The base class uses put_nowait, which fails on shutdown when the queue is full;
+        # the listener thread is still draining, so waiting for a free slot is safe.
+        self.queue.put(self._sentinel)
+
+
+_listener: logging.handlers.QueueListener | None = None
+_queue_handler: _DroppingQueueHandler | None = None
+_dropped_before = 0  # dropped by queue handlers that a later configure_logging replaced
+
+
+def dropped_log_records() -> int:
+    """
+    Records dropped because the log queue was full, since the process started.
+    """
+    return _dropped_before + (_queue_handler.dropped if _queue_handler is not None else 0)
+
+
+def configure_logging(
+    level: str = "INFO",
+    log_format: Literal["json", "text"] = "json",
+    sample_rates: dict[str, float] | None = None,
+    queue_size: int = 10_000,
+) -> None:
+    """
+    Configure the root logger. Records are handed to a bounded queue and written to stdout by a
+    background listener thread, so request handlers never block on log I/O.
+    """
+    global _listener, _queue_handler
+    stop_logging()
+
+    if log_format == "json":
+        formatter: logging.Formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            fmt='%(asctime)s %(levelname)s %(name)s - %(message)s',
+            datefmt='%Y-%m-%dT%H:%M:%S%z',
+        )
 
     handler = logging.StreamHandler(sys.stdout)
     handler.setFormatter(formatter)
 
+    queue_handler = _DroppingQueueHandler(queue.Queue(maxsize=max(1, queue_size)))
+    if sample_rates:
+        queue_handler.addFilter(SamplingFilter(sample_rates))
+
+    _listener = _QueueListener(queue_handler.queue, handler, respect_handler_level=True)
+    _listener.start()
+    _queue_handler = queue_handler
+
     root = logging.getLogger()
-    root.setLevel(logging.INFO)
-    root.handlers = [handler]
+    root.setLevel(level.upper())
+    root.handlers = [queue_handler]
+
 
+def stop_logging() -> None:
+    """
+    Flush queued records and stop the listener thread; called on app shutdown. Reports how many
+    records were dropped on a full queue, if any.
+    """
+    global _listener, _queue_handler, _dropped_before
+    if _listener is not None:
+        _listener.stop()
+        # Anything logged after shutdown is written synchronously instead of queued forever.
+        logging.getLogger().handlers = list(_listener.handlers)
+        _listener = None
+    if _queue_handler is not None:
+        dropped = _queue_handler.dropped
+        _dropped_before += dropped
+        _queue_handler = None
+        if dropped:
+            logging.getLogger(__name__).warning("logging.records_dropped", extra={"dropped": dropped})
@@ -0,0 +1,343 @@
+"""
+In-process metrics rendered in the Prometheus text exposition format.
+
+The hot path never takes a lock: every thread writes to its own shard (a plain dict it alone
+mutates), and a scrape merges copies of all shards. Copying a dict is atomic under the GIL, so
+a scrape can run while threads keep recording; at worst it misses observations in flight.
+Stage timings from process-pool workers are shipped back and recorded by the parent.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+_DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str, labelnames: tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._registry = registry
+        self._local = threading.local()
+        self._shards: list[dict] = []
+        self._shards_lock = threading.Lock()
+        registry.register(self)
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {}
+            with self._shards_lock:  # once per thread, never on the hot path afterwards
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def _snapshots(self) -> list[dict]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        return [dict(shard) for shard in shards]
+
+    def reset(self) -> None:
+        with self._shards_lock:
+            for shard in self._shards:
+                shard.clear()
+
+    def collect(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """
+    Monotonic counter; also used for up/down gauges through `GaugeCounter`.
+    """
+
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def values(self) -> dict[LabelValues, float]:
+        merged: dict[LabelValues, float] = {}
+        for shard in self._snapshots():
+            for labels, value in shard.items():
+                merged[labels] = merged.get(labels, 0) + value
+        return merged
+
+    def collect(self) -> list[str]:
+        return [
+            f"{self.name}{_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self.values().items())
+        ]
+
+
+class GaugeCounter(Counter):
+    """
+    Gauge that is moved up and down (e.g. in-flight requests); shards are summed on scrape.
+    """
+
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        registry: "MetricsRegistry",
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...],
+        buckets: tuple[float, ...] = _DEFAULT_BUCKETS,
+    ):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        shard = self._shard()
+        state = shard.get(labels)
+        if state is None:
+            # Per-bucket (non-cumulative) counts, then +Inf, sum and count.
+            state = shard[labels] = [0] * (len(self.buckets) + 3)
+        state[bisect_left(self.buckets, value)] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def values(self) -> dict[LabelValues, list[float]]:
+        merged: dict[LabelValues, list[float]] = {}
+        for shard in self._snapshots():
+            for labels, state in shard.items():
+                total = merged.setdefault(labels, [0] * len(state))
+                for index, value in enumerate(list(state)):
+                    total[index] += value
+        return merged
+
+    def collect(self) -> list[str]:
+        lines: list[str] = []
+        bounds = (*self.buckets, math.inf)
+        for labels, state in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(bounds, state):
+                cumulative += count
+                extra = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, extra)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {_format_value(state[-1])}")
+        return lines
+
+
+class CallbackGauge:
+    """
+    Gauge whose value is read from a callback at scrape time (e.g. cache hit ratio).
+    """
+
+    kind = "gauge"
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str, callback: Callable[[], float]):
+        self.name = name
+        self.documentation = documentation
+        self._callback = callback
+        registry.register(self)
+
+    def reset(self) -> None:
+        return None
+
+    def collect(self) -> list[str]:
+        return [f"{self.name} {_format_value(self._callback())}"]
+
+
+class CallbackCounter(CallbackGauge):
+    """
+    Monotonic count kept elsewhere (e.g. dropped log records), read at scrape time.
+    """
+
+    kind = "counter"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: list = []
+
+    def register(self, metric) -> None:
+        self._metrics.append(metric)
+
+    def reset(self) -> None:
+        """
+        Zero every metric; useful in tests.
+        """
+        for metric in self._metrics:
+            metric.reset()
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+def _cache_hit_ratio() -> float:
+    from app.services.cache import get_response_cache
+
+    return get_response_cache().stats()["hit_ratio"]
+
+
+_CIRCUIT_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def _circuit_state() -> float:
+    from app.services.circuit_breaker import get_circuit_breaker
+
+    return _CIRCUIT_STATE_VALUES[get_circuit_breaker().state]
+
+
+def _dropped_log_records() -> float:
+    from app.core.logging import dropped_log_records
+
+    return dropped_log_records()
+
+
+def _startup_seconds(attribute: str) -> Callable[[], float]:
+    def read() -> float:
+        from app.core.startup import get_startup_timings
+
+        return getattr(get_startup_timings(), attribute) or 0.0
+
+    return read
+
+
+REGISTRY = MetricsRegistry()
+
+REQUESTS = Counter(
+    REGISTRY,
+    "smart_reply_requests_total",
+    "HTTP requests by route template, method, channel, tone and status code.",
+    ("route", "method", "channel", "tone", "status"),
+)
+REQUEST_SECONDS = Histogram(
+    REGISTRY,
+    "smart_reply_request_duration_seconds",
+    "End-to-end request latency by route template.",
+    ("route",),
+)
+IN_FLIGHT = GaugeCounter(
+    REGISTRY,
+    "smart_reply_requests_in_flight",
+    "Requests currently being processed.",
+    (),
+)
+STAGE_SECONDS = Histogram(
+    REGISTRY,
+    "smart_reply_stage_duration_seconds",
+    "Time spent per pipeline stage (auth, rate_limit, generation, compaction, prompt, upstream, parse, validate, base_drafts, constraints, formatting).",
+    ("stage",),
+)
+UPSTREAM_RETRIES = Counter(
+    REGISTRY,
+    "smart_reply_upstream_retries_total",
+    "Upstream model calls retried after an unusable response.",
+    (),
+)
+PROMPT_TOKENS = Histogram(
+    REGISTRY,
+    "smart_reply_prompt_tokens",
+    "Locally estimated input tokens per upstream request, by part: prefix (system prompt and static per-variant prefix) or total.",
+    ("part",),
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192),
+)
+UPSTREAM_INPUT_TOKENS = Counter(
+    REGISTRY,
+    "smart_reply_upstream_input_tokens_total",
+    "Input tokens reported by the upstream model, by kind (input or cached).",
+    ("kind",),
+)
+UPSTREAM_REPAIRS = Counter(
+    REGISTRY,
+    "smart_reply_upstream_repairs_total",
+    "Malformed upstream payloads repaired locally instead of retried, by repair kind.",
+    ("kind",),
+)
+UPSTREAM_HEDGES = Counter(
+    REGISTRY,
+    "smart_reply_upstream_hedges_total",
+    "Hedged upstream requests by which request produced the result (primary or hedge).",
+    ("winner",),
+)
+CACHE_HIT_RATIO = CallbackGauge(
+    REGISTRY,
+    "smart_reply_response_cache_hit_ratio",
+    "Response cache hits / lookups in this process.",
+    _cache_hit_ratio,
+)
+CIRCUIT_STATE = CallbackGauge(
+    REGISTRY,
+    "smart_reply_circuit_state",
+    "Upstream circuit breaker state (0 closed, 1 half-open, 2 open).",
+    _circuit_state,
+)
+STARTUP_IMPORT_SECONDS = CallbackGauge(
+    REGISTRY,
+    "smart_reply_startup_import_seconds",
+    "Time spent importing the app's modules in this process.",
+    _startup_seconds("imports_seconds"),
+)
+STARTUP_READY_SECONDS = CallbackGauge(
+    REGISTRY,
+    "smart_reply_startup_ready_seconds",
+    "Cold-start time from the first app import until the lifespan startup finished.",
+    _startup_seconds("ready_seconds"),
+)
+LOG_RECORDS_DROPPED = CallbackCounter(
+    REGISTRY,
+    "smart_reply_log_records_dropped_total",
+    "Log records dropped because the log queue was full.",
+    _dropped_log_records,
+)
+CIRCUIT_FALLBACKS = Counter(
+    REGISTRY,
+    "smart_reply_circuit_fallbacks_total",
+    "Requests served by the local stub because the upstream circuit was open.",
+    (),
+)
@@ -0,0 +1,81 @@
+"""
+Cold-start timings.
+
+`IMPORT_STARTED` (set when the `app` package is first imported) to `mark_imports_done()` is the
+module import time; `startup_step(name)` times each lifespan startup step, and `mark_ready()`
+closes the report once the app can serve. The numbers are logged as `startup.timings` and
+exported as gauges, so cold-start regressions show up next to the request metrics.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from app import IMPORT_STARTED
+
+
+@dataclass
+class StartupTimings:
+    imports_seconds: float | None = None
+    steps: dict[str, float] = field(default_factory=dict)
+    startup_seconds: float | None = None  # lifespan startup, all steps
+    ready_seconds: float | None = None  # first app import to ready
+    _startup_started: float | None = None
+
+    def as_log_fields(self) -> dict:
+        ms = lambda value: None if value is None else round(value * 1000, 2)  # noqa: E731
+        return {
+            "import_ms": ms(self.imports_seconds),
+            "startup_ms": ms(self.startup_seconds),
+            "ready_ms": ms(self.ready_seconds),
+            "steps_ms": {name: ms(seconds) for name, seconds in self.steps.items()},
+        }
+
+
+_timings = StartupTimings()
+
+
+def get_startup_timings() -> StartupTimings:
+    return _timings
+
+
+def mark_imports_done() -> None:
+    """
+    Record the import time; called once the app module has imported its dependencies.
+    """
+    if _timings.imports_seconds is None:
+        _timings.imports_seconds = time.perf_counter() - IMPORT_STARTED
+
+
+def begin_startup() -> None:
+    _timings.steps = {}
+    _timings._startup_started = time.perf_counter()
+
+
+@contextmanager
+def startup_step(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _timings.steps[name] = time.perf_counter() - started
+
+
+def mark_ready() -> StartupTimings:
+    now = time.perf_counter()
+    if _timings._startup_started is not None:
+        _timings.startup_seconds = now - _timings._startup_started
+    if _timings.ready_seconds is None:  # cold start only; later lifespans (tests) keep it
+        _timings.ready_seconds = now - IMPORT_STARTED
+    return _timings
+
+
+def reset_startup_timings() -> None:
+    """
+    Forget recorded timings; useful in tests.
+    """
+    global _timings
+    _timings = StartupTimings()
@@ -0,0 +1,143 @@
+"""
+Per-request stage timing.
+
+`span(stage)` times a block, feeds the stage latency histogram and, when a request has timing
+collection enabled, appends the duration to that request's `RequestTimings` (held in a
+contextvar, so nothing has to be threaded through call signatures). The collected timings are
+returned in the `Server-Timing` header and can be sampled into the logs.
+
+Thread-pool work runs in a copy of the caller's context and appends to the same object; work in
+a process pool is wrapped with `collect_timings`, which ships the child's spans back with the
+result so `record_timings` can merge them in the parent.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Iterator, TypeVar
+
+from app.core.metrics import STAGE_SECONDS
+
+T = TypeVar("T")
+
+Span = tuple[str, float]
+
+
+class RequestTimings:
+    """
+    Spans recorded for one request, in completion order.
+    """
+
+    __slots__ = ("spans", "started")
+
+    def __init__(self):
+        self.spans: list[Span] = []
+        self.started = time.perf_counter()
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.spans.append((stage, seconds))  # list.append is atomic, so worker threads may add too
+
+    def totals(self) -> dict[str, float]:
+        """
+        Seconds per stage, summed over repeated spans (e.g. one formatting span per draft).
+        """
+        totals: dict[str, float] = {}
+        for stage, seconds in list(self.spans):
+            totals[stage] = totals.get(stage, 0.0) + seconds
+        return totals
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """
+        Server-Timing header value, durations in milliseconds, plus the elapsed total.
+        """
+        parts = [f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in self.totals().items()]
+        parts.append(f"total;dur={self.elapsed() * 1000:.2f}")
+        return ", ".join(parts)
+
+
+_current: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> RequestTimings | None:
+    return _current.get()
+
+
+def start_timings() -> tuple[RequestTimings, object]:
+    """
+    Begin collecting spans for the current request; returns (timings, token for `stop_timings`).
+    """
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def stop_timings(token) -> None:
+    _current.reset(token)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        STAGE_SECONDS.observe(seconds, stage)
+        timings = _current.get()
+        if timings is not None:
+            timings.add(stage, seconds)
+
+
+def timed(stage: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """
+    Decorator form of `span` for synchronous functions.
+    """
+
+    def decorator(fn: Callable[..., T]) -> Callable[..., T]:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def record_timings(spans: list[Span]) -> None:
+    """
+    Merge spans measured elsewhere (e.g. in a worker process) into the metrics and the
+    current request.
+    """
+    timings = _current.get()
+    for stage, seconds in spans:
+        STAGE_SECONDS.observe(seconds, stage)
+        if timings is not None:
+            timings.add(stage, seconds)
+
+
+def merge_timings(spans: list[Span]) -> None:
+    """
+    Add spans already recorded in the metrics (e.g. by work shared with other requests) to the
+    current request only.
+    """
+    timings = _current.get()
+    if timings is not None:
+        for stage, seconds in spans:
+            timings.add(stage, seconds)
+
+
+def collect_timings(fn: Callable[..., T], *args) -> tuple[T, list[Span]]:
+    """
+    Run fn with a fresh collector and return (result, spans); used in worker processes.
+    """
+    timings, token = start_timings()
+    try:
+        return fn(*args), timings.spans
+    finally:
+        stop_timings(token)
@@ -1,18 +1,111 @@
-from fastapi import FastAPI
-from fastapi.responses import RedirectResponse
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse, RedirectResponse
 
 from app.api.routes import router as api_router
+from app.core.config import get_settings
+from app.core.deadline import DeadlineExceeded
+from app.core.logging import configure_logging, stop_logging
+from app.core.startup import begin_startup, mark_imports_done, mark_ready, startup_step
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.timing import ServerTimingMiddleware
+from app.middleware.rate_limit import close_rate_limiter, init_rate_limiter
+from app.openapi import use_static_schema
+from app.services.cache import get_response_cache
+from app.services.circuit_breaker import get_circuit_breaker
+from app.services.executor import WorkerPoolSaturated, close_stub_executor, init_stub_executor
+from app.services.hedging import get_latency_tracker
+from app.services.openai_client import close_openai_client, init_openai_client
+from app.services.prompts import precompile_prompts
+from app.services.singleflight import get_single_flight
+
+mark_imports_done()
+
+logger = logging.getLogger(__name__)
+
+
+def prewarm_caches() -> None:
+    """Build the lazily created per-process singletons before the first request needs them."""
+    get_response_cache()
+    get_single_flight()
+    get_circuit_breaker()
+    get_latency_tracker()
 
 
-def create_app() -> FastAPI:
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create process-wide resources on startup and release them on shutdown."""
+    begin_startup()
+    with startup_step("settings"):
+        settings = get_settings()
+    with startup_step("logging"):
+        configure_logging(
+            level=settings.log_level,
+            log_format=settings.log_format,
+            sample_rates=settings.log_sample_rates,
+            queue_size=settings.log_queue_size,
+        )
+    with startup_step("openai_client"):
+        await init_openai_client()
+    with startup_step("rate_limiter"):
+        init_rate_limiter()
+    with startup_step("stub_executor"):
+        init_stub_executor()
+    with startup_step("prompts"):
+        precompile_prompts()
+    with startup_step("caches"):
+        prewarm_caches()
+    timings = mark_ready()
+    logger.info(
+        "startup.timings",
+        extra={**timings.as_log_fields(), "openai_client_warmup": settings.openai_client_warmup},
+    )
+    try:
+        yield
+    finally:
+        await close_openai_client()
+        await close_rate_limiter()
+        close_stub_executor()
+        stop_logging()
+
+
+def create_app(static_openapi: bool | None = None) -> FastAPI:
     """Application factory to support future testability and configuration."""
-    app = FastAPI(title="Smart Reply Service", version="0.1.0")
+    app = FastAPI(title="Smart Reply Service", version="0.1.0", lifespan=lifespan)
 
     @app.get("/", include_in_schema=False)
     async def root():
         return RedirectResponse(url="/docs")
 
+    @app.exception_handler(WorkerPoolSaturated)
+    async def worker_pool_saturated(request: Request, exc: WorkerPoolSaturated):
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"detail": "Server busy, retry shortly."},
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+
+    @app.exception_handler(DeadlineExceeded)
+    async def deadline_exceeded(request: Request, exc: DeadlineExceeded):
+        return JSONResponse(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            content={"detail": "Request deadline exceeded."},
+        )
+
     app.include_router(api_router)
+    settings = get_settings()
+    if settings.static_openapi_enabled if static_openapi is None else static_openapi:
+        use_static_schema(app)
+    if settings.server_timing_enabled or settings.timing_log_sample_rate > 0:
+        app.add_middleware(
+            ServerTimingMiddleware,
+            header_enabled=settings.server_timing_enabled,
+            log_sample_rate=settings.timing_log_sample_rate,
+        )
+    if settings.metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
     return app
 
 
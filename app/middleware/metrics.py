@@ -0,0 +1,52 @@
+"""
+Pure ASGI middleware recording request counts, latency and in-flight requests.
+
+Written against the raw ASGI interface rather than BaseHTTPMiddleware so it adds no extra task
+or body buffering per request (and leaves streaming responses untouched).
+"""
+
+from __future__ import annotations
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import IN_FLIGHT, REQUEST_SECONDS, REQUESTS
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            IN_FLIGHT.dec()
+            # The router stores the matched route in the scope; use its template so path
+            # parameters never explode label cardinality. Unmatched paths share one label.
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            state = scope.get("state") or {}
+            REQUESTS.inc(
+                template,
+                scope["method"],
+                state.get("channel", ""),
+                state.get("tone", ""),
+                str(status_code),
+            )
+            REQUEST_SECONDS.observe(time.perf_counter() - start, template)
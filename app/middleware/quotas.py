@@ -0,0 +1,115 @@
+"""
+Client identity resolution and tiered quota configuration for rate limiting.
+
+Tiers are read once from a JSON file at startup into an in-memory index, so the hot path
+is one hash plus one dict lookup. Example file:
+
+    {
+      "default_tier": "free",
+      "tiers": {
+        "free": {"requests_per_minute": 60, "daily_quota": 1000, "burst": 10},
+        "pro": {"requests_per_minute": 600, "daily_quota": 100000, "burst": 50}
+      },
+      "clients": {"<api key or forwarded client id>": "pro"}
+    }
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+
+from fastapi import Request
+from pydantic import BaseModel, Field, model_validator
+
+from app.core.config import Settings
+
+
+class Tier(BaseModel):
+    name: str = "default"
+    requests_per_minute: int = Field(ge=1)
+    daily_quota: int | None = Field(default=None, ge=1, description="Requests per rolling 24h.")
+    burst: int | None = Field(default=None, ge=1, description="Requests per second.")
+
+
+class QuotaConfig(BaseModel):
+    default_tier: str
+    tiers: dict[str, Tier]
+    clients: dict[str, str] = Field(default_factory=dict)
+
+    @model_validator(mode="before")
+    @classmethod
+    def name_tiers(cls, data: dict) -> dict:
+        for name, tier in (data.get("tiers") or {}).items():
+            if isinstance(tier, dict):
+                tier.setdefault("name", name)
+        return data
+
+    @model_validator(mode="after")
+    def check_tier_references(self) -> "QuotaConfig":
+        unknown = {self.default_tier, *self.clients.values()} - set(self.tiers)
+        if unknown:
+            raise ValueError(f"Unknown tiers referenced: {sorted(unknown)}")
+        return self
+
+
+def hash_client_id(raw: str) -> str:
+    """
+    Stable digest used as the limiter key, so raw API keys never end up in limiter state.
+    """
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+class TierIndex:
+    """
+    Map of client identity -> Tier with a default for unknown clients.
+    """
+
+    def __init__(
+        self,
+        default: Tier,
+        clients: dict[str, Tier] | None = None,
+        tiers: dict[str, Tier] | None = None,
+    ):
+        self.default = default
+        self._clients = clients or {}
+        self.tiers = tiers or {default.name: default, **{tier.name: tier for tier in self._clients.values()}}
+
+    def lookup(self, identity: str) -> Tier:
+        return self._clients.get(identity, self.default)
+
+    @classmethod
+    def from_config(cls, config: QuotaConfig) -> "TierIndex":
+        return cls(
+            config.tiers[config.default_tier],
+            {hash_client_id(client): config.tiers[tier] for client, tier in config.clients.items()},
+            tiers=dict(config.tiers),
+        )
+
+
+def load_tier_index(settings: Settings) -> TierIndex:
+    """
+    Build the tier index from `rate_limit_tiers_file`, or a single default tier derived
+    from `rate_limit_per_minute` when no file is configured.
+    """
+    if not settings.rate_limit_tiers_file:
+        return TierIndex(Tier(requests_per_minute=settings.rate_limit_per_minute))
+    raw = json.loads(Path(settings.rate_limit_tiers_file).read_text(encoding="utf-8"))
+    return TierIndex.from_config(QuotaConfig.model_validate(raw))
+
+
+def client_identity(request: Request, settings: Settings) -> str:
+    """
+    Resolve the rate-limit identity for a request: the trusted forwarded client header or the
+    API key (hashed) when configured and present, otherwise the peer IP.
+    """
+    if settings.rate_limit_key_source == "header":
+        forwarded = request.headers.get(settings.rate_limit_key_header)
+        if forwarded:
+            return hash_client_id(forwarded)
+    elif settings.rate_limit_key_source == "api_key":
+        api_key = request.headers.get("x-api-key")
+        if api_key:
+            return hash_client_id(api_key)
+    return f"ip:{request.client.host if request.client else 'unknown'}"
@@ -1,46 +1,351 @@
+import logging
+import math
 import time
-from collections import defaultdict
+from collections import OrderedDict
+from dataclasses import dataclass
 from functools import lru_cache
 from typing import Callable
 
-from fastapi import HTTPException, Request, status
+from fastapi import HTTPException, Request, Response, status
 
 from app.core.config import get_settings
+from app.core.timing import span
+from app.middleware.quotas import TierIndex, client_identity, load_tier_index
 
+logger = logging.getLogger(__name__)
 
-class SimpleRateLimiter:
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float
+    retry_after: float = 0.0
+    # Start of the fixed window the hits were recorded in, so a refund targets that window.
+    window_start: float | None = None
+
+    def headers(self) -> dict[str, str]:
+        """
+        X-RateLimit-* headers for every response, plus Retry-After when rejected.
+        """
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+class RateLimitBackendError(RuntimeError):
+    """Raised when a shared limiter backend cannot be reached in time."""
+
+
+class RateLimitBackend:
     """
-    In-memory sliding window limiter for quick MVP testing.
-    Not suitable for multi-instance deployments.
+    Interface for rate-limit backends used by `rate_limit_dependency`.
     """
 
-    def __init__(self, max_per_minute: int):
-        self.max = max_per_minute
-        self.hits: defaultdict[str, list[float]] = defaultdict(list)
+    async def acquire(self, key: str, cost: int = 1, limit: int | None = None) -> RateLimitDecision:
+        """
+        Record `cost` hits for key if they fit; `limit` overrides the backend's default limit.
+        """
+        raise NotImplementedError
 
-    def check(self, key: str) -> None:
-        now = time.time()
-        window_start = now - 60
-        self.hits[key] = [ts for ts in self.hits[key] if ts >= window_start]
-        if len(self.hits[key]) >= self.max:
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail="Rate limit exceeded.",
+    async def refund(self, key: str, decision: RateLimitDecision, cost: int = 1) -> None:
+        """
+        Give back `cost` hits recorded by the admitted `decision`, in the window it charged.
+        A window that has since rolled over is left alone.
+        """
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        return None
+
+
+def sliding_window_retry_after(
+    limit: int, window: float, current: int, previous: int, cost: int, elapsed: float, reset_after: float
+) -> float:
+    """
+    Seconds until the decaying previous-window share leaves room for `cost` more hits.
+    `elapsed` is the fraction of the current window that has passed.
+    """
+    if cost > limit:
+        return window
+    if current + cost > limit:
+        # Only fits after this window rolls over and its count has decayed enough.
+        needed = 1 - (limit - cost) / current
+        return reset_after + window * max(0.0, needed)
+    needed = 1 - (limit - cost - current) / previous
+    return max(0.0, (needed - elapsed) * window)
+
+
+class _Window:
+    __slots__ = ("start", "current", "previous")
+
+    def __init__(self, start: float):
+        self.start = start
+        self.current = 0
+        self.previous = 0
+
+
+class SlidingWindowRateLimiter(RateLimitBackend):
+    """
+    In-memory sliding-window counter limiter.
+    Each key keeps only the current and previous fixed-window counts; the previous count is
+    weighted by how much of it still overlaps the sliding window, so memory and work per hit
+    are constant. Keys are kept in LRU order, idle keys are swept periodically and the table
+    is capped at `max_keys`. Per-process only; see the shared backend for multi-instance use.
+    """
+
+    def __init__(
+        self,
+        max_per_window: int,
+        window_seconds: float = 60.0,
+        max_keys: int = 10_000,
+        sweep_interval_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max = max_per_window
+        self.window = window_seconds
+        self.max_keys = max(1, max_keys)
+        self.sweep_interval = sweep_interval_seconds
+        self._clock = clock
+        self._windows: OrderedDict[str, _Window] = OrderedDict()
+        self._next_sweep = clock() + sweep_interval_seconds
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def _sweep(self, window_start: float) -> None:
+        # LRU order puts the idlest keys first, so stop at the first key still in use.
+        while self._windows:
+            key, state = next(iter(self._windows.items()))
+            if state.start >= window_start - self.window:
+                break
+            del self._windows[key]
+
+    def check(self, key: str, cost: int = 1, limit: int | None = None) -> RateLimitDecision:
+        """
+        Record `cost` hits for key (a batch counts once per item) if they fit in the window.
+        Rejected hits are not recorded. `limit` overrides `max_per_window` (e.g. per tier).
+        """
+        limit = self.max if limit is None else limit
+        now = self._clock()
+        window_start = now - (now % self.window)
+        if now >= self._next_sweep:
+            self._sweep(window_start)
+            self._next_sweep = now + self.sweep_interval
+
+        state = self._windows.get(key)
+        if state is None:
+            state = _Window(window_start)
+            self._windows[key] = state
+            if len(self._windows) > self.max_keys:
+                self._windows.popitem(last=False)
+        else:
+            self._windows.move_to_end(key)
+            if state.start != window_start:
+                rolled_once = state.start == window_start - self.window
+                state.previous = state.current if rolled_once else 0
+                state.current = 0
+                state.start = window_start
+
+        elapsed = (now - window_start) / self.window
+        weighted = state.previous * (1 - elapsed) + state.current
+        reset_after = window_start + self.window - now
+
+        if weighted + cost > limit:
+            return RateLimitDecision(
+                allowed=False,
+                limit=limit,
+                remaining=max(0, math.floor(limit - weighted)),
+                reset_after=reset_after,
+                retry_after=sliding_window_retry_after(
+                    limit, self.window, state.current, state.previous, cost, elapsed, reset_after
+                ),
             )
-        self.hits[key].append(now)
+
+        state.current += cost
+        return RateLimitDecision(
+            allowed=True,
+            limit=limit,
+            remaining=max(0, math.floor(limit - weighted - cost)),
+            reset_after=reset_after,
+            window_start=window_start,
+        )
+
+    async def acquire(self, key: str, cost: int = 1, limit: int | None = None) -> RateLimitDecision:
+        return self.check(key, cost, limit)
+
+    async def refund(self, key: str, decision: RateLimitDecision, cost: int = 1) -> None:
+        state = self._windows.get(key)
+        if state is not None and state.start == decision.window_start:
+            state.current = max(0, state.current - cost)
+
+
+class TieredRateLimiter:
+    """
+    Applies a client's tier: burst (per second), requests per minute and daily quota, each
+    enforced by its own sliding-window backend. Windows that no tier uses are never created.
+    A request is charged against every window or none: when a later window rejects it, the
+    hits already recorded in the earlier (shorter) windows are refunded.
+    """
+
+    def __init__(self, tiers: TierIndex, backend_for_window: Callable[[float], RateLimitBackend]):
+        self.tiers = tiers
+        configured = tiers.tiers.values()
+        self.per_second = backend_for_window(1.0) if any(t.burst for t in configured) else None
+        self.per_minute = backend_for_window(60.0)
+        self.per_day = backend_for_window(86_400.0) if any(t.daily_quota for t in configured) else None
+
+    def _windows(self, identity: str) -> list[tuple[RateLimitBackend, int]]:
+        tier = self.tiers.lookup(identity)
+        windows = []
+        if self.per_second is not None and tier.burst:
+            windows.append((self.per_second, tier.burst))
+        windows.append((self.per_minute, tier.requests_per_minute))
+        if self.per_day is not None and tier.daily_quota:
+            windows.append((self.per_day, tier.daily_quota))
+        return windows
+
+    def max_cost(self, identity: str) -> int:
+        """
+        Largest cost the client's tier can ever admit at once: its smallest window limit.
+        """
+        return min(limit for _, limit in self._windows(identity))
+
+    async def acquire(self, identity: str, cost: int = 1) -> RateLimitDecision:
+        """
+        Charge `cost` hits; returns the first rejecting decision, else the per-minute one.
+        """
+        admitted: dict[RateLimitBackend, RateLimitDecision] = {}
+        for backend, limit in self._windows(identity):
+            decision = await backend.acquire(identity, cost, limit)
+            if not decision.allowed:
+                await self._refund(admitted, identity, cost)
+                return decision
+            admitted[backend] = decision
+        return admitted[self.per_minute]
+
+    async def _refund(self, admitted: dict[RateLimitBackend, RateLimitDecision], identity: str, cost: int) -> None:
+        for backend, decision in admitted.items():
+            try:
+                await backend.refund(identity, decision, cost)
+            except RateLimitBackendError as exc:
+                # The request is rejected either way; at worst the window over-counts briefly.
+                logger.warning("rate_limit.refund_failed", extra={"error": str(exc)})
+
+    async def close(self) -> None:
+        for backend in (self.per_second, self.per_minute, self.per_day):
+            if backend is not None:
+                await backend.close()
 
 
 @lru_cache(maxsize=1)
-def _get_limiter() -> SimpleRateLimiter:
-    return SimpleRateLimiter(get_settings().rate_limit_per_minute)
+def _get_limiter() -> TieredRateLimiter:
+    settings = get_settings()
+    tiers = load_tier_index(settings)
+    if settings.rate_limit_backend == "redis":
+        from app.middleware.redis_rate_limit import RedisRateLimitBackend, RespPool
+
+        pool = RespPool(settings.rate_limit_redis_url, size=settings.rate_limit_redis_pool_size)
+
+        def backend_for_window(window: float) -> RateLimitBackend:
+            return RedisRateLimitBackend(
+                settings.rate_limit_per_minute,
+                pool,
+                window_seconds=window,
+                timeout_seconds=settings.rate_limit_redis_timeout_seconds,
+                local_batch=settings.rate_limit_local_batch,
+                sync_interval_seconds=settings.rate_limit_sync_interval_seconds,
+                max_keys=settings.rate_limit_max_keys,
+                key_prefix=f"smart-reply:rl:{int(window)}",
+            )
+    else:
+
+        def backend_for_window(window: float) -> RateLimitBackend:
+            return SlidingWindowRateLimiter(
+                settings.rate_limit_per_minute,
+                window_seconds=window,
+                max_keys=settings.rate_limit_max_keys,
+                sweep_interval_seconds=settings.rate_limit_sweep_interval_seconds,
+            )
+
+    return TieredRateLimiter(tiers, backend_for_window)
+
+
+async def enforce_rate_limit(
+    request: Request, cost: int = 1, response: Response | None = None
+) -> RateLimitDecision | None:
+    """
+    Charge `cost` requests against the caller's tier budget, raising 429 when it is exhausted.
+    The caller is identified by IP, API key or a trusted forwarded header (`rate_limit_key_source`).
+    Used directly by endpoints whose cost depends on the body (e.g. batches); a cost above the
+    tier's smallest limit can never be admitted and is rejected with 422. Rate-limit headers
+    are set on `response` when given and kept on request.state for responses built by hand.
+    If the backend is unreachable the request is let through (fail-open) or rejected with 503
+    (fail-closed) according to `rate_limit_failure_mode`.
+    """
+    identity = client_identity(request, get_settings())
+    request.state.rate_limit_headers = {}
+    limiter = _get_limiter()
+    max_cost = limiter.max_cost(identity)
+    if cost > max_cost:
+        # Would be rejected in every window, so a Retry-After would only invite a futile retry.
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"Batch of {cost} requests exceeds your rate limit of {max_cost}; split it into smaller batches.",
+        )
+    try:
+        with span("rate_limit"):
+            decision = await limiter.acquire(identity, cost)
+    except RateLimitBackendError as exc:
+        logger.warning("rate_limit.backend_unavailable", extra={"error": str(exc)})
+        if get_settings().rate_limit_failure_mode == "closed":
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Rate limiter unavailable.",
+                headers={"Retry-After": "1"},
+            ) from exc
+        return None
+
+    headers = decision.headers()
+    if not decision.allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded.",
+            headers=headers,
+        )
+    request.state.rate_limit_headers = headers
+    if response is not None:
+        response.headers.update(headers)
+    return decision
+
+
+async def rate_limit_dependency(request: Request, response: Response) -> None:
+    """
+    Dependency that enforces the caller's rate limit through the configured backend.
+    """
+    await enforce_rate_limit(request, response=response)
+
+
+def init_rate_limiter() -> None:
+    """
+    Build the limiter and load the tier file at startup so a bad config fails fast.
+    """
+    _get_limiter()
 
 
-async def rate_limit_dependency(request: Request) -> None:
+async def close_rate_limiter() -> None:
     """
-    Dependency that enforces a per-IP rate limit using an in-memory window.
+    Release backend resources (e.g. shared-store connections); called on app shutdown.
     """
-    client_id = request.client.host if request.client else "unknown"
-    _get_limiter().check(client_id)
+    if _get_limiter.cache_info().currsize:
+        await _get_limiter().close()
+        _get_limiter.cache_clear()
 
 
 def reset_rate_limit_cache() -> None:
@@ -0,0 +1,331 @@
+"""
+Shared rate-limit backend speaking the Redis protocol (RESP2).
+
+Every instance counts hits in the same fixed-window keys, so a client's quota is global
+rather than per instance. Each check is one EVAL round-trip: a Lua script reads the current
+and previous window counts, applies the same sliding-window estimate as the in-memory limiter
+and increments only when the hits fit, all atomically on the server.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable
+from urllib.parse import urlsplit
+
+from app.middleware.rate_limit import (
+    RateLimitBackend,
+    RateLimitBackendError,
+    RateLimitDecision,
+    sliding_window_retry_after,
+)
+
+
+# KEYS: current window, previous window. ARGV: hits already admitted locally (always recorded),
+# cost, limit, elapsed fraction of the current window, key TTL in ms.
+# Returns {admitted (0/1), current count, previous count}; counts exclude rejected hits.
+SLIDING_WINDOW_SCRIPT = """
+local pending = tonumber(ARGV[1])
+local cost = tonumber(ARGV[2])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0') + pending
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local admitted = 0
+if previous * (1 - tonumber(ARGV[4])) + current + cost <= tonumber(ARGV[3]) then
+  admitted = 1
+end
+local delta = pending + admitted * cost
+if delta > 0 then
+  current = redis.call('INCRBY', KEYS[1], delta)
+  redis.call('PEXPIRE', KEYS[1], ARGV[5])
+end
+return {admitted, current, previous}
+"""
+
+# KEYS: the window the refunded hits were recorded in. ARGV: cost, key TTL in ms.
+# Only decrements a window that still exists, never below zero, and keeps it expiring.
+REFUND_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]))
+if not current then
+  return 0
+end
+local left = math.max(0, current - tonumber(ARGV[1]))
+redis.call('SET', KEYS[1], left, 'PX', ARGV[2])
+return left
+"""
+
+
+class RespError(Exception):
+    """Error reply returned by the server."""
+
+
+def _encode_command(*parts: str | int) -> bytes:
+    out = [f"*{len(parts)}\r\n".encode()]
+    for part in parts:
+        data = str(part).encode("utf-8")
+        out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(out)
+
+
+class RespConnection:
+    """
+    A single RESP2 connection. Commands are pipelined: all requests are written at once
+    and the replies are read back in order.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self.loop = asyncio.get_running_loop()
+
+    @classmethod
+    async def open(cls, host: str, port: int, password: str | None = None, db: int = 0) -> "RespConnection":
+        reader, writer = await asyncio.open_connection(host, port)
+        conn = cls(reader, writer)
+        setup: list[tuple[str | int, ...]] = []
+        if password:
+            setup.append(("AUTH", password))
+        if db:
+            setup.append(("SELECT", db))
+        if setup:
+            await conn.pipeline(*setup)
+        return conn
+
+    async def pipeline(self, *commands: tuple[str | int, ...]) -> list:
+        self._writer.write(b"".join(_encode_command(*command) for command in commands))
+        await self._writer.drain()
+        replies = [await self._read_reply() for _ in commands]
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+    async def _read_reply(self):
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b"+":
+            return payload.decode()
+        if prefix == b"-":
+            return RespError(payload.decode())
+        if prefix == b":":
+            return int(payload)
+        if prefix == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = await self._reader.readexactly(length + 2)
+            return data[:-2].decode("utf-8")
+        if prefix == b"*":
+            length = int(payload)
+            if length < 0:
+                return None
+            return [await self._read_reply() for _ in range(length)]
+        raise RespError(f"Unexpected reply prefix: {line!r}")
+
+    async def close(self) -> None:
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except (ConnectionError, OSError):  # pragma: no cover - best effort on shutdown
+            pass
+
+
+class RespPool:
+    """
+    Small LIFO pool of RESP connections bounded by `size`.
+    Connections that error are discarded instead of being returned to the pool.
+    """
+
+    def __init__(self, url: str, size: int = 10):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 6379
+        self.password = parts.password
+        self.db = int(parts.path.lstrip("/") or 0)
+        self.size = max(1, size)
+        self._idle: list[RespConnection] = []
+        self._slots: asyncio.Semaphore | None = None
+        self._slots_loop: asyncio.AbstractEventLoop | None = None
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[RespConnection]:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.size)
+            self._slots_loop = loop
+        async with self._slots:
+            conn = None
+            while self._idle:
+                candidate = self._idle.pop()
+                if candidate.loop is loop:
+                    conn = candidate
+                    break
+                await candidate.close()
+            if conn is None:
+                conn = await RespConnection.open(self.host, self.port, self.password, self.db)
+            try:
+                yield conn
+            except BaseException:
+                await conn.close()
+                raise
+            self._idle.append(conn)
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            await conn.close()
+
+
+class _Lease:
+    __slots__ = ("remaining", "pending", "synced_at", "reset_at")
+
+    def __init__(self, remaining: int, synced_at: float, reset_at: float):
+        self.remaining = remaining
+        self.pending = 0
+        self.synced_at = synced_at
+        self.reset_at = reset_at
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """
+    Sliding-window counter stored in Redis, shared by every instance.
+
+    With `local_batch > 0`, each instance pre-aggregates: after a sync it may admit up to
+    `local_batch` hits per key locally (never more than the remaining quota it last saw) for
+    `sync_interval_seconds`, then flushes them with the next round-trip. This trades a bounded
+    overshoot (at most local_batch per instance per interval) for far fewer network hops.
+    """
+
+    def __init__(
+        self,
+        max_per_window: int,
+        pool: RespPool,
+        window_seconds: float = 60.0,
+        timeout_seconds: float = 0.25,
+        local_batch: int = 0,
+        sync_interval_seconds: float = 1.0,
+        max_keys: int = 10_000,
+        key_prefix: str = "smart-reply:rl",
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max = max_per_window
+        self.pool = pool
+        self.window = window_seconds
+        self.timeout = timeout_seconds
+        self.local_batch = local_batch
+        self.sync_interval = sync_interval_seconds
+        self.max_keys = max(1, max_keys)
+        self.key_prefix = key_prefix
+        self._clock = clock
+        self._leases: OrderedDict[str, _Lease] = OrderedDict()
+
+    async def acquire(self, key: str, cost: int = 1, limit: int | None = None) -> RateLimitDecision:
+        limit = self.max if limit is None else limit
+        now = self._clock()
+        lease = self._leases.get(key)
+        if (
+            lease is not None
+            and now - lease.synced_at < self.sync_interval
+            and lease.pending + cost <= min(self.local_batch, lease.remaining)
+        ):
+            lease.pending += cost
+            return RateLimitDecision(
+                allowed=True,
+                limit=limit,
+                remaining=lease.remaining - lease.pending,
+                reset_after=max(0.0, lease.reset_at - now),
+                window_start=math.floor(now / self.window) * self.window,
+            )
+
+        # Claim the locally admitted hits so a concurrent sync for the same key cannot flush them twice.
+        pending = 0
+        if lease is not None:
+            pending, lease.pending = lease.pending, 0
+        try:
+            decision = await asyncio.wait_for(
+                self._sync(key, pending, cost, limit, now), timeout=self.timeout
+            )
+        except (OSError, ConnectionError, asyncio.TimeoutError, RespError) as exc:
+            self._restore_pending(key, pending, now)
+            raise RateLimitBackendError(str(exc) or type(exc).__name__) from exc
+
+        if self.local_batch > 0:
+            renewed = _Lease(decision.remaining, now, now + decision.reset_after)
+            current = self._leases.get(key)
+            if current is not None:
+                renewed.pending = current.pending  # admitted locally during the round-trip
+            self._leases[key] = renewed
+            self._leases.move_to_end(key)
+            if len(self._leases) > self.max_keys:
+                self._leases.popitem(last=False)
+        return decision
+
+    async def refund(self, key: str, decision: RateLimitDecision, cost: int = 1) -> None:
+        lease = self._leases.get(key)
+        if lease is not None and lease.pending >= cost:
+            lease.pending -= cost  # still local, never reached the server
+            return
+        if decision.window_start is None:
+            return
+        index = round(decision.window_start / self.window)
+        ttl_ms = int(self.window * 2 * 1000)
+        try:
+            async with self.pool.connection() as conn:
+                await asyncio.wait_for(
+                    conn.pipeline(("EVAL", REFUND_SCRIPT, 1, f"{self.key_prefix}:{key}:{index}", cost, ttl_ms)),
+                    timeout=self.timeout,
+                )
+        except (OSError, ConnectionError, asyncio.TimeoutError, RespError) as exc:
+            raise RateLimitBackendError(str(exc) or type(exc).__name__) from exc
+
+    def _restore_pending(self, key: str, pending: int, now: float) -> None:
+        """
+        Put back locally admitted hits whose flush failed, so the next sync still records them.
+        """
+        if not pending:
+            return
+        lease = self._leases.get(key)
+        if lease is None:
+            lease = self._leases[key] = _Lease(0, now - self.sync_interval, now)  # stale: next hit syncs
+        lease.pending += pending
+
+    async def _sync(self, key: str, pending: int, cost: int, limit: int, now: float) -> RateLimitDecision:
+        index = math.floor(now / self.window)
+        current_key = f"{self.key_prefix}:{key}:{index}"
+        previous_key = f"{self.key_prefix}:{key}:{index - 1}"
+        ttl_ms = int(self.window * 2 * 1000)
+        elapsed = now / self.window - index
+
+        async with self.pool.connection() as conn:
+            (reply,) = await conn.pipeline(
+                ("EVAL", SLIDING_WINDOW_SCRIPT, 2, current_key, previous_key, pending, cost, limit, repr(elapsed), ttl_ms)
+            )
+        admitted, current, previous = (int(value) for value in reply)
+        weighted = previous * (1 - elapsed) + current
+        reset_after = (index + 1) * self.window - now
+
+        if not admitted:
+            return RateLimitDecision(
+                allowed=False,
+                limit=limit,
+                remaining=max(0, math.floor(limit - weighted)),
+                reset_after=reset_after,
+                retry_after=sliding_window_retry_after(
+                    limit, self.window, current, previous, cost, elapsed, reset_after
+                ),
+            )
+        return RateLimitDecision(
+            allowed=True,
+            limit=limit,
+            remaining=max(0, math.floor(limit - weighted)),
+            reset_after=reset_after,
+            window_start=index * self.window,
+        )
+
+    async def close(self) -> None:
+        await self.pool.close()
@@ -0,0 +1,53 @@
+"""
+Pure ASGI middleware that collects per-stage spans for each request, returns them in a
+`Server-Timing` header and samples them into the logs.
+
+The header is written when the response starts, so for streamed responses it covers the work
+done before the first byte (auth, rate limiting, cache lookup).
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.timing import start_timings, stop_timings
+
+logger = logging.getLogger(__name__)
+
+
+class ServerTimingMiddleware:
+    def __init__(self, app: ASGIApp, header_enabled: bool = True, log_sample_rate: float = 0.0):
+        self.app = app
+        self.header_enabled = header_enabled
+        self.log_sample_rate = log_sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings, token = start_timings()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and self.header_enabled:
+                MutableHeaders(scope=message).append("Server-Timing", timings.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            stop_timings(token)
+            if self.log_sample_rate and random.random() < self.log_sample_rate:
+                route = getattr(scope.get("route"), "path", None) or "unmatched"
+                logger.info(
+                    "request.timings",
+                    extra={
+                        "route": route,
+                        "total_ms": round(timings.elapsed() * 1000, 2),
+                        "stages_ms": {stage: round(seconds * 1000, 2) for stage, seconds in timings.totals().items()},
+                    },
+                )
@@ -0,0 +1,78 @@
+"""
+Build-time OpenAPI document.
+
+FastAPI generates the schema by walking every route and pydantic model on the first
+`/openapi.json` (or `/docs`) request, which lands on a cold instance's first few requests.
+`python -m app.openapi` writes that schema to openapi.json at build time instead; with
+`static_openapi_enabled` the app serves the file as-is and only falls back to generating the
+schema when the file is missing or unreadable. `--check` exits non-zero when the committed file
+is stale, so CI catches route or model changes that were not re-exported.
+
+Usage:
+    python -m app.openapi [--output openapi.json] [--check]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Callable
+
+from fastapi import FastAPI
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "openapi.json"
+
+
+def render_schema(schema: dict[str, Any]) -> str:
+    return json.dumps(schema, indent=2) + "\n"
+
+
+def load_static_schema(path: Path = SCHEMA_PATH) -> dict[str, Any] | None:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError) as exc:
+        logger.warning("openapi.static.unavailable", extra={"path": str(path), "error": str(exc)})
+        return None
+
+
+def use_static_schema(app: FastAPI, path: Path = SCHEMA_PATH) -> None:
+    """
+    Serve the pre-generated schema from `path`, read once on first use.
+    """
+    generate: Callable[[], dict[str, Any]] = app.openapi
+
+    def openapi() -> dict[str, Any]:
+        if app.openapi_schema is None:
+            app.openapi_schema = load_static_schema(path)
+        return app.openapi_schema or generate()
+
+    app.openapi = openapi  # type: ignore[method-assign]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", type=Path, default=SCHEMA_PATH)
+    parser.add_argument("--check", action="store_true", help="fail if the file differs from the app's schema")
+    args = parser.parse_args()
+
+    from app.main import create_app
+
+    # Generate from the routes, never from the file being checked or replaced.
+    rendered = render_schema(create_app(static_openapi=False).openapi())
+    if args.check:
+        current = args.output.read_text() if args.output.exists() else ""
+        if current != rendered:
+            print(f"{args.output} is out of date; run `python -m app.openapi`", file=sys.stderr)
+            sys.exit(1)
+        return
+    args.output.write_text(rendered)
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Content-addressed response cache for identical draft requests.
+
+Keys are a SHA-256 over the canonical JSON form of the validated DraftRequest, so
+retries and page reloads that re-send the same payload reuse the earlier drafts.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable
+
+from app.api.schemas import DraftRequest, DraftResponse
+from app.core.config import get_settings
+
+
+def request_cache_key(request: DraftRequest, namespace: str = "") -> str:
+    """
+    Canonical hash of a validated request. Field order and defaulted-vs-explicit values
+    do not matter; `namespace` separates entries produced by different generators/models.
+    """
+    canonical = json.dumps(
+        request.model_dump(mode="json"),
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(f"{namespace}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+class ResponseCacheBackend:
+    """
+    Interface for response cache backends.
+    Implementations must bound their memory and expire entries after their TTL.
+    """
+
+    def get(self, key: str) -> DraftResponse | None:
+        raise NotImplementedError
+
+    def set(self, key: str, value: DraftResponse) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        raise NotImplementedError
+
+
+class InMemoryResponseCache(ResponseCacheBackend):
+    """
+    Bounded in-process LRU cache with per-entry TTL.
+    Accessed from the event loop only, so no locking is needed.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        store: OrderedDict | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._store: OrderedDict[str, tuple[float, Any]] = store if store is not None else OrderedDict()
+        self._clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _encode(self, value: DraftResponse) -> Any:
+        return value
+
+    def _decode(self, raw: Any) -> DraftResponse:
+        return raw
+
+    def get(self, key: str) -> DraftResponse | None:
+        entry = self._store.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, raw = entry
+        if expires_at <= self._clock():
+            del self._store[key]
+            self.misses += 1
+            return None
+        self._store.move_to_end(key)
+        self.hits += 1
+        return self._decode(raw)
+
+    def set(self, key: str, value: DraftResponse) -> None:
+        self._store[key] = (self._clock() + self.ttl_seconds, self._encode(value))
+        self._store.move_to_end(key)
+        while len(self._store) > self.max_entries:
+            self._store.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._store.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._store),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_SHARED_STORE: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+
+class SharedResponseCache(InMemoryResponseCache):
+    """
+    Local stand-in for a shared cache (e.g. Redis): values are stored as serialized JSON
+    in a process-wide store that every instance sees, so they round-trip like they would
+    over the wire and behave the same regardless of which app instance wrote them.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, clock: Callable[[], float] = time.monotonic):
+        super().__init__(max_entries, ttl_seconds, store=_SHARED_STORE, clock=clock)
+
+    def _encode(self, value: DraftResponse) -> bytes:
+        return value.model_dump_json().encode("utf-8")
+
+    def _decode(self, raw: bytes) -> DraftResponse:
+        return DraftResponse.model_validate_json(raw)
+
+
+@lru_cache(maxsize=1)
+def get_response_cache() -> ResponseCacheBackend:
+    settings = get_settings()
+    backend = SharedResponseCache if settings.response_cache_backend == "shared" else InMemoryResponseCache
+    return backend(settings.response_cache_max_entries, settings.response_cache_ttl_seconds)
+
+
+def reset_response_cache() -> None:
+    """
+    Drop cached responses and the cache instance; useful in tests when settings change.
+    """
+    if get_response_cache.cache_info().currsize:
+        get_response_cache().clear()
+    get_response_cache.cache_clear()
@@ -0,0 +1,132 @@
+"""
+Circuit breaker for the upstream model.
+
+Closed: calls go upstream and their outcomes fill a sliding window of the last `window_size`
+calls; a call slower than `slow_call_seconds` counts as a failure. Once `min_calls` outcomes are
+in and the failure rate reaches `failure_rate_threshold` the breaker opens.
+Open: calls are refused (the caller serves the local stub) for `open_seconds`.
+Half-open: up to `half_open_max_calls` trial calls go upstream; one failure re-opens the
+breaker, all trials succeeding closes it.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Callable, Literal
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 15.0,
+        window_size: int = 20,
+        min_calls: int = 10,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 3,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = max(1, min_calls)
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        self._clock = clock
+        self._outcomes: deque[bool] = deque(maxlen=max(1, window_size))
+        self._failures = 0
+        self._state: CircuitState = "closed"
+        self._opened_at = 0.0
+        self._trials_started = 0
+        self._trials_succeeded = 0
+
+    @property
+    def state(self) -> CircuitState:
+        if self._state == "open" and self._clock() - self._opened_at >= self.open_seconds:
+            self._transition("half_open")
+        return self._state
+
+    def failure_rate(self) -> float:
+        return self._failures / len(self._outcomes) if self._outcomes else 0.0
+
+    def allow(self) -> bool:
+        """
+        Whether a call may go upstream now. In half-open state each True is a trial slot that
+        must be settled with `record` or `release`.
+        """
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and self._trials_started < self.half_open_max_calls:
+            self._trials_started += 1
+            return True
+        return False
+
+    def record(self, success: bool, duration: float) -> None:
+        """
+        Settle a call let through by `allow`; slow successes count as failures.
+        """
+        ok = success and duration < self.slow_call_seconds
+        if self._state == "half_open":
+            if not ok:
+                self._transition("open")
+                return
+            self._trials_succeeded += 1
+            if self._trials_succeeded >= self.half_open_max_calls:
+                self._transition("closed")
+            return
+        if self._state == "open":
+            return  # a call admitted before the breaker opened
+        if len(self._outcomes) == self._outcomes.maxlen and not self._outcomes[0]:
+            self._failures -= 1
+        self._outcomes.append(ok)
+        if not ok:
+            self._failures += 1
+        if len(self._outcomes) >= self.min_calls and self.failure_rate() >= self.failure_rate_threshold:
+            self._transition("open")
+
+    def release(self) -> None:
+        """
+        Give back a half-open trial slot for a call that ended without a verdict (cancelled).
+        """
+        if self._state == "half_open" and self._trials_started > self._trials_succeeded:
+            self._trials_started -= 1
+
+    def _transition(self, state: CircuitState) -> None:
+        logger.warning("circuit_breaker.transition", extra={"from_state": self._state, "to_state": state})
+        self._state = state
+        self._trials_started = 0
+        self._trials_succeeded = 0
+        if state == "open":
+            self._opened_at = self._clock()
+        if state == "closed":
+            self._outcomes.clear()
+            self._failures = 0
+
+
+@lru_cache(maxsize=1)
+def get_circuit_breaker() -> CircuitBreaker:
+    settings = get_settings()
+    return CircuitBreaker(
+        failure_rate_threshold=settings.circuit_failure_rate_threshold,
+        slow_call_seconds=settings.circuit_slow_call_seconds,
+        window_size=settings.circuit_window_size,
+        min_calls=settings.circuit_min_calls,
+        open_seconds=settings.circuit_open_seconds,
+        half_open_max_calls=settings.circuit_half_open_max_calls,
+    )
+
+
+def reset_circuit_breaker() -> None:
+    """
+    Forget breaker state; useful in tests when breaker env changes.
+    """
+    get_circuit_breaker.cache_clear()
@@ -0,0 +1,134 @@
+"""
+Input compaction before prompt building.
+
+Long email threads mostly repeat themselves: quoted earlier messages, signatures and header
+blocks. They are stripped from the incoming message, and the context is trimmed to a per-channel
+token budget (estimated locally), so the model only pays for text that shapes the reply. What
+was removed is reported back so it can be surfaced in the response notes.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import NamedTuple
+
+from app.api.schemas import DraftRequest
+from app.services.tokens import estimate_tokens
+
+# Lines that start a quoted earlier message; everything from here on is dropped.
+_CHAIN_START = re.compile(
+    r"^(?:On .{1,200} wrote:\s*$"
+    r"|-{2,}\s*(?:Original|Forwarded) Message\s*-{2,}"
+    r"|_{10,}\s*$)",
+    re.IGNORECASE,
+)
+_HEADER = re.compile(r"^(?:From|To|Cc|Bcc|Sent|Date|Subject):\s", re.IGNORECASE)
+_SIGNATURE_DELIMITER = re.compile(r"^--\s*$")
+_SENT_FROM = re.compile(r"^Sent from my \w+", re.IGNORECASE)
+_WORD = re.compile(r"\S+")
+
+# A signature longer than this is more likely part of the message than a sign-off block.
+_MAX_SIGNATURE_LINES = 10
+
+
+class CompactedRequest(NamedTuple):
+    request: DraftRequest
+    removed: list[str]
+
+
+def _is_header_block(lines: list[str], index: int) -> bool:
+    # An embedded "From: / Sent: / To: / Subject:" block opens a quoted message in most clients.
+    window = lines[index : index + 5]
+    return sum(1 for line in window if _HEADER.match(line)) >= 2
+
+
+def _chain_start(lines: list[str]) -> int | None:
+    seen_content = False
+    for index, line in enumerate(lines):
+        stripped = line.strip()
+        if _CHAIN_START.match(stripped) or (
+            seen_content and _HEADER.match(stripped) and _is_header_block(lines, index)
+        ):
+            return index
+        seen_content = seen_content or (bool(stripped) and not _HEADER.match(stripped))
+    return None
+
+
+def strip_thread_noise(text: str) -> tuple[str, list[str]]:
+    """
+    Remove quoted reply chains, signatures and header lines from a message.
+    Returns (text, kinds removed); the text is returned unchanged if nothing would be left.
+    """
+    lines = text.splitlines()
+    removed: list[str] = []
+
+    def note(kind: str) -> None:
+        if kind not in removed:
+            removed.append(kind)
+
+    cut = _chain_start(lines)
+    if cut is not None:
+        lines = lines[:cut]
+        note("quoted reply chain")
+
+    kept: list[str] = []
+    for index, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped.startswith(">"):
+            note("quoted reply chain")
+        elif _SIGNATURE_DELIMITER.match(line) and len(lines) - index <= _MAX_SIGNATURE_LINES:
+            note("signature")
+            break
+        elif _SENT_FROM.match(stripped):
+            note("signature")
+        elif _HEADER.match(stripped) and not any(kept_line.strip() for kept_line in kept):
+            note("headers")
+        else:
+            kept.append(line)
+
+    result = "\n".join(kept).strip()
+    if not removed or not result:
+        return text, []
+    return result, removed
+
+
+def trim_to_token_budget(text: str, budget: int) -> tuple[str, int]:
+    """
+    Keep the leading words of `text` that fit in `budget` estimated tokens, marking the cut with
+    an ellipsis. Returns (text, estimated tokens of the original).
+    """
+    total = estimate_tokens(text)
+    if budget <= 0 or total <= budget:
+        return text, total
+    used = 0
+    end = 0
+    for match in _WORD.finditer(text):
+        used += estimate_tokens(match.group())
+        if used > budget:
+            break
+        end = match.end()
+    return text[:end].rstrip() + " …", total
+
+
+def compact_request(request: DraftRequest, context_token_budget: int) -> CompactedRequest:
+    """
+    Return the request with thread noise stripped from the message and the context trimmed to
+    `context_token_budget` (0 disables trimming), plus a description of each removal.
+    """
+    message, kinds = strip_thread_noise(request.incoming_message)
+    removed = [f"removed {kind} from the message" for kind in kinds]
+    update: dict = {}
+    if kinds:
+        update["incoming_message"] = message
+    if request.context:
+        context, tokens = trim_to_token_budget(request.context, context_token_budget)
+        if context != request.context:
+            update["context"] = context
+            removed.append(f"trimmed context to ~{context_token_budget} of ~{tokens} estimated tokens")
+    if not update:
+        return CompactedRequest(request, [])
+    return CompactedRequest(request.model_copy(update=update), removed)
+
+
+def compaction_note(removed: list[str]) -> str:
+    return f"Compacted input: {'; '.join(removed)}." if removed else ""
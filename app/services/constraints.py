@@ -1,39 +1,43 @@
 """
 Constraint evaluation and light enforcement helpers.
+
+`enforce_constraints` is the single entry point used by draft generation: it tokenizes a
+draft once, evaluates every constraint, applies fixes only when something is violated and
+returns the adjusted text together with its evaluation. Once `max_words` has been applied the
+remaining fix-ups work on at most `max_words` words, so per-draft work is linear in the input.
 """
 
 from __future__ import annotations
 
-from textwrap import shorten
 from typing import List, Optional
 
 from app.api.schemas import Constraints
+from app.core.timing import timed
+from app.services.phrases import PhraseMatcher, get_phrase_matcher
+from app.services.text import shorten_text
 
 
-def check_constraints(text: str, constraints: Optional[Constraints]) -> dict:
-    """
-    Evaluate a draft against constraints.
+def _passing() -> dict:
+    return {
+        "within_max_words": True,
+        "includes_question": True,
+        "avoids_phrases": True,
+        "violations": [],
+    }
 
-    Returns a dict:
-        within_max_words: bool
-        includes_question: bool
-        avoids_phrases: bool
-        violations: list[str]
-    """
-    if not constraints:
-        return {
-            "within_max_words": True,
-            "includes_question": True,
-            "avoids_phrases": True,
-            "violations": [],
-        }
 
+def _evaluate(text: str, constraints: Constraints, word_count: int | None, matcher: PhraseMatcher) -> dict:
+    """
+    Evaluate text given its word count (only needed, and only computed, when max_words is set).
+    """
     violations: List[str] = []
-    words = text.split()
     within_max = True
-    if constraints.max_words and len(words) > constraints.max_words:
-        within_max = False
-        violations.append("max_words")
+    if constraints.max_words:
+        if word_count is None:
+            word_count = len(text.split())
+        if word_count > constraints.max_words:
+            within_max = False
+            violations.append("max_words")
 
     includes_question = True
     if constraints.must_include_question and "?" not in text:
@@ -41,13 +45,9 @@ def check_constraints(text: str, constraints: Optional[Constraints]) -> dict:
         violations.append("must_include_question")
 
     avoids_phrases = True
-    if constraints.avoid_phrases:
-        for phrase in constraints.avoid_phrases:
-            if phrase.lower() in text.lower():
-                avoids_phrases = False
-                if "avoid_phrases" not in violations:
-                    violations.append("avoid_phrases")
-                break
+    if matcher and matcher.search(text):
+        avoids_phrases = False
+        violations.append("avoid_phrases")
 
     return {
         "within_max_words": within_max,
@@ -57,51 +57,87 @@ def check_constraints(text: str, constraints: Optional[Constraints]) -> dict:
     }
 
 
-def adjust_text_for_violations(text: str, constraints: Optional[Constraints]) -> str:
+def _clamp_words(text: str, max_words: int) -> tuple[str, int]:
     """
-    Apply a single pass of gentle adjustments to address violations.
-    Keeps edits minimal to preserve the author’s voice.
+    Keep at most max_words words; returns (text, word_count). Splits at most max_words times.
+    """
+    words = text.split(None, max_words)
+    if len(words) > max_words:
+        return " ".join(words[:max_words]), max_words
+    return text, len(words)
+
+
+def check_constraints(text: str, constraints: Optional[Constraints]) -> dict:
+    """
+    Evaluate a draft against constraints.
+
+    Returns a dict:
+        within_max_words: bool
+        includes_question: bool
+        avoids_phrases: bool
+        violations: list[str]
+    """
+    if not constraints:
+        return _passing()
+    return _evaluate(text, constraints, None, get_phrase_matcher(constraints.avoid_phrases))
+
+
+@timed("constraints")
+def enforce_constraints(text: str, constraints: Optional[Constraints]) -> tuple[str, dict]:
+    """
+    Evaluate a draft and, if anything is violated, apply a single pass of gentle adjustments.
+    Returns (text, evaluation of the returned text).
     """
     if not constraints:
-        return text
+        return text, _passing()
+
+    matcher = get_phrase_matcher(constraints.avoid_phrases)
+    max_words = constraints.max_words
+    evaluation = _evaluate(text, constraints, None, matcher)
+    violations = evaluation["violations"]
+    if not violations:
+        return text, evaluation
 
     current = text
-    evaluation = check_constraints(current, constraints)
-
-    if "max_words" in evaluation["violations"] and constraints.max_words:
-        sentences = current.split(". ")
-        if len(sentences) > 1:
-            sentences = sentences[: max(1, len(sentences) - 1)]
-            current = ". ".join(sentences).strip()
-        words = current.split()
-        if len(words) > constraints.max_words:
-            current = " ".join(words[: constraints.max_words])
-        current = shorten(current, width=constraints.max_words * 6, placeholder="…")
-        # Final hard clamp to word count
-        words = current.split()
-        if len(words) > constraints.max_words:
-            current = " ".join(words[: constraints.max_words])
-
-    if "must_include_question" in evaluation["violations"]:
+    word_count: int | None = None
+    if "max_words" in violations:
+        # Drop the last sentence, then clamp; everything after this sees <= max_words words.
+        last_sentence = current.rfind(". ")
+        if last_sentence != -1:
+            current = current[:last_sentence].strip()
+        current, _ = _clamp_words(current, max_words)
+        current = shorten_text(current, width=max_words * 6, placeholder="…")
+        current, _ = _clamp_words(current, max_words)
+
+    if "must_include_question" in violations:
         if not current.strip().endswith("?"):
             current = f"{current.rstrip('. ')} What do you think?"
 
-    if "avoid_phrases" in evaluation["violations"] and constraints.avoid_phrases:
-        for phrase in constraints.avoid_phrases:
-            current = current.replace(phrase, "").strip()
+    if "avoid_phrases" in violations:
+        current, _ = matcher.remove(current)
+        current = current.strip()
 
     # Final clamp to max_words after all adjustments
-    if constraints.max_words:
-        words = current.split()
-        if len(words) > constraints.max_words:
-            current = " ".join(words[: constraints.max_words])
+    if max_words:
+        current, word_count = _clamp_words(current, max_words)
 
     if constraints.must_include_question and "?" not in current:
-        words = current.split()
-        if constraints.max_words and len(words) >= constraints.max_words:
+        if max_words and word_count >= max_words:
+            words = current.split()
             words[-1] = "?"
             current = " ".join(words)
         else:
             current = f"{current} ?"
+            if word_count is not None:
+                word_count += 1
+
+    return current, _evaluate(current, constraints, word_count, matcher)
+
 
-    return current
+def adjust_text_for_violations(text: str, constraints: Optional[Constraints]) -> str:
+    """
+    Apply a single pass of gentle adjustments to address violations.
+    Keeps edits minimal to preserve the author’s voice.
+    """
+    adjusted, _ = enforce_constraints(text, constraints)
+    return adjusted
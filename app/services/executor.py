@@ -0,0 +1,149 @@
+"""
+Bounded worker pool for the CPU-bound stub pipeline (base drafts, constraints, formatting).
+
+Modes:
+- `inline`  : run on the event loop (previous behaviour; cheapest for tiny inputs)
+- `thread`  : thread pool; keeps the event loop responsive while a draft is being built
+- `process` : process pool; spreads stub generation over several cores
+
+At most `workers + max_queue` jobs are admitted at once; beyond that callers get
+`WorkerPoolSaturated` immediately (served as 503 with Retry-After) instead of queueing
+without bound.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Literal, TypeVar
+
+from app.core.config import get_settings
+from app.core.timing import collect_timings, record_timings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+ExecutorMode = Literal["inline", "thread", "process"]
+
+
+class WorkerPoolSaturated(RuntimeError):
+    """Raised when the worker pool already has its maximum number of jobs admitted."""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__("Worker pool saturated.")
+        self.retry_after = retry_after
+
+
+class StubExecutor:
+    """
+    Runs synchronous callables off the event loop with bounded admission.
+    In process mode callables and arguments must be picklable (module-level functions and
+    pydantic models are).
+    """
+
+    def __init__(self, mode: ExecutorMode = "thread", workers: int = 4, max_queue: int = 64):
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.capacity = self.workers + max(0, max_queue)
+        self._pending = 0
+        self._pending_lock = threading.Lock()  # released from pool threads when jobs finish
+        self._pool: Executor | None = None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.mode == "process":
+                # spawn avoids forking a process that already runs event-loop and pool threads.
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="stub")
+        return self._pool
+
+    def start(self) -> None:
+        """
+        Create the pool eagerly (process workers are spawned on first submit).
+        """
+        if self.mode != "inline":
+            self._get_pool()
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        if self.mode == "inline":
+            return fn(*args)
+        with self._pending_lock:
+            admitted = self._pending < self.capacity
+            if admitted:
+                self._pending += 1
+        if not admitted:
+            logger.warning("stub_executor.saturated", extra={"pending": self._pending})
+            raise WorkerPoolSaturated()
+        try:
+            if self.mode == "process":
+                # Spans measured in the worker process come back with the result.
+                future = self._get_pool().submit(collect_timings, fn, *args)
+            else:
+                # Run in a copy of the caller's context so spans reach the request's timings.
+                future = self._get_pool().submit(contextvars.copy_context().run, fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # The slot is held by the job, not the awaiting caller: a cancelled caller leaves the
+        # job running, and it must keep counting towards the bound until it finishes.
+        future.add_done_callback(self._release)
+        result = await asyncio.wrap_future(future)
+        if self.mode == "process":
+            result, spans = result
+            record_timings(spans)
+        return result
+
+    def _release(self, _future: object = None) -> None:
+        with self._pending_lock:
+            self._pending -= 1
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+@lru_cache(maxsize=1)
+def get_stub_executor() -> StubExecutor:
+    settings = get_settings()
+    return StubExecutor(
+        mode=settings.stub_executor_mode,
+        workers=settings.stub_executor_workers,
+        max_queue=settings.stub_executor_max_queue,
+    )
+
+
+def init_stub_executor() -> None:
+    """
+    Start the worker pool on app startup.
+    """
+    get_stub_executor().start()
+
+
+def close_stub_executor() -> None:
+    """
+    Stop the worker pool; called on app shutdown.
+    """
+    if get_stub_executor.cache_info().currsize:
+        get_stub_executor().shutdown()
+        get_stub_executor.cache_clear()
+
+
+def reset_stub_executor() -> None:
+    """
+    Shut down and forget the cached executor; useful in tests when executor env changes.
+    """
+    close_stub_executor()
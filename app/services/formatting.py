@@ -1,12 +1,28 @@
 """
 Channel-aware formatting utilities for draft replies.
+
+Each channel is a fixed sequence of compiled rules applied to a shared `_Draft`, which
+tokenizes the text into sentences/word counts at most once and keeps those counts in step as
+rules rewrite the text, so a draft is formatted in linear time regardless of its length.
 """
 
 import re
-from textwrap import shorten
 import random
+from typing import Callable, NamedTuple
 
 from app.api.schemas import Channel
+from app.core.timing import timed
+from app.services.text import shorten_text
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+_EMAIL_GREETING = re.compile(r"\s*(hi|hello|dear)\b", re.IGNORECASE)
+_EMAIL_SIGNOFF = re.compile(r"(regards|cheers|sincerely|thanks)[,.]?$", re.IGNORECASE)
+_EMAIL_SIGNOFF_TAIL = len("sincerely,")
+_LINKEDIN_CTA = re.compile(r"(chat|talk|connect|let me know)", re.IGNORECASE)
+
+_EMAIL_SIGNOFF_TEXT = "Best regards,\nTim"
+_LINKEDIN_CTA_TEXT = "If you’re open to it, happy to connect and compare notes."
+_EMOJI_POOL = ["🙂", "👍", "✅", "🙏"]
 
 
 def normalize_terminal_punctuation(text: str) -> str:
@@ -20,118 +36,150 @@ def normalize_terminal_punctuation(text: str) -> str:
     return f"{stripped}."
 
 
-def _ensure_email_greeting(text: str) -> tuple[str, bool]:
-    # If the draft already starts with a greeting, leave it; otherwise prepend a neutral greeting.
-    if re.match(r"^(hi|hello|dear)\b", text.strip(), re.IGNORECASE):
-        return text, False
-    greeting = "Hi there,"
-    return f"{greeting}\n\n{text.strip()}", True
+class _Draft:
+    """
+    Draft text plus its tokenization, computed lazily and shared by all rules.
+    Rules that know how their edit changes the word count pass it to `update`
+    so the text is not re-split.
+    """
+
+    __slots__ = ("text", "_sentences", "_word_count")
 
+    def __init__(self, text: str):
+        self.text = text
+        self._sentences: list[str] | None = None
+        self._word_count: int | None = None
 
-def _ensure_email_signoff(text: str) -> tuple[str, bool]:
-    # Add a UK-English friendly sign-off if none exists.
-    if re.search(r"(regards|cheers|sincerely|thanks)[,.]?\s*$", text.strip(), re.IGNORECASE):
-        return text, False
-    signoff = "Best regards,\nTim"
-    base = normalize_terminal_punctuation(text.rstrip())
-    return f"{base}\n\n{signoff}", True
+    @property
+    def sentences(self) -> list[str]:
+        if self._sentences is None:
+            self._sentences = [s for s in (part.strip() for part in _SENTENCE_BOUNDARY.split(self.text)) if s]
+        return self._sentences
 
+    @property
+    def word_count(self) -> int:
+        if self._word_count is None:
+            self._word_count = len(self.text.split())
+        return self._word_count
 
-def _ensure_blank_lines(text: str) -> tuple[str, bool]:
-    if "\n\n" in text:
-        return text, False
-    if "\n" in text:
-        return text.replace("\n", "\n\n"), True
-    return text, False
+    def update(self, text: str, word_count: int | None = None) -> None:
+        self.text = text
+        self._sentences = None
+        self._word_count = word_count
 
 
-def _word_count(text: str) -> int:
-    return len(text.split())
+class _FormatOptions(NamedTuple):
+    emoji_enabled: bool
+    rng: random.Random | None
 
 
-def _truncate_slack(text: str) -> tuple[str, bool]:
-    if _word_count(text) <= 60:
-        return text, False
-    truncated = shorten(text, width=360, placeholder="…")
-    return truncated, True
+def _ensure_email_greeting(draft: _Draft, options: _FormatOptions) -> bool:
+    # If the draft already starts with a greeting, leave it; otherwise prepend a neutral greeting.
+    if _EMAIL_GREETING.match(draft.text):
+        return False
+    draft.update(f"Hi there,\n\n{draft.text.strip()}")
+    return True
+
 
+def _ensure_blank_lines(draft: _Draft, options: _FormatOptions) -> bool:
+    text = draft.text
+    if "\n\n" in text or "\n" not in text:
+        return False
+    draft.update(text.replace("\n", "\n\n"), word_count=draft._word_count)
+    return True
 
-def _bullets_from_sentences(text: str) -> tuple[str, bool]:
+
+def _ensure_email_signoff(draft: _Draft, options: _FormatOptions) -> bool:
+    # Add a UK-English friendly sign-off if none exists; only the tail can match.
+    base = draft.text.rstrip()
+    if _EMAIL_SIGNOFF.search(base[-_EMAIL_SIGNOFF_TAIL:]):
+        return False
+    draft.update(f"{normalize_terminal_punctuation(base)}\n\n{_EMAIL_SIGNOFF_TEXT}")
+    return True
+
+
+def _bullets_from_sentences(draft: _Draft, options: _FormatOptions) -> bool:
     # For Slack, convert multiple sentences into bullets to improve scannability.
-    sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if s.strip()]
+    sentences = draft.sentences
     if len(sentences) < 2:
-        return text, False
-    bullets = "\n".join(f"- {s}" for s in sentences)
-    return bullets, True
+        return False
+    # Each bullet adds one "-" token to the word count.
+    word_count = draft.word_count + len(sentences)
+    draft.update("\n".join(f"- {s}" for s in sentences), word_count=word_count)
+    return True
+
 
+def _truncate_slack(draft: _Draft, options: _FormatOptions) -> bool:
+    if draft.word_count <= 60:
+        return False
+    draft.update(shorten_text(draft.text, width=360, placeholder="…"))
+    return True
 
-def _add_emojis(text: str, rng: random.Random | None = None) -> tuple[str, bool]:
+
+def _add_emojis(draft: _Draft, options: _FormatOptions) -> bool:
     # Light-touch emoji sprinkle (0-2) only when requested and none already present.
-    rng = rng or random
-    emoji_pool = ["🙂", "👍", "✅", "🙏"]
-    if any(ch in text for ch in emoji_pool):
-        return text, False
+    if not options.emoji_enabled:
+        return False
+    rng = options.rng or random
+    if any(ch in draft.text for ch in _EMOJI_POOL):
+        return False
     count = rng.randint(0, 2)
     if count == 0:
-        return text, False
-    additions = rng.choices(emoji_pool, k=count)
-    return f"{text} {' '.join(additions)}", True
+        return False
+    additions = rng.choices(_EMOJI_POOL, k=count)
+    draft.update(f"{draft.text} {' '.join(additions)}")
+    return True
 
 
-def _split_linkedin_paras(text: str) -> tuple[str, bool]:
-    sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if s.strip()]
+def _split_linkedin_paras(draft: _Draft, options: _FormatOptions) -> bool:
+    # Group sentences into up to three paragraphs of roughly 50+ words, counting words once per sentence.
+    sentences = draft.sentences
     if not sentences:
-        return text, False
-    chunks = []
-    current = []
-    for sent in sentences:
-        current.append(sent)
-        if len(" ".join(current).split()) >= 50 and len(chunks) < 2:
-            chunks.append(" ".join(current))
-            current = []
-    if current:
-        chunks.append(" ".join(current))
+        return False
+    chunks: list[str] = []
+    start = 0
+    words = 0
+    for index, sentence in enumerate(sentences):
+        words += len(sentence.split())
+        if words >= 50 and len(chunks) < 2:
+            chunks.append(" ".join(sentences[start : index + 1]))
+            start = index + 1
+            words = 0
+    if start < len(sentences):
+        chunks.append(" ".join(sentences[start:]))
     if len(chunks) <= 1:
-        return text, False
-    return "\n\n".join(chunks[:3]), True
+        return False
+    draft.update("\n\n".join(chunks[:3]))
+    return True
+
+
+def _ensure_linkedin_cta(draft: _Draft, options: _FormatOptions) -> bool:
+    if _LINKEDIN_CTA.search(draft.text):
+        return False
+    draft.update(f"{draft.text.rstrip()} {_LINKEDIN_CTA_TEXT}")
+    return True
+
 
+_Rule = Callable[[_Draft, _FormatOptions], bool]
 
-def _ensure_linkedin_cta(text: str) -> tuple[str, bool]:
-    if re.search(r"(chat|talk|connect|let me know)", text, re.IGNORECASE):
-        return text, False
-    cta = "If you’re open to it, happy to connect and compare notes."
-    return f"{text.rstrip()} {cta}", True
+# Per channel: ordered rules and the number of rules the formatting score is averaged over.
+_CHANNEL_RULES: dict[str, tuple[tuple[_Rule, ...], int]] = {
+    "email": ((_ensure_email_greeting, _ensure_blank_lines, _ensure_email_signoff), 3),
+    "slack": ((_bullets_from_sentences, _truncate_slack, _add_emojis), 3),
+    "linkedin": ((_split_linkedin_paras, _ensure_linkedin_cta), 2),
+}
 
 
+@timed("formatting")
 def apply_channel_format(channel: Channel, text: str, emoji_enabled: bool = False, rng: random.Random | None = None) -> tuple[str, float]:
     """
     Apply channel-specific formatting rules. Returns (formatted_text, formatting_score 0-1).
     """
-    applied = 0
-    if channel == "email":
-        text, changed = _ensure_email_greeting(text)
-        applied += changed
-        text, changed = _ensure_blank_lines(text)
-        applied += changed
-        text, changed = _ensure_email_signoff(text)
-        applied += changed
-        return text, applied / 3
-
-    if channel == "slack":
-        text, changed = _bullets_from_sentences(text)
-        applied += changed
-        text, trunc = _truncate_slack(text)
-        applied += trunc
-        if emoji_enabled:
-            text, emoji_added = _add_emojis(text, rng=rng)
-            applied += emoji_added
-        return text, applied / 3
-
-    if channel == "linkedin":
-        text, split = _split_linkedin_paras(text)
-        applied += split
-        text, cta_added = _ensure_linkedin_cta(text)
-        applied += cta_added
-        return text, applied / 2
-
-    return text, 0.0
+    spec = _CHANNEL_RULES.get(channel)
+    if spec is None:
+        return text, 0.0
+    rules, denominator = spec
+    draft = _Draft(text)
+    options = _FormatOptions(emoji_enabled, rng)
+    applied = sum(rule(draft, options) for rule in rules)
+    return draft.text, applied / denominator
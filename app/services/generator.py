@@ -3,6 +3,7 @@ Base draft generator interface (stub). Intended to be swapped with an LLM-backed
 """
 
 from app.api.schemas import Draft, DraftRequest
+from app.core.timing import timed
 import re
 
 
@@ -51,6 +52,7 @@ def _clean_phrasing(text: str) -> str:
     return cleaned
 
 
+@timed("base_drafts")
 def generate_base_drafts(request: DraftRequest) -> list[Draft]:
     """
     Produce three simple drafts based on the incoming request.
@@ -0,0 +1,93 @@
+"""
+Hedged upstream requests.
+
+If the first attempt has not produced a usable result after the recent p95 upstream latency, a
+second identical request is sent and whichever returns a valid response first wins; the other
+is cancelled. Only the slowest ~5% of calls pay for a duplicate request, which cuts tail latency
+without doubling upstream load.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+from collections import deque
+from functools import lru_cache
+from typing import Awaitable, Callable, TypeVar
+
+from app.core.metrics import UPSTREAM_HEDGES
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """
+    Rolling window of recent upstream latencies with a cached quantile.
+    The sorted copy is rebuilt at most once every `refresh_every` observations.
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 20, refresh_every: int = 10):
+        self._samples: deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.refresh_every = max(1, refresh_every)
+        self._since_refresh = 0
+        self._sorted: list[float] = []
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._since_refresh += 1
+
+    def quantile(self, q: float) -> float | None:
+        """
+        Nearest-rank quantile of the window, or None until `min_samples` have been seen.
+        """
+        if len(self._samples) < self.min_samples:
+            return None
+        if self._since_refresh >= self.refresh_every or len(self._sorted) != len(self._samples):
+            self._sorted = sorted(self._samples)
+            self._since_refresh = 0
+        index = min(len(self._sorted) - 1, max(0, math.ceil(q * len(self._sorted)) - 1))
+        return self._sorted[index]
+
+
+@lru_cache(maxsize=1)
+def get_latency_tracker() -> LatencyTracker:
+    return LatencyTracker()
+
+
+async def hedged(call: Callable[[], Awaitable[T]], delay: float) -> T:
+    """
+    Run `call()`; if it has not finished after `delay` seconds, start a second `call()` and
+    return the first successful result, cancelling the other. If one fails the other is still
+    awaited; the error is raised only when both fail.
+    """
+    primary = asyncio.ensure_future(call())
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+    except BaseException:
+        primary.cancel()
+        raise
+    if done:
+        return primary.result()
+
+    hedge = asyncio.ensure_future(call())
+    pending = {primary, hedge}
+    error: BaseException | None = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    UPSTREAM_HEDGES.inc("primary" if task is primary else "hedge")
+                    return task.result()
+                error = error or task.exception()
+        if error is None:
+            raise RuntimeError("Hedged request finished without a result or an error")
+        raise error
+    finally:
+        for task in (primary, hedge):
+            if not task.done():
+                task.cancel()
@@ -1,103 +1,143 @@
+import asyncio
 import json
 import logging
 import time
 import uuid
-from textwrap import shorten
-from typing import Iterable
+from typing import AsyncIterator, Iterable, NamedTuple
 
 from pydantic import ValidationError
 
-from app.api.schemas import Draft, DraftRequest, DraftResponse, Tone
-from app.core.config import get_settings
-from app.services.constraints import adjust_text_for_violations, check_constraints
+from app.api.schemas import Constraints, Draft, DraftRequest, DraftResponse, Tone
+from app.core.config import Settings, get_settings
+from app.core.deadline import DeadlineExceeded, check_deadline, run_within_deadline
+from app.core.metrics import (
+    CIRCUIT_FALLBACKS,
+    PROMPT_TOKENS,
+    UPSTREAM_INPUT_TOKENS,
+    UPSTREAM_REPAIRS,
+    UPSTREAM_RETRIES,
+)
+from app.core.timing import Span, merge_timings, span, start_timings, timed
+from app.services.cache import get_response_cache, request_cache_key
+from app.services.circuit_breaker import CircuitBreaker, get_circuit_breaker
+from app.services.compaction import compact_request, compaction_note
+from app.services.constraints import enforce_constraints
+from app.services.executor import WorkerPoolSaturated, get_stub_executor
 from app.services.formatting import apply_channel_format
 from app.services.generator import generate_base_drafts
-from app.services.prompts import SYSTEM_PROMPT, build_user_prompt
+from app.services.hedging import get_latency_tracker, hedged
+from app.services.openai_client import get_openai_client
+from app.services.phrases import get_phrase_matcher
+from app.services.prompts import SYSTEM_PROMPT, BuiltPrompt, build_prompt, response_format
+from app.services.repair import coerce_draft_response, load_json
+from app.services.singleflight import get_single_flight
+from app.services.streaming import DraftArrayScanner, StreamEvent
+from app.services.text import shorten_text
 
 logger = logging.getLogger(__name__)
 
+CIRCUIT_FALLBACK_NOTE = "Served by the local fallback while the model is unavailable."
 
-def _stub_drafts(request: DraftRequest) -> DraftResponse:
-    """
-    Lightweight fallback when no OpenAI key is configured.
-    Keeps the service usable in local/dev without external calls.
-    Includes constraint enforcement + channel formatting to mimic production behaviour.
-    """
-    base_drafts = generate_base_drafts(request)
 
-    def apply_constraints(text: str) -> tuple[str, bool]:
-        constraints = request.constraints
-        changed = False
-        if constraints is None:
-            return text, changed
-        result = text
-        if constraints.must_include_question and "?" not in result:
-            result = f"{result} What do you think?"
-            changed = True
-        if constraints.avoid_phrases:
-            for phrase in constraints.avoid_phrases:
-                if phrase.lower() in result.lower():
-                    result = result.replace(phrase, "").strip()
-                    changed = True
-        if constraints.max_words:
-            before = result
-            result = shorten(result, width=constraints.max_words * 6, placeholder="…")
-            changed = changed or result != before
-        return result, changed
-
-    drafts: list[Draft] = []
-    formatting_hits = 0.0
-    constraint_hits = 0.0
-    all_constraints_satisfied: list[bool] = []
-    length_reasonable_flags: list[bool] = []
-    context_flags: list[bool] = []
+def _new_request_id() -> str:
+    return uuid.uuid4().hex[:8]
 
-    emoji_enabled = bool(request.options and request.options.emoji)
 
-    for draft in base_drafts:
-        text, constraint_changed = apply_constraints(draft.text)
-        constraint_hits += int(constraint_changed)
-        evaluation = check_constraints(text, request.constraints)
-        if evaluation["violations"]:
-            text = adjust_text_for_violations(text, request.constraints)
-            evaluation = check_constraints(text, request.constraints)
+class _StubDraftOutcome(NamedTuple):
+    draft: Draft
+    formatting_score: float
+    constraints_satisfied: bool
+    length_reasonable: bool
+    context_referenced: bool
+
+
+@timed("constraints")
+def _apply_stub_constraints(text: str, constraints: Constraints | None) -> tuple[str, bool]:
+    changed = False
+    if constraints is None:
+        return text, changed
+    result = text
+    if constraints.must_include_question and "?" not in result:
+        result = f"{result} What do you think?"
+        changed = True
+    if constraints.avoid_phrases:
+        result, removed = get_phrase_matcher(constraints.avoid_phrases).remove(result)
+        if removed:
+            result = result.strip()
+            changed = True
+    if constraints.max_words:
+        before = result
+        result = shorten_text(result, width=constraints.max_words * 6, placeholder="…")
+        changed = changed or result != before
+    return result, changed
 
-        formatted_text, formatting_score = apply_channel_format(
-            request.channel, text, emoji_enabled=emoji_enabled
-        )
-        formatting_hits += formatting_score
-        drafts.append(Draft(label=draft.label, text=formatted_text))
 
-        all_constraints_satisfied.append(
+def _finalize_stub_draft(request: DraftRequest, draft: Draft, emoji_enabled: bool) -> _StubDraftOutcome:
+    """
+    Enforce constraints and channel formatting on a single base draft.
+    """
+    text, _ = _apply_stub_constraints(draft.text, request.constraints)
+    text, evaluation = enforce_constraints(text, request.constraints)
+    formatted_text, formatting_score = apply_channel_format(
+        request.channel, text, emoji_enabled=emoji_enabled
+    )
+    return _StubDraftOutcome(
+        draft=Draft(label=draft.label, text=formatted_text),
+        formatting_score=formatting_score,
+        constraints_satisfied=(
             evaluation["within_max_words"] and evaluation["includes_question"] and evaluation["avoids_phrases"]
-        )
-        length_reasonable_flags.append(
+        ),
+        length_reasonable=(
             evaluation["within_max_words"]
             if request.constraints and request.constraints.max_words
             else len(formatted_text.split()) <= 160
-        )
-        if request.context:
-            context_flags.append(request.context.lower() in formatted_text.lower())
-        else:
-            context_flags.append(True)
+        ),
+        context_referenced=(
+            request.context.lower() in formatted_text.lower() if request.context else True
+        ),
+    )
+
+
+def _stub_summary(request: DraftRequest, outcomes: list[_StubDraftOutcome]) -> tuple[float, str]:
+    """
+    Score finished stub drafts; returns (confidence_score, notes).
+    """
+    formatting_hits = sum(outcome.formatting_score for outcome in outcomes)
+    all_constraints_satisfied = all(outcome.constraints_satisfied for outcome in outcomes)
+    all_context_referenced = all(outcome.context_referenced for outcome in outcomes)
 
     baseline = 0.70
-    formatting_component = 0.10 if (formatting_hits / len(base_drafts)) > 0 else 0.0
-    constraints_component = 0.10 if (request.constraints and all(all_constraints_satisfied)) else 0.0
-    length_component = 0.05 if all(length_reasonable_flags) else 0.0
-    context_component = 0.05 if (request.context and all(context_flags)) else 0.0
+    formatting_component = 0.10 if (formatting_hits / len(outcomes)) > 0 else 0.0
+    constraints_component = 0.10 if (request.constraints and all_constraints_satisfied) else 0.0
+    length_component = 0.05 if all(outcome.length_reasonable for outcome in outcomes) else 0.0
+    context_component = 0.05 if (request.context and all_context_referenced) else 0.0
 
     confidence_raw = baseline + formatting_component + constraints_component + length_component + context_component
 
-    if request.constraints and all(all_constraints_satisfied) and request.context and all(context_flags):
+    if request.constraints and all_constraints_satisfied and request.context and all_context_referenced:
         confidence = min(1.0, round(confidence_raw, 2))
     else:
         confidence = min(0.95, round(confidence_raw, 2))
     notes = "Applied channel formatting; enforced constraints; context referenced." if request.context else \
         "Applied channel formatting; enforced constraints."
+    return confidence, notes
+
+
+def _stub_drafts(request: DraftRequest) -> DraftResponse:
+    """
+    Lightweight fallback when no OpenAI key is configured.
+    Keeps the service usable in local/dev without external calls.
+    Includes constraint enforcement + channel formatting to mimic production behaviour.
+    """
+    emoji_enabled = bool(request.options and request.options.emoji)
+    outcomes = [
+        _finalize_stub_draft(request, draft, emoji_enabled) for draft in generate_base_drafts(request)
+    ]
+    confidence, notes = _stub_summary(request, outcomes)
+    drafts = [outcome.draft for outcome in outcomes]
     return DraftResponse(
         drafts=drafts,
-        request_id=uuid.uuid4().hex[:8],
+        request_id=_new_request_id(),
         detected_tone="neutral-professional",
         channel_applied=request.channel,
         notes=notes,
@@ -105,18 +145,208 @@ def _stub_drafts(request: DraftRequest) -> DraftResponse:
     )
 
 
-def generate_reply_drafts(request: DraftRequest) -> DraftResponse:
+def _with_note(response: DraftResponse, note: str) -> DraftResponse:
+    return response.model_copy(update={"notes": f"{response.notes} {note}".strip()}) if note else response
+
+
+def _with_fallback_note(response: DraftResponse) -> DraftResponse:
+    return _with_note(response, CIRCUIT_FALLBACK_NOTE)
+
+
+def _is_fallback(response: DraftResponse) -> bool:
+    return response.notes.endswith(CIRCUIT_FALLBACK_NOTE)
+
+
+def _circuit_breaker(settings: Settings) -> CircuitBreaker | None:
+    return get_circuit_breaker() if settings.circuit_breaker_enabled and settings.openai_api_key else None
+
+
+def _cache_namespace(settings: Settings) -> str:
+    # Stub and model outputs differ, so they never share entries.
+    return f"openai:{settings.openai_model}" if settings.openai_api_key else "stub"
+
+
+async def generate_reply_drafts(request: DraftRequest) -> DraftResponse:
     """
-    Call OpenAI Responses API and return validated DraftResponse.
-    Retries on JSON parse/validation failures (max 2 retries).
-    Falls back to a local stub when no API key is set.
+    Return drafts for a request, serving identical requests from the response cache when enabled
+    and coalescing concurrent identical requests onto a single in-flight generation.
+    Cache hits and coalesced callers get a fresh request_id so callers can still tell responses apart.
+    Raises DeadlineExceeded if this caller's deadline passes first; a coalesced generation runs
+    without any one caller's deadline and keeps running for the other callers.
     """
+    return await run_within_deadline(_generate_reply_drafts_cached(request))
+
+
+async def _generate_reply_drafts_cached(request: DraftRequest) -> DraftResponse:
     settings = get_settings()
+    if not (settings.response_cache_enabled or settings.request_coalescing_enabled):
+        with span("generation"):
+            return await _generate_reply_drafts(request, settings)
+
+    key = request_cache_key(request, namespace=_cache_namespace(settings))
+    if settings.response_cache_enabled:
+        cached = get_response_cache().get(key)
+        if cached is not None:
+            logger.info("drafts.cache.hit", extra={"cache_key": key[:16]})
+            return cached.model_copy(update={"request_id": _new_request_id()}, deep=True)
+
+    async def generate() -> DraftResponse:
+        with span("generation"):
+            result = await _generate_reply_drafts(request, settings)
+        # Circuit-breaker fallbacks stand in for model output and must not outlive the outage.
+        if settings.response_cache_enabled and not _is_fallback(result):
+            get_response_cache().set(key, result)
+        return result
+
+    if not settings.request_coalescing_enabled:
+        return await generate()
+
+    async def generate_shared() -> tuple[DraftResponse, list[Span]]:
+        # Runs without any caller's deadline or timings; every waiter gets the spans.
+        timings, _ = start_timings()
+        return await generate(), list(timings.spans)
+
+    (result, spans), shared = await get_single_flight().do(key, generate_shared)
+    merge_timings(spans)
+    if shared:
+        logger.info("drafts.coalesced", extra={"cache_key": key[:16]})
+        return result.model_copy(update={"request_id": _new_request_id()}, deep=True)
+    return result
+
+
+async def generate_reply_drafts_batch(
+    requests: list[DraftRequest], max_concurrency: int
+) -> list[DraftResponse | Exception]:
+    """
+    Generate drafts for many requests with at most `max_concurrency` generations in flight.
+    Results keep the input order; a failed item yields its exception instead of failing the batch.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(request: DraftRequest) -> DraftResponse | Exception:
+        async with semaphore:
+            try:
+                return await generate_reply_drafts(request)
+            except Exception as exc:  # noqa: BLE001 - reported per item
+                logger.warning("drafts.batch.item_failed", extra={"error": str(exc)})
+                return exc
+
+    return await asyncio.gather(*(run(request) for request in requests))
+
+
+class _InvalidUpstreamPayload(Exception):
+    """An upstream response that could not be parsed into a DraftResponse."""
+
+    def __init__(self, request_id: str | None, error: Exception):
+        super().__init__(str(error))
+        self.request_id = request_id
+        self.error = error
+
+
+def _compact(request: DraftRequest, settings: Settings) -> tuple[DraftRequest, str]:
+    """
+    Strip thread noise and trim context before prompt building; returns (request, note for `notes`).
+    """
+    if not settings.input_compaction_enabled:
+        return request, ""
+    with span("compaction"):
+        compacted, removed = compact_request(request, settings.context_token_budgets.get(request.channel, 0))
+    if removed:
+        logger.info("drafts.input.compacted", extra={"removed": removed})
+    return compacted, compaction_note(removed)
+
+
+def _build_prompt(request: DraftRequest, settings: Settings) -> BuiltPrompt:
+    with span("prompt"):
+        prompt = build_prompt(request, include_schema=not settings.openai_structured_outputs)
+    PROMPT_TOKENS.observe(prompt.prefix_tokens, "prefix")
+    PROMPT_TOKENS.observe(prompt.tokens, "total")
+    return prompt
+
+
+def _record_usage(response) -> None:
+    usage = getattr(response, "usage", None)
+    input_tokens = getattr(usage, "input_tokens", None)
+    if isinstance(input_tokens, int):
+        UPSTREAM_INPUT_TOKENS.inc("input", amount=input_tokens)
+        cached = getattr(getattr(usage, "input_tokens_details", None), "cached_tokens", None)
+        if isinstance(cached, int):
+            UPSTREAM_INPUT_TOKENS.inc("cached", amount=cached)
+
+
+def _response_defaults(request: DraftRequest, request_id: str | None) -> dict:
+    """
+    Values for fields a near-miss payload left out; see `coerce_draft_response`.
+    """
+    return {
+        "request_id": request_id or _new_request_id(),
+        "detected_tone": request.tone,
+        "channel_applied": request.channel,
+        "notes": "",
+    }
+
+
+def _parse_payload(content_text: str, defaults: dict) -> DraftResponse:
+    """
+    Parse and validate model output, repairing near misses locally; raises on unusable payloads.
+    """
+    with span("parse"):
+        parsed, repairs = load_json(content_text)
+    with span("validate"):
+        result, shape_repairs = coerce_draft_response(parsed, defaults)
+    repairs += shape_repairs
+    if repairs:
+        for kind in repairs:
+            UPSTREAM_REPAIRS.inc(kind)
+        logger.info("openai.responses.repaired", extra={"request_id": defaults["request_id"], "repairs": repairs})
+    return result
+
+
+async def _request_drafts(
+    client, settings: Settings, request: DraftRequest, user_prompt: str
+) -> tuple[DraftResponse, str | None]:
+    """
+    One upstream round-trip plus parsing; returns (drafts, upstream request id).
+    Successful round-trips feed the latency tracker that sets the hedging delay.
+    """
+    start = time.perf_counter()
+    with span("upstream"):
+        response = await client.responses.create(
+            model=settings.openai_model,
+            input=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt},
+            ],
+            text={"format": response_format(settings.openai_structured_outputs)},
+            temperature=0.6,
+            max_output_tokens=600,
+        )
+    request_id = getattr(response, "id", None)
+    _record_usage(response)
+    try:
+        content_text = getattr(response, "output_text", None) or response.output[0].content[0].text
+        result = _parse_payload(content_text, _response_defaults(request, request_id))
+    except (json.JSONDecodeError, ValidationError, AttributeError) as err:
+        raise _InvalidUpstreamPayload(request_id, err) from err
+    get_latency_tracker().observe(time.perf_counter() - start)
+    return result, request_id
+
+
+async def _generate_reply_drafts(request: DraftRequest, settings: Settings) -> DraftResponse:
+    """
+    Call OpenAI Responses API and return validated DraftResponse.
+    Near-miss payloads are repaired locally; payloads that are still unusable are retried
+    (max 2 retries) while the request deadline allows.
+    With hedging enabled, an attempt slower than the recent p95 is raced against a duplicate.
+    Falls back to a local stub when no API key is set, or (marked in `notes`) while the upstream
+    circuit breaker is open.
+    Every upstream round-trip is awaited so the event loop stays free for other requests.
+    """
     start = time.perf_counter()
 
     if not settings.openai_api_key:
         logger.warning("openai.key.missing - returning stub drafts")
-        result = _stub_drafts(request)
+        result = await get_stub_executor().run(_stub_drafts, request)
         latency_ms = (time.perf_counter() - start) * 1000
         logger.info(
             "drafts.generated.stub",
@@ -124,16 +354,44 @@ def generate_reply_drafts(request: DraftRequest) -> DraftResponse:
         )
         return result
 
-    # Import here so tests can run without the openai package installed.
+    breaker = _circuit_breaker(settings)
+    if breaker is None:
+        return await _generate_model_drafts(request, settings, start)
+    if not breaker.allow():
+        CIRCUIT_FALLBACKS.inc()
+        logger.info("drafts.generated.circuit_fallback", extra={"circuit_state": breaker.state})
+        return _with_fallback_note(await get_stub_executor().run(_stub_drafts, request))
+
     try:
-        from openai import OpenAI
-    except ImportError as exc:  # pragma: no cover - exercised only in dev without deps
-        raise RuntimeError(
-            "openai package is required when SMART_REPLY_OPENAI_API_KEY is set."
-        ) from exc
+        result = await _generate_model_drafts(request, settings, start)
+    except (asyncio.CancelledError, DeadlineExceeded):
+        # The caller gave up (cancellation or its own deadline); not an upstream failure.
+        _settle_cancelled(breaker, time.perf_counter() - start)
+        raise
+    except Exception:
+        breaker.record(False, time.perf_counter() - start)
+        raise
+    breaker.record(True, time.perf_counter() - start)
+    return result
+
+
+def _settle_cancelled(breaker: CircuitBreaker, duration: float) -> None:
+    # A call cut off by the deadline after running longer than the slow-call threshold is
+    # evidence of a degraded upstream; a shorter one says nothing either way.
+    if duration >= breaker.slow_call_seconds:
+        breaker.record(False, duration)
+    else:
+        breaker.release()
+
+
+async def _generate_model_drafts(request: DraftRequest, settings: Settings, start: float) -> DraftResponse:
+    client = get_openai_client()
+    compacted, compaction = _compact(request, settings)
+    prompt = _build_prompt(compacted, settings)
+    user_prompt = prompt.text
 
-    client = OpenAI(api_key=settings.openai_api_key, base_url=settings.openai_base_url)
-    user_prompt = build_user_prompt(request)
+    def attempt_once():
+        return _request_drafts(client, settings, request, user_prompt)
 
     max_retries = 2
     attempt = 0
@@ -141,40 +399,218 @@ def generate_reply_drafts(request: DraftRequest) -> DraftResponse:
 
     while attempt <= max_retries:
         attempt += 1
-        response = client.responses.create(
-            model=settings.openai_model,
-            input=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": user_prompt},
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.6,
-            max_output_tokens=600,
-        )
-        request_id = getattr(response, "id", None)
-
+        check_deadline()
         try:
-            content_text = getattr(response, "output_text", None) or response.output[0].content[0].text
-            parsed = json.loads(content_text)
-            result = DraftResponse.model_validate(parsed)
-            latency_ms = (time.perf_counter() - start) * 1000
-            logger.info(
-                "openai.responses.success",
-                extra={
-                    "request_id": request_id,
-                    "latency_ms": round(latency_ms, 2),
-                    "attempt": attempt,
-                },
-            )
-            return result
-        except (json.JSONDecodeError, ValidationError, AttributeError) as err:
-            last_error = err
+            if settings.upstream_hedging_enabled:
+                delay = get_latency_tracker().quantile(settings.upstream_hedge_quantile)
+                result, request_id = await hedged(
+                    attempt_once, settings.upstream_hedge_default_delay_seconds if delay is None else delay
+                )
+            else:
+                result, request_id = await attempt_once()
+        except _InvalidUpstreamPayload as invalid:
+            last_error = invalid.error
             logger.warning(
                 "openai.responses.parse_failure",
-                extra={"request_id": request_id, "attempt": attempt, "error": str(err)},
+                extra={"request_id": invalid.request_id, "attempt": attempt, "error": str(invalid.error)},
             )
             if attempt > max_retries:
-                raise
+                raise invalid.error
+            UPSTREAM_RETRIES.inc()
+            continue
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        logger.info(
+            "openai.responses.success",
+            extra={
+                "request_id": request_id,
+                "latency_ms": round(latency_ms, 2),
+                "attempt": attempt,
+                "prompt_tokens_estimate": prompt.tokens,
+                "prompt_prefix_tokens_estimate": prompt.prefix_tokens,
+            },
+        )
+        return _with_note(result, compaction)
 
     # Should never reach here
     raise RuntimeError(f"Failed to parse OpenAI response after {max_retries + 1} attempts: {last_error}")
+
+
+def _draft_event(index: int, draft: Draft) -> StreamEvent:
+    return "draft", {"index": index, "label": draft.label, "text": draft.text}
+
+
+def _summary_event(response: DraftResponse) -> StreamEvent:
+    return "summary", {
+        "request_id": response.request_id,
+        "detected_tone": response.detected_tone,
+        "channel_applied": response.channel_applied,
+        "notes": response.notes,
+        "confidence_score": response.confidence_score,
+    }
+
+
+async def _stream_stub(request: DraftRequest) -> AsyncIterator[StreamEvent | DraftResponse]:
+    emoji_enabled = bool(request.options and request.options.emoji)
+    executor = get_stub_executor()
+    outcomes = []
+    base_drafts = await executor.run(generate_base_drafts, request)
+    for index, draft in enumerate(base_drafts):
+        outcome = await executor.run(_finalize_stub_draft, request, draft, emoji_enabled)
+        outcomes.append(outcome)
+        yield _draft_event(index, outcome.draft)
+
+    confidence, notes = _stub_summary(request, outcomes)
+    yield DraftResponse(
+        drafts=[outcome.draft for outcome in outcomes],
+        request_id=_new_request_id(),
+        detected_tone="neutral-professional",
+        channel_applied=request.channel,
+        notes=notes,
+        confidence_score=confidence,
+    )
+
+
+def _finalize_model_draft(request: DraftRequest, draft: Draft, emoji_enabled: bool) -> Draft:
+    """
+    Enforce constraints and channel formatting on one streamed model draft.
+    """
+    text, _ = enforce_constraints(draft.text, request.constraints)
+    text, _ = apply_channel_format(request.channel, text, emoji_enabled=emoji_enabled)
+    return Draft(label=draft.label, text=text)
+
+
+async def _stream_openai(request: DraftRequest) -> AsyncIterator[StreamEvent | DraftResponse]:
+    settings = get_settings()
+    emoji_enabled = bool(request.options and request.options.emoji)
+    client = get_openai_client()
+    compacted, compaction = _compact(request, settings)
+    prompt = _build_prompt(compacted, settings)
+    stream = await client.responses.create(
+        model=settings.openai_model,
+        input=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt.text},
+        ],
+        text={"format": response_format(settings.openai_structured_outputs)},
+        temperature=0.6,
+        max_output_tokens=600,
+        stream=True,
+    )
+
+    executor = get_stub_executor()
+    scanner = DraftArrayScanner()
+    finalized: dict[int, Draft] = {}  # by position in the drafts array
+    async for event in stream:
+        if getattr(event, "type", None) != "response.output_text.delta":
+            continue
+        yield "delta", {"text": event.delta}
+        for index, item in scanner.feed(event.delta):
+            if index >= 3:
+                continue  # extra drafts are trimmed from the final payload
+            try:
+                draft = Draft.model_validate(item)
+            except ValidationError:
+                continue  # surfaced by full validation below
+            finalized[index] = await executor.run(_finalize_model_draft, request, draft, emoji_enabled)
+            yield _draft_event(index, finalized[index])
+
+    result = _parse_payload(scanner.text, _response_defaults(request, None))
+    # Drafts only usable after repair (e.g. bare strings) are emitted once the payload is complete.
+    for index, draft in enumerate(result.drafts):
+        if index not in finalized:
+            finalized[index] = await executor.run(_finalize_model_draft, request, draft, emoji_enabled)
+            yield _draft_event(index, finalized[index])
+    drafts = [finalized[index] for index in range(len(result.drafts))]
+    yield _with_note(result.model_copy(update={"drafts": drafts}), compaction)
+
+
+async def _stream_guarded(
+    source: AsyncIterator[StreamEvent | DraftResponse], breaker: CircuitBreaker
+) -> AsyncIterator[StreamEvent | DraftResponse]:
+    """
+    Pass a model stream through while recording its outcome on the circuit breaker.
+    """
+    start = time.perf_counter()
+    try:
+        async for item in source:
+            yield item
+    except (asyncio.CancelledError, GeneratorExit):
+        _settle_cancelled(breaker, time.perf_counter() - start)
+        raise
+    except Exception:
+        breaker.record(False, time.perf_counter() - start)
+        raise
+    breaker.record(True, time.perf_counter() - start)
+
+
+async def _stream_fallback(request: DraftRequest) -> AsyncIterator[StreamEvent | DraftResponse]:
+    async for item in _stream_stub(request):
+        yield _with_fallback_note(item) if isinstance(item, DraftResponse) else item
+
+
+async def stream_reply_drafts(request: DraftRequest) -> AsyncIterator[StreamEvent]:
+    """
+    Yield (event, data) SSE pairs for a draft request.
+    Every draft gets constraint enforcement and channel formatting as soon as it is complete. A fully
+    validated response is written to the response cache, and cache hits are replayed without
+    regenerating. Failures, including upstream errors mid-stream, end the stream with an `error` event.
+    """
+    settings = get_settings()
+    start = time.perf_counter()
+    namespace = _cache_namespace(settings)
+    if settings.openai_api_key:
+        namespace += ":stream"  # streamed model drafts are formatted, unlike non-streamed ones
+    key = request_cache_key(request, namespace=namespace)
+
+    if settings.response_cache_enabled:
+        cached = get_response_cache().get(key)
+        if cached is not None:
+            for index, draft in enumerate(cached.drafts):
+                yield _draft_event(index, draft)
+            yield _summary_event(cached.model_copy(update={"request_id": _new_request_id()}))
+            return
+
+    breaker = _circuit_breaker(settings)
+    if not settings.openai_api_key:
+        source = _stream_stub(request)
+    elif breaker is None:
+        source = _stream_openai(request)
+    elif breaker.allow():
+        source = _stream_guarded(_stream_openai(request), breaker)
+    else:
+        CIRCUIT_FALLBACKS.inc()
+        source = _stream_fallback(request)
+    try:
+        while True:
+            try:
+                item = await run_within_deadline(source.__anext__())
+            except StopAsyncIteration:
+                break
+            if isinstance(item, DraftResponse):
+                if settings.response_cache_enabled and not _is_fallback(item):
+                    get_response_cache().set(key, item)
+                yield _summary_event(item)
+            else:
+                yield item
+    except (json.JSONDecodeError, ValidationError) as err:
+        logger.warning("drafts.stream.parse_failure", extra={"error": str(err)})
+        yield "error", {"detail": "Model returned an invalid draft payload."}
+        return
+    except WorkerPoolSaturated:
+        yield "error", {"detail": "Server busy, retry shortly."}
+        return
+    except DeadlineExceeded:
+        await source.aclose()
+        yield "error", {"detail": "Request deadline exceeded."}
+        return
+    except Exception as err:  # noqa: BLE001 - e.g. upstream API, connection or timeout errors
+        logger.warning("drafts.stream.failed", extra={"error": str(err)})
+        await source.aclose()
+        yield "error", {"detail": "Draft generation failed."}
+        return
+
+    logger.info(
+        "drafts.generated.stream",
+        extra={"latency_ms": round((time.perf_counter() - start) * 1000, 2)},
+    )
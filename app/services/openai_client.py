@@ -0,0 +1,124 @@
+"""
+Process-wide AsyncOpenAI client with a pooled, keep-alive HTTP transport.
+
+The client is created once (normally in the app lifespan) and reused by every request,
+so TLS sessions and connections survive between drafts instead of being rebuilt per call.
+Importing `openai` is the slowest import in the service, so `openai_client_warmup` can move
+that work off the startup path: into a worker thread after startup, or to the first call.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import logging
+import threading
+from typing import Any
+
+from app.core.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+_client: Any | None = None
+_client_lock = threading.Lock()
+_warmup: asyncio.Task | None = None
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+def create_openai_client(settings: Settings) -> Any:
+    """
+    Build an AsyncOpenAI client backed by a pooled httpx.AsyncClient configured from settings.
+    Falls back to HTTP/1.1 (with a warning) when HTTP/2 is requested but `h2` is not installed.
+    """
+    # Import here so tests can run without the openai package installed.
+    try:
+        import httpx
+        from openai import AsyncOpenAI
+    except ImportError as exc:  # pragma: no cover - exercised only in dev without deps
+        raise RuntimeError(
+            "openai package is required when SMART_REPLY_OPENAI_API_KEY is set."
+        ) from exc
+
+    http2 = settings.openai_http2
+    if http2 and not _http2_available():
+        logger.warning("openai.client.http2_unavailable - install 'h2' to enable HTTP/2")
+        http2 = False
+
+    http_client = httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.openai_max_connections,
+            max_keepalive_connections=settings.openai_max_keepalive_connections,
+            keepalive_expiry=settings.openai_keepalive_expiry_seconds,
+        ),
+        timeout=httpx.Timeout(
+            settings.openai_timeout_seconds,
+            connect=settings.openai_connect_timeout_seconds,
+        ),
+    )
+    return AsyncOpenAI(
+        api_key=settings.openai_api_key,
+        base_url=settings.openai_base_url,
+        http_client=http_client,
+    )
+
+
+def get_openai_client() -> Any:
+    """
+    Return the shared client, creating it lazily if the lifespan hook has not run
+    (e.g. TestClient used without a context manager, or direct service calls).
+    """
+    global _client
+    if _client is None:
+        # The background warm-up may be building it in a thread; build it only once.
+        with _client_lock:
+            if _client is None:
+                _client = create_openai_client(get_settings())
+    return _client
+
+
+async def _warm_up() -> None:
+    try:
+        await asyncio.to_thread(get_openai_client)
+    except Exception:  # the first request retries and surfaces the error
+        logger.exception("openai.client.warmup_failed")
+
+
+async def init_openai_client() -> None:
+    """
+    Create the shared client when an OpenAI key is configured: now, in the background,
+    or not at all (lazily on first use), depending on `openai_client_warmup`.
+    """
+    global _warmup
+    settings = get_settings()
+    if not settings.openai_api_key or settings.openai_client_warmup == "lazy":
+        return
+    if settings.openai_client_warmup == "background":
+        _warmup = asyncio.create_task(_warm_up())
+    else:
+        get_openai_client()
+
+
+async def close_openai_client() -> None:
+    """
+    Close the shared client and its connection pool; called on app shutdown.
+    """
+    global _client, _warmup
+    warmup, _warmup = _warmup, None
+    if warmup is not None:
+        await warmup  # a thread cannot be cancelled; let it finish so its client gets closed
+    client, _client = _client, None
+    if client is not None:
+        await client.close()
+
+
+def reset_openai_client() -> None:
+    """
+    Drop the cached client without closing it; useful in tests when settings change.
+    """
+    global _client, _warmup
+    _client = None
+    _warmup = None
@@ -0,0 +1,70 @@
+"""
+Case-insensitive multi-phrase matching for `avoid_phrases`.
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Iterable
+
+
+class PhraseMatcher:
+    """
+    All phrases compiled into one alternation, so finding or removing every avoided phrase
+    is a single scan of the text instead of one scan per phrase. Matching runs over the
+    lowercased text with lowercased phrases (same semantics as `phrase.lower() in
+    text.lower()`), which keeps the regex engine's fast literal-prefix scan that
+    re.IGNORECASE would disable. Longer phrases are tried first, so overlapping phrases
+    remove the longest match.
+    """
+
+    __slots__ = ("phrases", "_pattern", "_fallback")
+
+    def __init__(self, phrases: Iterable[str]):
+        self.phrases = tuple(dict.fromkeys(phrase for phrase in phrases if phrase))
+        ordered = sorted(self.phrases, key=len, reverse=True)
+        lowered = sorted(dict.fromkeys(phrase.lower() for phrase in self.phrases), key=len, reverse=True)
+        self._pattern = re.compile("|".join(map(re.escape, lowered))) if ordered else None
+        # Only needed when lowercasing changes the text length, so spans cannot be mapped back.
+        self._fallback = re.compile("|".join(map(re.escape, ordered)), re.IGNORECASE) if ordered else None
+
+    def __bool__(self) -> bool:
+        return self._pattern is not None
+
+    def search(self, text: str) -> bool:
+        """
+        True if any phrase occurs in text, ignoring case.
+        """
+        return self._pattern is not None and self._pattern.search(text.lower()) is not None
+
+    def remove(self, text: str) -> tuple[str, int]:
+        """
+        Remove every occurrence of every phrase, ignoring case; returns (text, number_removed).
+        """
+        if self._pattern is None:
+            return text, 0
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            return self._fallback.subn("", text)
+        parts: list[str] = []
+        start = 0
+        for match in self._pattern.finditer(lowered):
+            parts.append(text[start : match.start()])
+            start = match.end()
+        if not parts:
+            return text, 0
+        parts.append(text[start:])
+        return "".join(parts), len(parts) - 1
+
+
+@lru_cache(maxsize=256)
+def _compile(phrases: tuple[str, ...]) -> PhraseMatcher:
+    return PhraseMatcher(phrases)
+
+
+def get_phrase_matcher(phrases: Iterable[str] | None) -> PhraseMatcher:
+    """
+    Matcher for a phrase list, shared across requests that use the same list.
+    """
+    return _compile(tuple(phrases or ()))
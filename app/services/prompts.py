@@ -2,38 +2,155 @@
 Prompt templates for the Smart Reply service.
 
 The goal is to make model behavior explicit and reproducible:
-- SYSTEM_PROMPT enforces JSON-only output, safety, and style rules.
-- build_user_prompt turns a DraftRequest into a compact, structured instruction.
+- SYSTEM_PROMPT carries the drafting, safety, and style rules shared by every request.
+- DRAFT_RESPONSE_FORMAT is a strict JSON schema derived once from DraftResponse, so the output
+  shape is enforced by the API instead of being spelled out in each prompt.
+- build_user_prompt turns a DraftRequest into a compact, structured instruction: a static
+  prefix per (channel, tone, language) variant, precompiled at startup, followed by the
+  per-request fields, so the shared head of every prompt is cacheable upstream.
 """
 
-from app.api.schemas import DraftRequest
+import json
+from functools import lru_cache
+from typing import Any, NamedTuple, get_args
+
+from app.api.schemas import Channel, DraftRequest, DraftResponse, Tone
+from app.services.tokens import estimate_tokens
 
 
 SYSTEM_PROMPT = (
-    "You are Smart Reply, an assistant that returns ONLY valid JSON.\n"
-    "- Output JSON and nothing else; no markdown, prefaces, or commentary.\n"
+    "You are Smart Reply, an assistant that writes reply drafts as JSON.\n"
     "- Always produce exactly 3 drafts with distinct styles.\n"
-    "- Obey the requested tone and channel etiquette; keep replies safe and professional.\n"
+    "- Obey the requested tone, channel etiquette and constraints; keep replies safe and professional.\n"
     "- Default to UK English spelling unless an explicit language override is provided."
 )
 
+# Keywords strict structured outputs do not accept; their meaning is kept as a description.
+_UNSUPPORTED_KEYWORDS = ("title", "default", "minItems", "maxItems", "minimum", "maximum", "minLength", "maxLength")
+
 
-def build_user_prompt(request: DraftRequest, language: str | None = None) -> str:
+def _strict_schema(node: Any) -> Any:
     """
-    Build the user prompt for the Responses API.
+    Rewrite a Pydantic JSON schema for strict structured outputs: every object closed and all of
+    its properties required, with unsupported bounds folded into descriptions.
+    """
+    if isinstance(node, list):
+        return [_strict_schema(item) for item in node]
+    if not isinstance(node, dict):
+        return node
+    result = {}
+    for key, value in node.items():
+        if key in ("properties", "$defs"):
+            # Maps of names to schemas: the names are data, never keywords to drop.
+            result[key] = {name: _strict_schema(schema) for name, schema in value.items()}
+        elif key not in _UNSUPPORTED_KEYWORDS:
+            result[key] = _strict_schema(value)
+    if "properties" in result:
+        result["required"] = list(result["properties"])
+        result["additionalProperties"] = False
+    bounds = []
+    if "minItems" in node and node.get("minItems") == node.get("maxItems"):
+        bounds.append(f"Exactly {node['minItems']} items.")
+    if "minimum" in node and "maximum" in node:
+        bounds.append(f"Between {node['minimum']} and {node['maximum']}.")
+    if bounds:
+        result["description"] = " ".join([result["description"], *bounds] if "description" in result else bounds)
+    return result
 
-    Parameters
-    ----------
-    request : DraftRequest
-        Validated request payload from the API layer.
-    language : str | None
-        Optional language override; defaults to UK English to keep spelling consistent.
 
-    Returns
-    -------
-    str
-        A concise instruction block that the model will parse into JSON.
+DRAFT_RESPONSE_SCHEMA: dict = _strict_schema(DraftResponse.model_json_schema())
+DRAFT_RESPONSE_FORMAT: dict = {
+    "type": "json_schema",
+    "name": "draft_response",
+    "schema": DRAFT_RESPONSE_SCHEMA,
+    "strict": True,
+}
+JSON_OBJECT_FORMAT: dict = {"type": "json_object"}
+
+# For upstreams without structured outputs, where the schema has to travel in the prompt.
+_SCHEMA_INSTRUCTION = (
+    "Return only a JSON object matching this schema:\n"
+    + json.dumps(DRAFT_RESPONSE_SCHEMA, separators=(",", ":"))
+    + "\n"
+)
+
+CHANNEL_GUIDANCE: dict[str, str] = {
+    "email": "complete sentences with a greeting and a sign-off",
+    "slack": "short and conversational, no formal greeting or sign-off",
+    "linkedin": "professional and warm, in short paragraphs",
+}
+TONE_GUIDANCE: dict[str, str] = {
+    "friendly": "warm and approachable",
+    "professional": "clear, courteous and businesslike",
+    "concise": "as few words as the reply allows",
+    "assertive": "direct and confident without being rude",
+    "apologetic": "acknowledge the issue and take responsibility",
+    "polite": "courteous and considerate",
+    "neutral": "even and factual",
+}
+DEFAULT_LANGUAGE = "UK English (default)"
+USER_LANGUAGE = "User-specified language"
+
+SYSTEM_PROMPT_TOKENS = estimate_tokens(SYSTEM_PROMPT)
+
+
+class PromptPrefix(NamedTuple):
+    text: str
+    tokens: int
+
+
+class BuiltPrompt(NamedTuple):
+    """
+    A user prompt plus local token estimates: `prefix_tokens` covers the system prompt and the
+    static prefix shared by every request of the same variant, `tokens` the whole input.
+    """
+
+    text: str
+    prefix_tokens: int
+    tokens: int
+
+
+def response_format(structured_outputs: bool) -> dict:
+    """
+    The `text.format` for a Responses API call.
+    """
+    return DRAFT_RESPONSE_FORMAT if structured_outputs else JSON_OBJECT_FORMAT
+
+
+@lru_cache(maxsize=256)
+def prompt_prefix(channel: str, tone: str, language: str, include_schema: bool = False) -> PromptPrefix:
+    """
+    The static head of the user prompt for one (channel, tone, language) variant. Everything
+    that does not depend on the request body lives here, ordered from most to least widely
+    shared, so upstream prompt caching can reuse it across requests.
+    """
+    text = (
+        "Generate reply drafts for the following input.\n"
+        + (_SCHEMA_INSTRUCTION if include_schema else "")
+        + f"- channel: {channel} ({CHANNEL_GUIDANCE.get(channel, 'follow channel etiquette')})\n"
+        f"- tone: {tone} ({TONE_GUIDANCE.get(tone, 'as requested')})\n"
+        f"- language: {language}\n"
+    )
+    return PromptPrefix(text, estimate_tokens(text))
+
+
+def precompile_prompts() -> int:
+    """
+    Build every known prompt prefix variant ahead of traffic; returns how many were built.
     """
+    variants = [
+        (channel, tone, language, include_schema)
+        for channel in get_args(Channel)
+        for tone in get_args(Tone)
+        for language in (DEFAULT_LANGUAGE, USER_LANGUAGE)
+        for include_schema in (False, True)
+    ]
+    for variant in variants:
+        prompt_prefix(*variant)
+    return len(variants)
+
+
+def _request_block(request: DraftRequest) -> str:
     constraint_lines: list[str] = []
     if request.constraints:
         if request.constraints.max_words:
@@ -43,35 +160,43 @@ def build_user_prompt(request: DraftRequest, language: str | None = None) -> str
         if request.constraints.avoid_phrases:
             constraint_lines.append(f"- avoid_phrases: {request.constraints.avoid_phrases}")
     constraint_block = "\n".join(constraint_lines) if constraint_lines else "None"
+    return (
+        f"- constraints:\n{constraint_block}\n"
+        f"- context: {request.context or 'None'}\n"
+        f"- message: {request.incoming_message}"
+    )
+
 
+def build_prompt(request: DraftRequest, language: str | None = None, include_schema: bool = False) -> BuiltPrompt:
+    """
+    Build the user prompt as a precompiled static prefix followed by the per-request fields,
+    with token estimates for both.
+    """
     language_pref = language or (
-        "UK English (default)"
-        if not request.options or request.options.uk_english
-        else "User-specified language"
+        DEFAULT_LANGUAGE if not request.options or request.options.uk_english else USER_LANGUAGE
     )
+    prefix = prompt_prefix(request.channel, request.tone, language_pref, include_schema)
+    block = _request_block(request)
+    prefix_tokens = SYSTEM_PROMPT_TOKENS + prefix.tokens
+    return BuiltPrompt(prefix.text + block, prefix_tokens, prefix_tokens + estimate_tokens(block))
 
-    return (
-        "Generate reply drafts for the following input.\n"
-        f"- channel: {request.channel}\n"
-        f"- tone: {request.tone}\n"
-        f"- language: {language_pref}\n"
-        f"- message: {request.incoming_message}\n"
-        f"- context: {request.context or 'None'}\n"
-        f"- constraints:\n{constraint_block}\n\n"
-        "Schema:\n"
-        "{\n"
-        '  \"request_id\": str,\n'
-        '  \"detected_tone\": str,\n'
-        '  \"channel_applied\": str,\n'
-        '  \"drafts\": [\n'
-        "    {\"label\": str, \"text\": str}\n"
-        "  ],\n"
-        '  \"notes\": str,\n'
-        '  \"confidence_score\": float\n'
-        "}\n"
-        "Rules:\n"
-        "- Exactly 3 drafts; each draft must have a distinct style.\n"
-        "- Keep answers concise and appropriate for the channel.\n"
-        "- Respect all constraints and the specified language.\n"
-        "- Return JSON only."
-    )
+
+def build_user_prompt(request: DraftRequest, language: str | None = None, include_schema: bool = False) -> str:
+    """
+    Build the user prompt for the Responses API.
+
+    Parameters
+    ----------
+    request : DraftRequest
+        Validated request payload from the API layer.
+    language : str | None
+        Optional language override; defaults to UK English to keep spelling consistent.
+    include_schema : bool
+        Include the response schema, for calls made without structured outputs.
+
+    Returns
+    -------
+    str
+        A concise instruction block that the model will parse into JSON.
+    """
+    return build_prompt(request, language, include_schema).text
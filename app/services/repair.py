@@ -0,0 +1,149 @@
+"""
+Tolerant parsing of model output.
+
+Model payloads that are almost right (a trailing comma, prose or a code fence around the JSON,
+output cut off between values before the closing braces, four drafts instead of three, a confidence of 1.2) are
+repaired locally instead of paying for another upstream call. Each function returns the names of
+the repairs it applied so callers can count them; payloads that are still unusable raise the
+usual `json.JSONDecodeError` / `ValidationError` and are retried.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, get_args
+
+from app.api.schemas import Channel, DraftResponse
+
+_CHANNELS = frozenset(get_args(Channel))
+_DRAFT_COUNT = 3
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _repair_structure(text: str, start: int) -> tuple[str, int, list[str]]:
+    """
+    Copy the JSON value starting at `start`, dropping trailing commas and closing anything left
+    open at the end of the text. Returns (repaired, index just past the value, repairs).
+    Raises ValueError when the text is cut off inside a string: closing it would pass off a
+    half-written value (e.g. a draft ending mid-word) as complete.
+    """
+    out: list[str] = []
+    stack: list[str] = []
+    repairs: list[str] = []
+    in_string = False
+    escape = False
+    end = len(text)
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            out.append(char)
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(_CLOSERS[char])
+        elif char in "}]":
+            last = len(out) - 1
+            while last >= 0 and out[last].isspace():
+                last -= 1
+            if last >= 0 and out[last] == ",":
+                del out[last]
+                if "trailing_comma" not in repairs:
+                    repairs.append("trailing_comma")
+            if stack and stack[-1] == char:
+                stack.pop()
+            out.append(char)
+            if not stack:
+                end = index + 1
+                break
+            continue
+        out.append(char)
+
+    if stack:
+        if in_string:
+            raise ValueError("output cut off inside a string")
+        while out and (out[-1].isspace() or out[-1] == ","):
+            out.pop()
+        out.extend(reversed(stack))
+        repairs.append("unclosed")
+    return "".join(out), end, repairs
+
+
+def load_json(text: str) -> tuple[Any, list[str]]:
+    """
+    Parse model output as JSON, repairing common defects when strict parsing fails.
+    Raises the original JSONDecodeError when no repair yields valid JSON.
+    """
+    try:
+        return json.loads(text), []
+    except json.JSONDecodeError as err:
+        error = err
+
+    start = text.find("{")
+    if start < 0:
+        raise error
+    try:
+        repaired, end, repairs = _repair_structure(text, start)
+    except ValueError:
+        raise error from None
+    if start > 0 or text[end:].strip():
+        repairs.insert(0, "extracted")
+    try:
+        return json.loads(repaired), repairs
+    except json.JSONDecodeError:
+        pass
+    try:
+        # Raw newlines and tabs inside strings.
+        return json.loads(repaired, strict=False), [*repairs, "control_chars"]
+    except json.JSONDecodeError:
+        raise error from None
+
+
+def coerce_draft_response(data: Any, defaults: dict[str, Any]) -> tuple[DraftResponse, list[str]]:
+    """
+    Validate a parsed payload as a DraftResponse after fixing near-miss shapes: extra drafts are
+    trimmed to three, bare draft strings get labels, `confidence_score` is clamped to [0, 1], and
+    missing fields or an unknown `channel_applied` take their value from `defaults`.
+    """
+    repairs: list[str] = []
+    if isinstance(data, dict):
+        data = dict(data)
+        drafts = data.get("drafts")
+        if isinstance(drafts, list):
+            if any(isinstance(draft, str) for draft in drafts):
+                drafts = [
+                    {"label": f"Option {index}", "text": draft} if isinstance(draft, str) else draft
+                    for index, draft in enumerate(drafts, start=1)
+                ]
+                repairs.append("draft_strings")
+            if len(drafts) > _DRAFT_COUNT:
+                drafts = drafts[:_DRAFT_COUNT]
+                repairs.append("drafts_trimmed")
+            data["drafts"] = drafts
+
+        score = data.get("confidence_score")
+        if isinstance(score, str):
+            try:
+                score = float(score)
+            except ValueError:
+                pass
+        if isinstance(score, (int, float)) and not isinstance(score, bool) and not 0.0 <= score <= 1.0:
+            data["confidence_score"] = min(1.0, max(0.0, score))
+            repairs.append("confidence_clamped")
+
+        missing = [key for key in defaults if key not in data or data[key] is None]
+        if missing:
+            data.update({key: defaults[key] for key in missing})
+            repairs.append("defaults_filled")
+        channel = data.get("channel_applied")
+        if "channel_applied" in defaults and channel not in _CHANNELS:
+            normalized = channel.strip().lower() if isinstance(channel, str) else None
+            data["channel_applied"] = normalized if normalized in _CHANNELS else defaults["channel_applied"]
+            repairs.append("channel_corrected")
+    return DraftResponse.model_validate(data), repairs
@@ -0,0 +1,57 @@
+"""
+Single-flight request coalescing.
+
+Concurrent callers that ask for the same key await one in-flight generation instead of
+each calling upstream; the first caller starts the work and everyone shares its result.
+The shared work runs in an empty context, so it inherits no caller's request-scoped state
+(deadline, timings); each caller enforces its own deadline while waiting on it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+from functools import lru_cache
+from typing import Awaitable, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    Deduplicate concurrent async calls by key.
+    The shared work runs in its own task and is shielded, so a cancelled caller
+    (e.g. a client disconnect) never cancels the generation other callers are waiting on.
+    """
+
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Task[T]] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """
+        Run `fn` once per key at a time. Returns (result, shared) where `shared` is True
+        for callers that joined an already running call.
+        """
+        task = self._inflight.get(key)
+        shared = task is not None
+        if task is None:
+            # Not the first caller's context: its deadline must not cut the call short for the others.
+            task = asyncio.get_running_loop().create_task(fn(), context=contextvars.Context())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key: str, task: asyncio.Task[T]) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every waiter went away.
+            task.exception()
+
+
+@lru_cache(maxsize=1)
+def get_single_flight() -> SingleFlight:
+    return SingleFlight()
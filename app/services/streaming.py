@@ -0,0 +1,73 @@
+"""
+Server-Sent Events helpers for streamed draft generation.
+
+Events, in order:
+- `delta`   : raw model text as it arrives (LLM path only)
+- `draft`   : one finished draft, emitted as soon as it is complete
+- `summary` : request_id, detected_tone, channel_applied, notes and confidence_score
+- `error`   : emitted instead of `summary` if the stream cannot be completed
+"""
+
+from __future__ import annotations
+
+import json
+import re
+
+StreamEvent = tuple[str, dict]
+
+_DRAFTS_ARRAY = re.compile(r'"drafts"\s*:\s*\[')
+
+
+def format_sse(event: str, data: dict) -> str:
+    """
+    Serialize one event in text/event-stream framing.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class DraftArrayScanner:
+    """
+    Incrementally pull complete objects out of the `drafts` array of a JSON document
+    that is still being streamed, so each draft can be emitted before the payload ends.
+    Objects come with their position in the array; other elements are counted but skipped.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos: int | None = None
+        self._closed = False
+        self._count = 0
+        self._decoder = json.JSONDecoder()
+
+    @property
+    def text(self) -> str:
+        return self._buffer
+
+    def feed(self, chunk: str) -> list[tuple[int, dict]]:
+        self._buffer += chunk
+        found: list[tuple[int, dict]] = []
+        if self._pos is None:
+            match = _DRAFTS_ARRAY.search(self._buffer)
+            if match is None:
+                return found
+            self._pos = match.end()
+
+        buffer = self._buffer
+        while not self._closed:
+            index = self._pos
+            while index < len(buffer) and buffer[index] in " \t\r\n,":
+                index += 1
+            if index >= len(buffer):
+                break
+            if buffer[index] == "]":
+                self._closed = True
+                break
+            try:
+                item, end = self._decoder.raw_decode(buffer, index)
+            except json.JSONDecodeError:
+                break  # element still incomplete; wait for more text
+            if isinstance(item, dict):
+                found.append((self._count, item))
+            self._count += 1
+            self._pos = end
+        return found
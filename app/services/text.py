@@ -0,0 +1,20 @@
+"""
+Small text helpers shared by the constraint and formatting passes.
+"""
+
+from textwrap import shorten
+
+
+def shorten_text(text: str, width: int, placeholder: str = "…") -> str:
+    """
+    Same result as textwrap.shorten, but only the prefix that can influence the output is
+    handed to the (slow) wrapper: everything up to the second word boundary past `width`.
+    """
+    collapsed = " ".join(text.split())
+    if len(collapsed) <= width:
+        return collapsed
+    first = collapsed.find(" ", width + 1)
+    second = collapsed.find(" ", first + 1) if first != -1 else -1
+    if second != -1:
+        collapsed = collapsed[:second]
+    return shorten(collapsed, width=width, placeholder=placeholder)
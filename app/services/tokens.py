@@ -0,0 +1,17 @@
+"""
+Local token estimates.
+
+Close enough to a BPE tokenizer for budgeting and reporting without a network call or a
+tokenizer dependency: each punctuation mark counts as one token and each run of word
+characters as one token per five characters, rounded up.
+"""
+
+from __future__ import annotations
+
+import re
+
+_PIECES = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    return sum((len(piece) + 4) // 5 for piece in _PIECES.findall(text))
@@ -0,0 +1,52 @@
+"""
+Per-draft cost of channel formatting on large inputs.
+
+Usage:
+    python -m benchmarks.bench_formatting [--chars 8000] [--runs 200]
+"""
+
+import argparse
+import random
+import timeit
+
+from app.services.formatting import apply_channel_format
+
+_WORDS = (
+    "thanks for the update on the quarterly metrics review we should align on next steps "
+    "before friday could you share the latest figures with finance leadership"
+).split()
+
+
+def build_text(chars: int, seed: int = 0) -> str:
+    """
+    Deterministic prose of roughly `chars` characters with sentences of 5-20 words.
+    """
+    rng = random.Random(seed)
+    sentences: list[str] = []
+    length = 0
+    while length < chars:
+        words = [rng.choice(_WORDS) for _ in range(rng.randint(5, 20))]
+        sentence = " ".join(words).capitalize() + rng.choice([".", ".", "?", "!"])
+        sentences.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(sentences)[:chars]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chars", type=int, default=8000)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    text = build_text(args.chars)
+    print(f"input: {len(text)} chars, {len(text.split())} words, {args.runs} runs per channel")
+    for channel in ("email", "slack", "linkedin"):
+        seconds = timeit.timeit(
+            lambda: apply_channel_format(channel, text, emoji_enabled=True, rng=random.Random(0)),
+            number=args.runs,
+        )
+        print(f"{channel:<9} {seconds / args.runs * 1e6:9.1f} µs/draft")
+
+
+if __name__ == "__main__":
+    main()
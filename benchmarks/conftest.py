@@ -0,0 +1,168 @@
+"""
+Offline micro-benchmark support.
+
+Provides a `benchmark` fixture with the pytest-benchmark calling convention
+(`result = benchmark(fn, *args, **kwargs)`) without the dependency. Each call is timed over
+several rounds of auto-calibrated loops; the best round is compared with the stored baseline in
+benchmarks/baselines.json and the test fails when it is slower by more than the threshold.
+
+Timings are normalised by a fixed pure-Python reference workload measured in the same session,
+so baselines recorded on one machine (or on a busy one) remain comparable on another.
+
+Options:
+    --bench-threshold 1.0      allowed slowdown over the baseline (1.0 = twice as slow)
+    --bench-rounds 15          timed rounds per benchmark
+    --bench-save-baseline      write this run's timings as the new baselines
+"""
+
+from __future__ import annotations
+
+import json
+import platform
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+import pytest
+
+BASELINES = Path(__file__).with_name("baselines.json")
+_MIN_ROUND_SECONDS = 0.005
+
+
+def _reference_workload() -> None:
+    words = [f"word{index % 97}" for index in range(2000)]
+    sorted(words)
+    " ".join(words).split()
+    {word: len(word) for word in words}
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("micro-benchmarks")
+    group.addoption("--bench-threshold", type=float, default=1.0, help="allowed slowdown over the baseline")
+    group.addoption("--bench-rounds", type=int, default=15, help="timed rounds per benchmark")
+    group.addoption("--bench-save-baseline", action="store_true", help="store this run's timings as baselines")
+
+
+def _load_baselines() -> dict:
+    if not BASELINES.exists():
+        return {}
+    return json.loads(BASELINES.read_text())
+
+
+class Benchmark:
+    def __init__(
+        self, name: str, rounds: int, threshold: float, baseline: dict | None, check: bool, speed: float = 1.0
+    ):
+        self.name = name
+        self.rounds = max(1, rounds)
+        self.threshold = threshold
+        self.baseline = baseline
+        self.check = check
+        # This session's reference time over the baseline's; >1 means a slower machine right now.
+        self.speed = speed
+        self.stats: dict[str, float] | None = None
+
+    def _calibrate(self, call: Callable[[], Any]) -> int:
+        loops = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(loops):
+                call()
+            if time.perf_counter() - start >= _MIN_ROUND_SECONDS:
+                return loops
+            loops *= 2
+
+    def measure(self, call: Callable[[], Any]) -> list[float]:
+        """
+        Per-call microseconds for each timed round.
+        """
+        loops = self._calibrate(call)
+        per_call: list[float] = []
+        for _ in range(self.rounds):
+            start = time.perf_counter()
+            for _ in range(loops):
+                call()
+            per_call.append((time.perf_counter() - start) / loops * 1e6)
+        return per_call
+
+    def __call__(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        result = fn(*args, **kwargs)  # warm-up; also the value handed back to the test
+        per_call = self.measure(lambda: fn(*args, **kwargs))
+        self.stats = {
+            "min_us": round(min(per_call), 3),
+            "median_us": round(statistics.median(per_call), 3),
+            "mean_us": round(statistics.fmean(per_call), 3),
+            "rounds": self.rounds,
+        }
+        if self.check and self.baseline:
+            limit = self.baseline["min_us"] * self.speed * (1 + self.threshold)
+            if self.stats["min_us"] > limit:
+                pytest.fail(
+                    f"{self.name}: {self.stats['min_us']:.1f}us per call exceeds the baseline "
+                    f"{self.baseline['min_us']:.1f}us (x{self.speed:.2f} machine speed) by more than "
+                    f"{self.threshold:.0%}",
+                    pytrace=False,
+                )
+        return result
+
+
+def _reference_us(rounds: int) -> float:
+    return min(Benchmark("reference", rounds * 3, 0, None, False).measure(_reference_workload))
+
+
+@pytest.fixture
+def benchmark(request: pytest.FixtureRequest) -> Iterator[Benchmark]:
+    config = request.config
+    rounds = config.getoption("--bench-rounds")
+    if not hasattr(config, "_bench_baselines"):
+        stored = _load_baselines()
+        config._bench_baselines = stored.get("results", {})
+        config._bench_reference_us = _reference_us(rounds)
+        baseline_reference = stored.get("reference_us")
+        config._bench_speed = config._bench_reference_us / baseline_reference if baseline_reference else 1.0
+        config._bench_results = {}
+    name = request.node.name
+    bench = Benchmark(
+        name,
+        rounds=rounds,
+        threshold=config.getoption("--bench-threshold"),
+        baseline=config._bench_baselines.get(name),
+        check=not config.getoption("--bench-save-baseline"),
+        speed=config._bench_speed,
+    )
+    yield bench
+    if bench.stats is not None:
+        config._bench_results[name] = bench.stats
+
+
+def pytest_terminal_summary(terminalreporter, config: pytest.Config) -> None:
+    results: dict[str, dict] = getattr(config, "_bench_results", {})
+    if not results:
+        return
+    baselines: dict[str, dict] = getattr(config, "_bench_baselines", {})
+    speed = config._bench_speed
+    terminalreporter.section(f"micro-benchmarks (best round per call, machine speed x{speed:.2f} of baseline)")
+    width = max(len(name) for name in results)
+    for name, stats in sorted(results.items()):
+        line = f"{name:<{width}}  {stats['min_us']:>12.1f} us"
+        baseline = baselines.get(name)
+        if baseline:
+            line += f"  ({stats['min_us'] / (baseline['min_us'] * speed) - 1:+.0%} vs baseline)"
+        terminalreporter.write_line(line)
+
+    if config.getoption("--bench-save-baseline"):
+        # Saving rescales nothing: baselines are only mixed across runs on the same machine.
+        merged = {**baselines, **{name: {"min_us": stats["min_us"]} for name, stats in results.items()}}
+        BASELINES.write_text(
+            json.dumps(
+                {
+                    "machine": {"python": platform.python_version(), "platform": platform.platform()},
+                    "reference_us": round(config._bench_reference_us, 3),
+                    "results": dict(sorted(merged.items())),
+                },
+                indent=2,
+            )
+            + "\n"
+        )
+        terminalreporter.write_line(f"saved {len(results)} baselines to {BASELINES}")
@@ -0,0 +1,151 @@
+"""
+Local stand-in for the OpenAI Responses API, for load tests.
+
+`POST /v1/responses` answers with three drafts after a configurable latency, and can inject
+upstream errors and malformed JSON. Behaviour is set on the command line or at runtime through
+`PUT /_control` with any of the `FaultConfig` fields, e.g. {"error_rate": 0.1}.
+
+Usage:
+    python -m benchmarks.fake_openai [--port 9100] [--latency-ms 300] [--jitter-ms 100]
+        [--error-rate 0.0] [--malformed-rate 0.0] [--unusable-rate 0.0]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import re
+import time
+from dataclasses import asdict, dataclass, fields
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+_CHANNEL = re.compile(r"- channel: (\w+)")
+
+
+@dataclass
+class FaultConfig:
+    latency_ms: float = 300.0
+    jitter_ms: float = 100.0
+    error_rate: float = 0.0  # HTTP 500, retried by the OpenAI client
+    malformed_rate: float = 0.0  # near-miss JSON the service repairs locally
+    unusable_rate: float = 0.0  # output that cannot be parsed, retried by the service
+    seed: int | None = None
+
+
+def _draft_payload(channel: str) -> dict:
+    return {
+        "request_id": "fake",
+        "detected_tone": "professional",
+        "channel_applied": channel,
+        "drafts": [
+            {"label": "Direct", "text": "Thanks for the note. I can share the figures by Friday."},
+            {"label": "Warm", "text": "Thanks so much for reaching out! Happy to send the figures by Friday."},
+            {"label": "Question", "text": "Thanks for flagging this. Would Friday work for the figures?"},
+        ],
+        "notes": "Generated by the fake Responses API.",
+        "confidence_score": 0.9,
+    }
+
+
+def _response_body(response_id: str, model: str, text: str, input_tokens: int) -> dict:
+    return {
+        "id": response_id,
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": model,
+        "status": "completed",
+        "parallel_tool_calls": False,
+        "tool_choice": "auto",
+        "tools": [],
+        "output": [
+            {
+                "type": "message",
+                "id": f"msg_{response_id}",
+                "status": "completed",
+                "role": "assistant",
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            }
+        ],
+        "usage": {
+            "input_tokens": input_tokens,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens": len(text) // 4,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": input_tokens + len(text) // 4,
+        },
+    }
+
+
+def create_app(config: FaultConfig | None = None) -> Starlette:
+    state = {"config": config or FaultConfig(), "counts": {"ok": 0, "error": 0, "malformed": 0, "unusable": 0}}
+    state["rng"] = random.Random(state["config"].seed)
+    ids = itertools.count(1)
+
+    async def responses(request: Request) -> JSONResponse:
+        config: FaultConfig = state["config"]
+        rng: random.Random = state["rng"]
+        body = await request.json()
+        delay = max(0.0, config.latency_ms + rng.uniform(-config.jitter_ms, config.jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+
+        roll = rng.random()
+        if roll < config.error_rate:
+            state["counts"]["error"] += 1
+            return JSONResponse({"error": {"message": "injected failure", "type": "server_error"}}, status_code=500)
+        roll -= config.error_rate
+
+        prompt = " ".join(str(item.get("content", "")) for item in body.get("input", []))
+        match = _CHANNEL.search(prompt)
+        text = json.dumps(_draft_payload(match.group(1) if match else "email"))
+        if roll < config.unusable_rate:
+            state["counts"]["unusable"] += 1
+            text = "I'm sorry, I can't help with that."
+        elif roll < config.unusable_rate + config.malformed_rate:
+            state["counts"]["malformed"] += 1
+            text = "Here you go:\n```json\n" + text[:-1] + ",}\n```"
+        else:
+            state["counts"]["ok"] += 1
+        return JSONResponse(_response_body(f"resp_{next(ids)}", body.get("model", "fake"), text, len(prompt) // 4))
+
+    async def control(request: Request) -> JSONResponse:
+        if request.method == "PUT":
+            updates = await request.json()
+            known = {field.name for field in fields(FaultConfig)}
+            state["config"] = FaultConfig(**{**asdict(state["config"]), **{k: v for k, v in updates.items() if k in known}})
+            state["rng"] = random.Random(state["config"].seed)
+            state["counts"] = dict.fromkeys(state["counts"], 0)
+        return JSONResponse({"config": asdict(state["config"]), "counts": state["counts"]})
+
+    return Starlette(
+        routes=[
+            Route("/v1/responses", responses, methods=["POST"]),
+            Route("/_control", control, methods=["GET", "PUT"]),
+        ]
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    for field in fields(FaultConfig):
+        if field.name != "seed":
+            parser.add_argument(f"--{field.name.replace('_', '-')}", type=float, default=field.default)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = FaultConfig(**{field.name: getattr(args, field.name) for field in fields(FaultConfig)})
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Load test the real app under uvicorn against the bundled fake Responses API.
+
+Starts `benchmarks.fake_openai` and the service (pointed at it through
+SMART_REPLY_OPENAI_BASE_URL) as subprocesses, drives each scenario with a fixed number of
+concurrent clients, and writes p50/p95/p99 latency, RPS, status counts and server memory per
+scenario to a JSON report (server output goes next to it, as .log). Pass an earlier report
+with --compare to print the deltas.
+
+Usage:
+    python -m benchmarks.loadtest [--scenario mixed --scenario long] [--concurrency 32]
+        [--requests 500] [--output benchmarks/results/loadtest.json] [--compare OLD.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable
+
+import httpx
+
+from benchmarks.bench_formatting import build_text
+
+API_KEY = "loadtest"
+CHANNELS = ("email", "slack", "linkedin")
+TONES = ("friendly", "professional", "concise", "assertive", "apologetic", "polite", "neutral")
+
+
+def _short(rng: random.Random, index: int) -> dict:
+    return {
+        "incoming_message": f"Can you share the latest metrics before Friday? (#{index})",
+        "channel": "email",
+        "tone": "professional",
+    }
+
+
+def _mixed(rng: random.Random, index: int) -> dict:
+    payload = {
+        "incoming_message": build_text(rng.randint(80, 1200), seed=index),
+        "context": rng.choice([None, "Finance review thread", build_text(400, seed=-index)]),
+        "channel": rng.choice(CHANNELS),
+        "tone": rng.choice(TONES),
+        "options": {"emoji": rng.random() < 0.3},
+    }
+    if rng.random() < 0.5:
+        payload["constraints"] = {
+            "max_words": rng.choice([None, 40, 120]),
+            "must_include_question": rng.random() < 0.5,
+            "avoid_phrases": rng.choice([None, ["ASAP", "FYI"], ["circle back", "per my last email", "synergy"]]),
+        }
+    return payload
+
+
+def _long(rng: random.Random, index: int) -> dict:
+    return {
+        "incoming_message": build_text(8000, seed=index),
+        "context": build_text(4000, seed=-index - 1),
+        "channel": rng.choice(CHANNELS),
+        "tone": rng.choice(TONES),
+        "constraints": {"max_words": 120, "must_include_question": True, "avoid_phrases": ["ASAP", "FYI"]},
+    }
+
+
+# name -> (payload factory, fake upstream fault config)
+SCENARIOS: dict[str, tuple[Callable[[random.Random, int], dict], dict]] = {
+    "baseline": (_short, {"latency_ms": 300, "jitter_ms": 100}),
+    "mixed": (_mixed, {"latency_ms": 300, "jitter_ms": 150}),
+    "long": (_long, {"latency_ms": 600, "jitter_ms": 200}),
+    "degraded": (_mixed, {"latency_ms": 800, "jitter_ms": 600, "error_rate": 0.1, "malformed_rate": 0.1, "unusable_rate": 0.05}),
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _rss_kib(pid: int) -> dict[str, int] | None:
+    """
+    Current and peak resident memory of a process (Linux only).
+    """
+    try:
+        status = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return None
+    values = {}
+    for line in status.splitlines():
+        key, _, rest = line.partition(":")
+        if key in ("VmRSS", "VmHWM"):
+            values[key] = int(rest.split()[0])
+    return {"rss_kib": values.get("VmRSS", 0), "peak_rss_kib": values.get("VmHWM", 0)}
+
+
+def _start(args: list[str], env: dict[str, str], log) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, *args], env={**os.environ, **env}, stdout=log, stderr=subprocess.STDOUT)
+
+
+async def _wait_ready(url: str, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{url} did not come up within {timeout}s")
+                await asyncio.sleep(0.1)
+
+
+def _percentile(sorted_values: list[float], q: float) -> float | None:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))]
+
+
+async def run_scenario(
+    app_url: str, fake_url: str, app_pid: int, name: str, concurrency: int, total: int, warmup: int, seed: int
+) -> dict:
+    factory, faults = SCENARIOS[name]
+    rng = random.Random(seed)
+    payloads = [factory(rng, index) for index in range(total + warmup)]
+    latencies: list[float] = []
+    statuses: Counter[str] = Counter()
+    next_index = 0
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=app_url, headers={"x-api-key": API_KEY}, limits=limits, timeout=120.0
+    ) as client:
+        await client.put(f"{fake_url}/_control", json={**faults, "seed": seed})
+
+        async def worker(record: bool, stop: int) -> None:
+            nonlocal next_index
+            while next_index < stop:
+                payload = payloads[next_index]
+                next_index += 1
+                start = time.perf_counter()
+                try:
+                    response = await client.post("/v1/reply/draft", json=payload)
+                    status = str(response.status_code)
+                except httpx.HTTPError as exc:
+                    status = type(exc).__name__
+                if record:
+                    latencies.append(time.perf_counter() - start)
+                    statuses[status] += 1
+
+        await asyncio.gather(*(worker(False, warmup) for _ in range(min(concurrency, warmup))))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(True, warmup + total) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        upstream = (await client.get(f"{fake_url}/_control")).json()["counts"]
+
+    latencies.sort()
+    ms = lambda value: None if value is None else round(value * 1000, 2)  # noqa: E731
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "requests": total,
+        "duration_s": round(elapsed, 3),
+        "rps": round(total / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "p50": ms(_percentile(latencies, 0.50)),
+            "p95": ms(_percentile(latencies, 0.95)),
+            "p99": ms(_percentile(latencies, 0.99)),
+            "max": ms(latencies[-1] if latencies else None),
+            "mean": ms(sum(latencies) / len(latencies) if latencies else None),
+        },
+        "status": dict(statuses),
+        "upstream": upstream,
+        "faults": faults,
+        "memory": _rss_kib(app_pid),
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old: dict, new: dict) -> list[str]:
+    """
+    One line per scenario present in both reports: RPS and latency percentile deltas.
+    """
+    before = {result["scenario"]: result for result in old.get("results", [])}
+    lines = []
+    for result in new["results"]:
+        previous = before.get(result["scenario"])
+        if previous is None:
+            continue
+        parts = [f"{result['scenario']}: rps {previous['rps']} -> {result['rps']}"]
+        for key in ("p50", "p95", "p99"):
+            was, now = previous["latency_ms"][key], result["latency_ms"][key]
+            if was and now:
+                parts.append(f"{key} {was} -> {now} ms ({(now - was) / was:+.1%})")
+        lines.append(", ".join(parts))
+    return lines
+
+
+async def _run(args: argparse.Namespace) -> dict:
+    fake_port, app_port = _free_port(), _free_port()
+    fake_url, app_url = f"http://127.0.0.1:{fake_port}", f"http://127.0.0.1:{app_port}"
+    log = args.output.with_suffix(".log").open("w")
+    fake = _start(["-m", "benchmarks.fake_openai", "--port", str(fake_port)], {}, log)
+    app_env = {
+        "API_KEY": API_KEY,
+        "SMART_REPLY_OPENAI_API_KEY": "loadtest",
+        "SMART_REPLY_OPENAI_BASE_URL": f"{fake_url}/v1",
+        "SMART_REPLY_RATE_LIMIT_PER_MINUTE": "100000000",
+        "SMART_REPLY_RESPONSE_CACHE_ENABLED": str(args.cache).lower(),
+        "SMART_REPLY_REQUEST_COALESCING_ENABLED": str(args.cache).lower(),
+        "SMART_REPLY_LOG_LEVEL": "WARNING",
+    }
+    app = _start(
+        ["-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(app_port), "--log-level", "warning"],
+        app_env,
+        log,
+    )
+    try:
+        await _wait_ready(f"{fake_url}/_control")
+        await _wait_ready(f"{app_url}/health")
+        results = []
+        for name in args.scenario or list(SCENARIOS):
+            result = await run_scenario(
+                app_url, fake_url, app.pid, name, args.concurrency, args.requests, args.warmup, args.seed
+            )
+            print(
+                f"{name}: {result['rps']} rps, p50 {result['latency_ms']['p50']} ms, "
+                f"p95 {result['latency_ms']['p95']} ms, p99 {result['latency_ms']['p99']} ms, "
+                f"status {result['status']}",
+                flush=True,
+            )
+            results.append(result)
+    finally:
+        for process in (app, fake):
+            process.terminate()
+            process.wait(timeout=10)
+        log.close()
+
+    return {
+        "commit": _git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": {"cache": args.cache, "seed": args.seed, "warmup": args.warmup},
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="repeatable; default all")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache", action="store_true", help="keep the response cache and coalescing on")
+    parser.add_argument("--output", type=Path, default=Path("benchmarks/results/loadtest.json"))
+    parser.add_argument("--compare", type=Path, help="earlier report to diff against")
+    args = parser.parse_args()
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    report = asyncio.run(_run(args))
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"wrote {args.output}")
+    if args.compare:
+        for line in compare(json.loads(args.compare.read_text()), report):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Micro-benchmarks for the local (stub) generation pipeline, stage by stage.
+
+Run with `python -m pytest benchmarks`; see benchmarks/conftest.py for the options and the
+baseline check. "typical" inputs are a short message and draft, "worst" inputs are the largest
+the API accepts (8000-char message, 4000-char context, 20 avoid_phrases).
+"""
+
+import pytest
+
+from app.api.schemas import Constraints, DraftRequest
+from app.services.constraints import adjust_text_for_violations, check_constraints
+from app.services.formatting import apply_channel_format
+from app.services.generator import generate_base_drafts
+from app.services.llm import _stub_drafts
+from benchmarks.bench_formatting import build_text
+
+CHANNELS = ("email", "slack", "linkedin")
+SIZES = {"typical": (300, 120), "worst": (8000, 4000)}  # (message chars, context chars)
+AVOID_PHRASES = [
+    "ASAP", "FYI", "circle back", "per my last email", "synergy", "touch base", "low-hanging fruit",
+    "move the needle", "going forward", "deep dive", "bandwidth", "leverage", "as discussed",
+    "quick question", "hope this finds you well", "reach out", "loop in", "ping", "EOD", "kindly",
+]
+CONSTRAINTS = {
+    "none": None,
+    "max_words": Constraints(max_words=60),
+    "question": Constraints(must_include_question=True),
+    "avoid": Constraints(avoid_phrases=AVOID_PHRASES),
+    "all": Constraints(max_words=60, must_include_question=True, avoid_phrases=AVOID_PHRASES),
+}
+# The PRD promises local generation well under this per request.
+STUB_BUDGET_US = 500_000
+
+
+def _request(channel: str, size: str, constraints: str = "none") -> DraftRequest:
+    message_chars, context_chars = SIZES[size]
+    return DraftRequest(
+        incoming_message=build_text(message_chars, seed=1),
+        context=build_text(context_chars, seed=2),
+        channel=channel,
+        tone="professional",
+        constraints=CONSTRAINTS[constraints],
+    )
+
+
+def _draft_text(size: str) -> str:
+    # Drafts echo the message, so worst-case drafts are as long as the longest message.
+    text = build_text(SIZES[size][0], seed=3)
+    return f"{text} Going forward we should circle back on this ASAP, FYI."
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("channel", CHANNELS)
+def test_generate_base_drafts(benchmark, channel, size):
+    drafts = benchmark(generate_base_drafts, _request(channel, size))
+    assert len(drafts) == 3
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("constraints", CONSTRAINTS)
+def test_check_constraints(benchmark, constraints, size):
+    result = benchmark(check_constraints, _draft_text(size), CONSTRAINTS[constraints])
+    assert set(result) >= {"within_max_words", "includes_question", "avoids_phrases"}
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("constraints", CONSTRAINTS)
+def test_adjust_text_for_violations(benchmark, constraints, size):
+    text = benchmark(adjust_text_for_violations, _draft_text(size), CONSTRAINTS[constraints])
+    if constraints in ("avoid", "all"):
+        assert "ASAP" not in text
+
+
+@pytest.mark.parametrize("emoji", [False, True], ids=["plain", "emoji"])
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("channel", CHANNELS)
+def test_apply_channel_format(benchmark, channel, size, emoji):
+    text, score = benchmark(apply_channel_format, channel, _draft_text(size), emoji)
+    assert text and 0 <= score <= 1
+
+
+@pytest.mark.parametrize("case", [("typical", "none"), ("typical", "all"), ("worst", "all")], ids="-".join)
+@pytest.mark.parametrize("channel", CHANNELS)
+def test_stub_drafts(benchmark, channel, case):
+    size, constraints = case
+    response = benchmark(_stub_drafts, _request(channel, size, constraints))
+    assert len(response.drafts) == 3
+    assert benchmark.stats["median_us"] < STUB_BUDGET_US
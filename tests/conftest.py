@@ -0,0 +1,94 @@
+import asyncio
+import sys
+import types
+
+import pytest
+
+from app.core.config import reset_settings_cache
+from app.middleware.rate_limit import reset_rate_limit_cache
+from app.services.cache import reset_response_cache
+from app.services.circuit_breaker import reset_circuit_breaker
+from app.services.hedging import get_latency_tracker
+from app.services.openai_client import reset_openai_client
+from app.services.singleflight import get_single_flight
+
+
+class FakeOpenAI:
+    """
+    Stand-in for the `openai` package. Every AsyncOpenAI built from it is kept in `clients`,
+    and `responses.create(**kwargs)` records the kwargs in `calls` and returns
+    `await self.create(**kwargs)`; tests set `create`, or call `reply` for canned outputs.
+    """
+
+    def __init__(self):
+        self.calls: list[dict] = []
+        self.clients: list[FakeAsyncOpenAI] = []
+        self.create = self._unconfigured
+
+    async def _unconfigured(self, **kwargs):
+        raise AssertionError("fake_openai.create was not configured")
+
+    @staticmethod
+    def response(text: str, response_id: str = "resp") -> types.SimpleNamespace:
+        """
+        A non-streamed Responses API result carrying `text` as its output.
+        """
+        return types.SimpleNamespace(id=response_id, output_text=text)
+
+    def reply(self, *texts: str, delay: float = 0.0) -> None:
+        """
+        Answer the n-th call with texts[n] (the last one repeats) after `delay` seconds.
+        """
+
+        async def create(**kwargs):
+            text = texts[min(len(self.calls), len(texts)) - 1]
+            await asyncio.sleep(delay)
+            return self.response(text, f"resp_{len(self.calls)}")
+
+        self.create = create
+
+
+class FakeAsyncOpenAI:
+    def __init__(self, fake: FakeOpenAI, api_key, base_url=None, http_client=None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.http_client = http_client
+        self.responses = types.SimpleNamespace(create=self._create)
+        self._fake = fake
+        fake.clients.append(self)
+
+    async def _create(self, **kwargs):
+        self._fake.calls.append(kwargs)
+        return await self._fake.create(**kwargs)
+
+    async def close(self):
+        pass
+
+
+def _reset_singletons() -> None:
+    reset_settings_cache()
+    reset_rate_limit_cache()
+    reset_openai_client()
+    reset_response_cache()
+    reset_circuit_breaker()
+    get_single_flight.cache_clear()
+    get_latency_tracker.cache_clear()
+
+
+@pytest.fixture()
+def fake_openai(monkeypatch):
+    """
+    Route the model path to a FakeOpenAI. Settings and the per-process singletons are reset
+    before the test and again on teardown, so env vars set in the test body apply and nothing
+    leaks into later tests even when this one fails.
+    """
+    fake = FakeOpenAI()
+    monkeypatch.setenv("SMART_REPLY_OPENAI_API_KEY", "test-key")
+
+    def client(api_key, base_url=None, http_client=None):
+        return FakeAsyncOpenAI(fake, api_key, base_url, http_client)
+
+    monkeypatch.setitem(sys.modules, "openai", types.SimpleNamespace(AsyncOpenAI=client))
+    _reset_singletons()
+    yield fake
+    _reset_singletons()
@@ -0,0 +1,127 @@
+from fastapi.testclient import TestClient
+import pytest
+
+from app.core.config import reset_settings_cache
+from app.core.deadline import DeadlineExceeded
+from app.main import create_app
+from app.middleware.rate_limit import reset_rate_limit_cache
+from app.services import llm
+from app.services.cache import reset_response_cache
+from app.services.executor import WorkerPoolSaturated
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    monkeypatch.setenv("API_KEY", "secret")
+    reset_settings_cache()
+    reset_rate_limit_cache()
+    reset_response_cache()
+    c = TestClient(create_app())
+    c.headers.update({"x-api-key": "secret"})
+    return c
+
+
+def test_batch_returns_results_in_order(client):
+    payload = {
+        "requests": [
+            {"incoming_message": "Can you share the Q1 metrics?", "channel": "email"},
+            {"incoming_message": "Can someone review the PR today?", "channel": "slack", "tone": "concise"},
+            {"incoming_message": "Enjoyed your post on data platforms.", "channel": "linkedin"},
+        ]
+    }
+    response = client.post("/v1/reply/draft:batch", json=payload)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["succeeded"] == 3 and data["failed"] == 0
+    assert [r["index"] for r in data["results"]] == [0, 1, 2]
+    assert [r["response"]["channel_applied"] for r in data["results"]] == ["email", "slack", "linkedin"]
+    assert all(len(r["response"]["drafts"]) == 3 for r in data["results"])
+
+
+def test_batch_reports_per_item_errors(client, monkeypatch):
+    original = llm._generate_reply_drafts
+
+    async def flaky(request, settings):
+        if "fail" in request.incoming_message:
+            raise RuntimeError("upstream exploded")
+        return await original(request, settings)
+
+    monkeypatch.setattr(llm, "_generate_reply_drafts", flaky)
+    payload = {"requests": [{"incoming_message": "ok one"}, {"incoming_message": "please fail"}]}
+    data = client.post("/v1/reply/draft:batch", json=payload).json()
+    assert data["succeeded"] == 1 and data["failed"] == 1
+    assert data["results"][0]["response"] is not None
+    assert data["results"][1] == {"index": 1, "response": None, "error": "Draft generation failed."}
+
+
+def test_batch_reports_known_failures_distinctly(client, monkeypatch):
+    failures = {"busy": WorkerPoolSaturated(), "slow": DeadlineExceeded("Request deadline exceeded.")}
+
+    async def failing(request, settings):
+        raise failures[request.incoming_message]
+
+    monkeypatch.setattr(llm, "_generate_reply_drafts", failing)
+    payload = {"requests": [{"incoming_message": "busy"}, {"incoming_message": "slow"}]}
+    data = client.post("/v1/reply/draft:batch", json=payload).json()
+    assert [r["error"] for r in data["results"]] == ["Server busy, retry shortly.", "Request deadline exceeded."]
+
+
+def test_batch_rejects_oversized_batches(monkeypatch, client):
+    monkeypatch.setenv("SMART_REPLY_BATCH_MAX_SIZE", "2")
+    reset_settings_cache()
+    payload = {"requests": [{"incoming_message": f"Message {i}"} for i in range(3)]}
+    response = client.post("/v1/reply/draft:batch", json=payload)
+    assert response.status_code == 422
+    assert response.json()["detail"] == "Batch size exceeds maximum of 2."
+
+
+def test_batch_schema_caps_the_item_count(client):
+    payload = {"requests": [{"incoming_message": f"Message {i}"} for i in range(101)]}
+    response = client.post("/v1/reply/draft:batch", json=payload)
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "too_long"
+
+
+def test_batch_items_count_against_rate_limit(monkeypatch):
+    monkeypatch.setenv("API_KEY", "secret")
+    monkeypatch.setenv("SMART_REPLY_RATE_LIMIT_PER_MINUTE", "3")
+    reset_settings_cache()
+    reset_rate_limit_cache()
+    client = TestClient(create_app())
+    client.headers.update({"x-api-key": "secret"})
+
+    batch = {"requests": [{"incoming_message": "One"}, {"incoming_message": "Two"}]}
+    assert client.post("/v1/reply/draft:batch", json=batch).status_code == 200
+    # Two of three slots are used; another two-item batch no longer fits.
+    assert client.post("/v1/reply/draft:batch", json=batch).status_code == 429
+    assert client.post("/v1/reply/draft", json={"incoming_message": "Three"}).status_code == 200
+    reset_settings_cache()
+    reset_rate_limit_cache()
+
+
+def test_batch_larger_than_rate_limit_is_rejected_without_retry_after(monkeypatch):
+    monkeypatch.setenv("API_KEY", "secret")
+    monkeypatch.setenv("SMART_REPLY_RATE_LIMIT_PER_MINUTE", "3")
+    reset_settings_cache()
+    reset_rate_limit_cache()
+    client = TestClient(create_app())
+    client.headers.update({"x-api-key": "secret"})
+
+    batch = {"requests": [{"incoming_message": f"Message {i}"} for i in range(4)]}
+    response = client.post("/v1/reply/draft:batch", json=batch)
+    assert response.status_code == 422
+    assert "Retry-After" not in response.headers
+    assert response.json()["detail"] == "Batch of 4 requests exceeds your rate limit of 3; split it into smaller batches."
+    # Nothing was charged: the full budget is still available.
+    assert client.post("/v1/reply/draft:batch", json={"requests": batch["requests"][:3]}).status_code == 200
+    reset_settings_cache()
+    reset_rate_limit_cache()
+
+
+def test_batch_requires_api_key(client):
+    response = client.post(
+        "/v1/reply/draft:batch",
+        json={"requests": [{"incoming_message": "Hi"}]},
+        headers={"x-api-key": "wrong"},
+    )
+    assert response.status_code == 401
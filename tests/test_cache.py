@@ -0,0 +1,115 @@
+from fastapi.testclient import TestClient
+
+from app.api.schemas import DraftRequest, DraftResponse
+from app.core.config import reset_settings_cache
+from app.main import create_app
+from app.middleware.rate_limit import reset_rate_limit_cache
+from app.services.cache import (
+    InMemoryResponseCache,
+    SharedResponseCache,
+    get_response_cache,
+    request_cache_key,
+    reset_response_cache,
+)
+
+
+def _response(request_id: str = "abc12345") -> DraftResponse:
+    return DraftResponse(
+        request_id=request_id,
+        detected_tone="neutral-professional",
+        channel_applied="email",
+        drafts=[{"label": f"D{i}", "text": f"Draft {i}"} for i in range(3)],
+        notes="cached",
+        confidence_score=0.8,
+    )
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_cache_key_is_canonical():
+    explicit = DraftRequest(
+        incoming_message="Hello",
+        channel="email",
+        tone="professional",
+        constraints={"avoid_phrases": ["ASAP"], "max_words": 40},
+    )
+    defaults = DraftRequest.model_validate(
+        {"constraints": {"max_words": 40, "avoid_phrases": ["ASAP"]}, "incoming_message": "Hello"}
+    )
+    assert request_cache_key(explicit) == request_cache_key(defaults)
+
+    other_tone = explicit.model_copy(update={"tone": "friendly"})
+    assert request_cache_key(explicit) != request_cache_key(other_tone)
+    assert request_cache_key(explicit, "stub") != request_cache_key(explicit, "openai:gpt-4.1-mini")
+
+
+def test_in_memory_cache_ttl_and_lru_eviction():
+    clock = FakeClock()
+    cache = InMemoryResponseCache(max_entries=2, ttl_seconds=10, clock=clock)
+    cache.set("a", _response("a"))
+    cache.set("b", _response("b"))
+    assert cache.get("a").request_id == "a"  # refreshes "a"
+    cache.set("c", _response("c"))  # evicts least recently used "b"
+    assert cache.get("b") is None
+    assert cache.get("c").request_id == "c"
+
+    clock.now = 11
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+    assert stats["evictions"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_shared_cache_is_visible_across_instances():
+    writer = SharedResponseCache(max_entries=10, ttl_seconds=60)
+    reader = SharedResponseCache(max_entries=10, ttl_seconds=60)
+    try:
+        writer.set("k", _response("shared01"))
+        cached = reader.get("k")
+        assert isinstance(cached, DraftResponse)
+        assert cached.request_id == "shared01"
+    finally:
+        writer.clear()
+
+
+def test_identical_requests_are_served_from_cache(monkeypatch):
+    monkeypatch.setenv("API_KEY", "secret")
+    reset_settings_cache()
+    reset_rate_limit_cache()
+    reset_response_cache()
+    client = TestClient(create_app())
+    client.headers.update({"x-api-key": "secret"})
+
+    payload = {"incoming_message": "Can you share the Q1 metrics?", "channel": "slack", "tone": "concise"}
+    first = client.post("/v1/reply/draft", json=payload)
+    second = client.post("/v1/reply/draft", json=payload)
+
+    assert first.status_code == second.status_code == 200
+    assert first.json()["drafts"] == second.json()["drafts"]
+    assert first.json()["request_id"] != second.json()["request_id"]
+    assert get_response_cache().stats()["hits"] == 1
+
+
+def test_cache_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("API_KEY", "secret")
+    monkeypatch.setenv("SMART_REPLY_RESPONSE_CACHE_ENABLED", "false")
+    reset_settings_cache()
+    reset_rate_limit_cache()
+    reset_response_cache()
+    client = TestClient(create_app())
+    client.headers.update({"x-api-key": "secret"})
+
+    payload = {"incoming_message": "Ping?", "channel": "email", "tone": "professional"}
+    assert client.post("/v1/reply/draft", json=payload).status_code == 200
+    assert client.post("/v1/reply/draft", json=payload).status_code == 200
+    assert get_response_cache().stats()["hits"] == 0
+    reset_settings_cache()
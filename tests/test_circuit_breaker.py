@@ -0,0 +1,161 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+import pytest
+
+from app.api.schemas import DraftRequest
+from app.core.deadline import DeadlineExceeded
+from app.core.metrics import CIRCUIT_FALLBACKS, REGISTRY
+from app.main import create_app
+from app.services.circuit_breaker import CircuitBreaker, get_circuit_breaker
+from app.services import llm
+from app.services.llm import CIRCUIT_FALLBACK_NOTE, generate_reply_drafts, stream_reply_drafts
+
+_PAYLOAD = json.dumps(
+    {
+        "request_id": "r",
+        "detected_tone": "professional",
+        "channel_applied": "email",
+        "drafts": [{"label": label, "text": f"Draft {label}"} for label in ("A", "B", "C")],
+        "notes": "ok",
+        "confidence_score": 0.9,
+    }
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_breaker_opens_on_failure_rate_and_recovers_through_half_open():
+    clock = FakeClock()
+    breaker = CircuitBreaker(
+        failure_rate_threshold=0.5, window_size=4, min_calls=4, open_seconds=10, half_open_max_calls=2, clock=clock
+    )
+    for success in (True, False, True):
+        assert breaker.allow()
+        breaker.record(success, 0.1)
+    assert breaker.state == "closed"  # below min_calls
+    breaker.record(False, 0.1)
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    clock.now = 10
+    assert breaker.state == "half_open"
+    assert breaker.allow() and breaker.allow()
+    assert not breaker.allow()  # trial slots exhausted
+    breaker.record(True, 0.1)
+    assert breaker.state == "half_open"
+    breaker.record(True, 0.1)
+    assert breaker.state == "closed"
+    assert breaker.failure_rate() == 0.0
+
+
+def test_breaker_counts_slow_calls_and_reopens_on_failed_trial():
+    clock = FakeClock()
+    breaker = CircuitBreaker(slow_call_seconds=1.0, window_size=2, min_calls=2, open_seconds=5, clock=clock)
+    breaker.record(True, 2.0)
+    breaker.record(True, 3.0)
+    assert breaker.state == "open"
+
+    clock.now = 5
+    assert breaker.allow()
+    breaker.release()  # cancelled trial gives its slot back
+    assert breaker.allow()
+    breaker.record(False, 0.1)
+    assert breaker.state == "open"
+    clock.now = 9
+    assert breaker.state == "open"
+
+
+def test_breaker_window_forgets_old_failures():
+    breaker = CircuitBreaker(failure_rate_threshold=0.5, window_size=4, min_calls=4)
+    for success in (False, True, True, True, True, True):
+        breaker.record(success, 0.1)
+    assert breaker.failure_rate() == 0.0
+    assert breaker.state == "closed"
+
+
+@pytest.fixture()
+def failing_openai(fake_openai, monkeypatch):
+    """
+    Fake AsyncOpenAI that fails until `healthy[0]` is set, with a breaker that opens after two failures.
+    """
+    healthy = [False]
+    monkeypatch.setenv("API_KEY", "secret")
+    monkeypatch.setenv("SMART_REPLY_CIRCUIT_WINDOW_SIZE", "2")
+    monkeypatch.setenv("SMART_REPLY_CIRCUIT_MIN_CALLS", "2")
+    monkeypatch.setenv("SMART_REPLY_CIRCUIT_HALF_OPEN_MAX_CALLS", "1")
+    REGISTRY.reset()
+
+    async def create(**kwargs):
+        if not healthy[0]:
+            raise RuntimeError("upstream unavailable")
+        return fake_openai.response(_PAYLOAD)
+
+    fake_openai.create = create
+    return healthy, fake_openai.calls
+
+
+def test_open_circuit_serves_uncached_stub_fallback(failing_openai):
+    healthy, calls = failing_openai
+    request = DraftRequest(incoming_message="Can we meet tomorrow?", channel="email", tone="professional")
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            asyncio.run(generate_reply_drafts(request))
+    assert get_circuit_breaker().state == "open"
+
+    result = asyncio.run(generate_reply_drafts(request))
+    assert result.notes.endswith(CIRCUIT_FALLBACK_NOTE)
+    assert len(calls) == 2  # no upstream call while open
+    assert CIRCUIT_FALLBACKS.values()[()] == 1
+
+    # Once the upstream recovers, the half-open trial closes the circuit and the fallback
+    # was never cached in place of model output.
+    healthy[0] = True
+    get_circuit_breaker()._opened_at -= get_circuit_breaker().open_seconds
+    result = asyncio.run(generate_reply_drafts(request))
+    assert result.drafts[0].text == "Draft A"
+    assert get_circuit_breaker().state == "closed"
+
+
+def test_caller_deadlines_are_not_upstream_failures(failing_openai, monkeypatch):
+    async def past_deadline(request, settings, start):
+        raise DeadlineExceeded()
+
+    monkeypatch.setattr(llm, "_generate_model_drafts", past_deadline)
+    request = DraftRequest(incoming_message="Can we meet tomorrow?", channel="email", tone="professional")
+    for _ in range(4):
+        with pytest.raises(DeadlineExceeded):
+            asyncio.run(generate_reply_drafts(request))
+    assert get_circuit_breaker().state == "closed"
+    assert get_circuit_breaker().failure_rate() == 0.0
+
+
+def test_open_circuit_falls_back_for_streams(failing_openai):
+    get_circuit_breaker()._transition("open")
+    request = DraftRequest(incoming_message="Can we meet tomorrow?", channel="slack", tone="friendly")
+
+    async def collect():
+        return [item async for item in stream_reply_drafts(request)]
+
+    events = asyncio.run(collect())
+    assert [name for name, _ in events] == ["draft", "draft", "draft", "summary"]
+    assert events[-1][1]["notes"].endswith(CIRCUIT_FALLBACK_NOTE)
+
+
+def test_health_and_metrics_report_circuit_state(failing_openai):
+    client = TestClient(create_app())
+    client.headers.update({"x-api-key": "secret"})
+    assert client.get("/health").json()["upstream_circuit"] == "closed"
+    assert "smart_reply_circuit_state 0" in client.get("/metrics").text
+
+    get_circuit_breaker()._transition("open")
+    assert client.get("/health").json()["upstream_circuit"] == "open"
+    assert "smart_reply_circuit_state 2" in client.get("/metrics").text
@@ -0,0 +1,87 @@
+import asyncio
+import json
+
+from app.api.schemas import DraftRequest
+from app.services.compaction import compact_request, strip_thread_noise, trim_to_token_budget
+from app.services.llm import generate_reply_drafts
+from app.services.tokens import estimate_tokens
+
+_THREAD = """From: Sam Smith
+Subject: Q3 numbers
+
+Hi team,
+
+Can we meet next week to go over the Q3 numbers?
+
+Thanks,
+Sam
+--
+Sam Smith | Finance
+Sent from my iPhone
+
+On Mon, 3 Mar 2026 at 10:00, Alex <alex@example.com> wrote:
+> Here are the numbers.
+> Cheers, Alex
+"""
+
+
+def test_strip_thread_noise_removes_chain_signature_and_headers():
+    text, removed = strip_thread_noise(_THREAD)
+    assert text == "Hi team,\n\nCan we meet next week to go over the Q3 numbers?\n\nThanks,\nSam"
+    assert removed == ["quoted reply chain", "headers", "signature"]
+
+
+def test_strip_thread_noise_cuts_outlook_header_blocks():
+    message = "Sounds good.\n\nFrom: Alex\nSent: Monday\nTo: Sam\nSubject: Plan\n\nEarlier message"
+    assert strip_thread_noise(message) == ("Sounds good.", ["quoted reply chain"])
+
+
+def test_strip_thread_noise_leaves_plain_messages_alone():
+    message = "Can you send the deck?\n-- not a signature, just a dash"
+    assert strip_thread_noise(message) == (message, [])
+    # Never strip a message down to nothing.
+    assert strip_thread_noise("> only quoted") == ("> only quoted", [])
+
+
+def test_trim_to_token_budget_keeps_leading_words():
+    text = " ".join(f"word{index}" for index in range(200))
+    trimmed, total = trim_to_token_budget(text, 50)
+    assert total == estimate_tokens(text)
+    assert trimmed.endswith(" …")
+    assert estimate_tokens(trimmed) <= 51
+    assert text.startswith(trimmed[:-2])
+    assert trim_to_token_budget("short", 50) == ("short", 1)
+    assert trim_to_token_budget(text, 0) == (text, total)
+
+
+def test_compact_request_reports_removals():
+    request = DraftRequest(incoming_message=_THREAD, context="background " * 300, channel="slack")
+    compacted, removed = compact_request(request, 100)
+    assert compacted.incoming_message.startswith("Hi team,")
+    assert estimate_tokens(compacted.context) <= 101
+    assert removed[0] == "removed quoted reply chain from the message"
+    assert removed[-1].startswith("trimmed context to ~100 of ~")
+    assert request.context == "background " * 300  # original untouched
+
+
+def test_model_path_sends_compacted_prompt_and_notes_it(fake_openai, monkeypatch):
+    monkeypatch.setenv("SMART_REPLY_RESPONSE_CACHE_ENABLED", "false")
+    monkeypatch.setenv("SMART_REPLY_CONTEXT_TOKEN_BUDGETS", '{"email": 20}')
+    payload = {
+        "request_id": "r",
+        "detected_tone": "professional",
+        "channel_applied": "email",
+        "drafts": [{"label": label, "text": f"Draft {label}"} for label in ("A", "B", "C")],
+        "notes": "Model notes.",
+        "confidence_score": 0.9,
+    }
+
+    fake_openai.reply(json.dumps(payload))
+    request = DraftRequest(incoming_message=_THREAD, context="background " * 100, channel="email")
+    result = asyncio.run(generate_reply_drafts(request))
+
+    prompt = fake_openai.calls[0]["input"][1]["content"]
+    assert "Here are the numbers" not in prompt
+    assert "Sent from my iPhone" not in prompt
+    assert prompt.count("background") < 100
+    assert result.notes.startswith("Model notes. Compacted input: removed quoted reply chain from the message;")
@@ -1,5 +1,5 @@
 from app.api.schemas import Constraints
-from app.services.constraints import check_constraints, adjust_text_for_violations
+from app.services.constraints import adjust_text_for_violations, check_constraints, enforce_constraints
 
 
 def test_check_constraints_detects_violations():
@@ -20,3 +20,44 @@ def test_adjust_text_for_violations():
     assert result["within_max_words"]
     assert result["includes_question"]
     assert result["avoids_phrases"]
+
+
+def test_avoid_phrases_are_removed_case_insensitively():
+    constraints = Constraints(avoid_phrases=["asap", "Circle back"])
+    text = "Send it ASAP and we can CIRCLE BACK on Friday."
+    assert check_constraints(text, constraints)["violations"] == ["avoid_phrases"]
+    adjusted = adjust_text_for_violations(text, constraints)
+    assert "asap" not in adjusted.lower()
+    assert "circle back" not in adjusted.lower()
+    assert check_constraints(adjusted, constraints)["avoids_phrases"]
+
+
+def test_phrase_matcher_prefers_longest_phrase_and_is_shared():
+    from app.services.phrases import get_phrase_matcher
+
+    matcher = get_phrase_matcher(["touch", "touch base"])
+    assert matcher is get_phrase_matcher(("touch", "touch base"))
+    assert matcher.remove("Let's Touch Base soon") == ("Let's  soon", 1)
+    assert not get_phrase_matcher(None)
+    assert get_phrase_matcher([]).remove("unchanged") == ("unchanged", 0)
+
+
+def test_enforce_constraints_returns_text_with_its_evaluation():
+    constraints = Constraints(max_words=5, must_include_question=True, avoid_phrases=["ASAP"])
+    text = "Please send ASAP. No question here."
+    adjusted, evaluation = enforce_constraints(text, constraints)
+    # The phrase is removed, a question appended, then the text cut to five words.
+    assert adjusted == "Please send What do ?"
+    assert evaluation == {
+        "within_max_words": True,
+        "includes_question": True,
+        "avoids_phrases": True,
+        "violations": [],
+    }
+
+
+def test_enforce_constraints_leaves_compliant_text_untouched():
+    constraints = Constraints(max_words=10, must_include_question=True)
+    text = "Could you  share the figures?"
+    assert enforce_constraints(text, constraints) == (text, check_constraints(text, constraints))
+    assert enforce_constraints(text, None)[0] == text
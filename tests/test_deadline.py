@@ -0,0 +1,157 @@
+import asyncio
+import json
+import time
+
+from fastapi.testclient import TestClient
+import pytest
+
+from app.api.schemas import DraftRequest
+from app.core.deadline import DeadlineExceeded, run_within_deadline, set_deadline
+from app.core.metrics import REGISTRY, UPSTREAM_HEDGES
+from app.main import create_app
+from app.services.hedging import LatencyTracker, hedged
+from app.services.llm import generate_reply_drafts
+
+_PAYLOAD = json.dumps(
+    {
+        "request_id": "r",
+        "detected_tone": "professional",
+        "channel_applied": "email",
+        "drafts": [{"label": label, "text": f"Draft {label}"} for label in ("A", "B", "C")],
+        "notes": "ok",
+        "confidence_score": 0.9,
+    }
+)
+
+
+@pytest.fixture()
+def slow_openai(fake_openai, monkeypatch):
+    """
+    Make the fake AsyncOpenAI's n-th call sleep delays[n] seconds before answering.
+    """
+    delays_seen: list[float] = []
+
+    def install(*delays: float, **env: str):
+        monkeypatch.setenv("API_KEY", "secret")
+        monkeypatch.setenv("SMART_REPLY_RESPONSE_CACHE_ENABLED", "false")
+        monkeypatch.setenv("SMART_REPLY_REQUEST_COALESCING_ENABLED", "false")
+        for key, value in env.items():
+            monkeypatch.setenv(f"SMART_REPLY_{key.upper()}", value)
+        REGISTRY.reset()
+
+        async def create(**kwargs):
+            delay = delays[min(len(delays_seen), len(delays) - 1)]
+            delays_seen.append(delay)
+            await asyncio.sleep(delay)
+            return fake_openai.response(_PAYLOAD, f"resp_{len(delays_seen)}")
+
+        fake_openai.create = create
+        return delays_seen
+
+    return install
+
+
+def test_latency_tracker_quantile_needs_min_samples():
+    tracker = LatencyTracker(window=100, min_samples=10)
+    for value in range(1, 10):
+        tracker.observe(value / 100)
+    assert tracker.quantile(0.95) is None
+    for value in range(10, 101):
+        tracker.observe(value / 100)
+    assert tracker.quantile(0.95) == 0.95
+    assert tracker.quantile(0.5) == 0.5
+
+
+def test_hedged_returns_the_faster_request_and_cancels_the_other():
+    REGISTRY.reset()
+    delays = iter([1.0, 0.01])
+    cancelled = []
+
+    async def call():
+        delay = next(delays)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(delay)
+            raise
+        return delay
+
+    async def main():
+        start = time.perf_counter()
+        result = await hedged(call, delay=0.02)
+        await asyncio.sleep(0)
+        return result, time.perf_counter() - start
+
+    result, elapsed = asyncio.run(main())
+    assert result == 0.01
+    assert elapsed < 0.5
+    assert cancelled == [1.0]
+    assert UPSTREAM_HEDGES.values() == {("hedge",): 1}
+
+
+def test_hedged_skips_the_duplicate_when_primary_is_fast():
+    calls = []
+
+    async def call():
+        calls.append(1)
+        return "ok"
+
+    assert asyncio.run(hedged(call, delay=0.5)) == "ok"
+    assert calls == [1]
+
+
+def test_hedged_falls_back_to_the_other_request_on_failure():
+    outcomes = iter(["fail", "ok"])
+
+    async def call():
+        outcome = next(outcomes)
+        await asyncio.sleep(0.05 if outcome == "fail" else 0.1)
+        if outcome == "fail":
+            raise ValueError("bad payload")
+        return outcome
+
+    assert asyncio.run(hedged(call, delay=0.01)) == "ok"
+
+
+def test_run_within_deadline_raises_when_budget_is_spent():
+    async def main():
+        set_deadline(0.02)
+        await run_within_deadline(asyncio.sleep(1))
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(main())
+
+
+def test_slow_upstream_is_cut_off_by_client_deadline(slow_openai):
+    slow_openai(5.0)
+    client = TestClient(create_app())
+    start = time.perf_counter()
+    response = client.post(
+        "/v1/reply/draft",
+        json={"incoming_message": "Any update?"},
+        headers={"x-api-key": "secret", "x-request-timeout": "0.1"},
+    )
+    assert response.status_code == 504
+    assert response.json() == {"detail": "Request deadline exceeded."}
+    assert time.perf_counter() - start < 2
+
+
+def test_client_header_cannot_extend_server_deadline(slow_openai):
+    slow_openai(5.0, request_deadline_seconds="0.1")
+    client = TestClient(create_app())
+    response = client.post(
+        "/v1/reply/draft",
+        json={"incoming_message": "Any update?"},
+        headers={"x-api-key": "secret", "x-request-timeout": "30"},
+    )
+    assert response.status_code == 504
+
+
+def test_hedging_races_a_slow_upstream_call(slow_openai):
+    calls = slow_openai(2.0, 0.01, upstream_hedging_enabled="true", upstream_hedge_default_delay_seconds="0.05")
+    start = time.perf_counter()
+    result = asyncio.run(generate_reply_drafts(DraftRequest(incoming_message="Any update?")))
+    assert time.perf_counter() - start < 1.0
+    assert result.drafts[0].text == "Draft A"
+    assert calls == [2.0, 0.01]
+    assert UPSTREAM_HEDGES.values() == {("hedge",): 1}
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+
+from fastapi.testclient import TestClient
+import pytest
+
+from app.api.schemas import DraftRequest
+from app.core.config import reset_settings_cache
+from app.main import create_app
+from app.middleware.rate_limit import reset_rate_limit_cache
+from app.services import llm
+from app.services.cache import reset_response_cache
+from app.services.executor import StubExecutor, WorkerPoolSaturated, reset_stub_executor
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    monkeypatch.setenv("API_KEY", "secret")
+    reset_settings_cache()
+    reset_rate_limit_cache()
+    reset_response_cache()
+    reset_stub_executor()
+    c = TestClient(create_app())
+    c.headers.update({"x-api-key": "secret"})
+    yield c
+    reset_stub_executor()
+
+
+def test_thread_mode_runs_off_the_event_loop_thread():
+    executor = StubExecutor(mode="thread", workers=2)
+
+    async def main():
+        return await executor.run(threading.get_ident)
+
+    try:
+        assert asyncio.run(main()) != threading.get_ident()
+    finally:
+        executor.shutdown()
+
+
+def test_saturated_pool_rejects_instead_of_queueing():
+    executor = StubExecutor(mode="thread", workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def main():
+        blocked = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        assert executor.pending == 2
+        with pytest.raises(WorkerPoolSaturated):
+            await executor.run(lambda: None)
+        release.set()
+        await asyncio.gather(*blocked)
+        assert executor.pending == 0
+
+    try:
+        asyncio.run(main())
+    finally:
+        executor.shutdown()
+
+
+def test_cancelled_caller_keeps_its_slot_until_the_job_finishes():
+    executor = StubExecutor(mode="thread", workers=1, max_queue=0)
+    release = threading.Event()
+
+    async def main():
+        caller = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        await asyncio.sleep(0.01)
+        # The worker thread is still busy, so the pool is still full.
+        assert executor.pending == 1
+        with pytest.raises(WorkerPoolSaturated):
+            await executor.run(lambda: None)
+        release.set()
+        for _ in range(100):
+            if executor.pending == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert executor.pending == 0
+        assert await executor.run(lambda: "ok") == "ok"
+
+    try:
+        asyncio.run(main())
+    finally:
+        executor.shutdown()
+
+
+def test_process_mode_matches_inline_stub_output():
+    request = DraftRequest(
+        incoming_message="Could you share the Q1 metrics by Friday?",
+        context="Finance review",
+        channel="slack",
+        constraints={"max_words": 40, "avoid_phrases": ["ASAP"]},
+    )
+    executor = StubExecutor(mode="process", workers=1)
+
+    async def main():
+        return await executor.run(llm._stub_drafts, request)
+
+    try:
+        result = asyncio.run(main())
+    finally:
+        executor.shutdown()
+    expected = llm._stub_drafts(request)
+    assert result.drafts == expected.drafts
+    assert result.confidence_score == expected.confidence_score
+
+
+def test_saturation_returns_503_with_retry_after(client, monkeypatch):
+    class FullExecutor:
+        async def run(self, fn, *args):
+            raise WorkerPoolSaturated(retry_after=2)
+
+    monkeypatch.setattr(llm, "get_stub_executor", lambda: FullExecutor())
+    response = client.post("/v1/reply/draft", json={"incoming_message": "Any update on the launch?"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "2"
+    assert response.json() == {"detail": "Server busy, retry shortly."}
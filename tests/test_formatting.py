@@ -48,3 +48,30 @@ def test_slack_emoji_added_up_to_two_when_enabled_with_seed():
     formatted, _ = apply_channel_format("slack", text, emoji_enabled=True, rng=rng)
     # With seed 0, randint -> 2 so we expect two emojis appended
     assert formatted.endswith("🙂 🙂") or formatted.endswith("👍 👍") or formatted.endswith("✅ ✅") or formatted.endswith("🙏 🙏") or len(formatted.split()) > len(text.split())
+
+
+def test_email_existing_signoff_is_kept():
+    text = "Hello team,\nPlease find the figures attached.\nMany thanks."
+    formatted, score = apply_channel_format("email", text)
+    assert formatted == "Hello team,\n\nPlease find the figures attached.\n\nMany thanks."
+    assert score == 1 / 3
+
+
+def test_linkedin_long_text_splits_into_at_most_three_paragraphs():
+    sentence = "We shipped a new data platform that makes reporting far simpler for every team."
+    text = " ".join([sentence] * 30)
+    formatted, score = apply_channel_format("linkedin", text)
+    paragraphs = formatted.split("\n\n")
+    assert len(paragraphs) == 3
+    assert all(len(p.split()) >= 50 for p in paragraphs[:2])
+    assert "happy to connect" in formatted
+    assert score == 1.0
+
+
+def test_slack_long_text_is_truncated_after_bullets():
+    text = " ".join(f"Point number {i} needs a decision." for i in range(40))
+    formatted, score = apply_channel_format("slack", text)
+    assert formatted.startswith("- Point number 0")
+    assert formatted.endswith("…")
+    assert len(formatted) <= 360
+    assert score == 2 / 3
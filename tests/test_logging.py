@@ -0,0 +1,81 @@
+import json
+import logging
+import random
+
+import pytest
+
+from app.core.logging import JsonFormatter, SamplingFilter, configure_logging, dropped_log_records, stop_logging
+from app.core.metrics import REGISTRY
+
+
+@pytest.fixture()
+def restore_root_logger():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield
+    stop_logging()
+    root.handlers, root.level = handlers, level
+
+
+def _record(msg, level=logging.INFO, **extra):
+    record = logging.LogRecord("app.test", level, __file__, 1, msg, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extra_fields():
+    line = JsonFormatter().format(_record("drafts.generated", request_id="abc123", latency_ms=12.5))
+    payload = json.loads(line)
+    assert payload["message"] == "drafts.generated"
+    assert payload["level"] == "INFO"
+    assert payload["logger"] == "app.test"
+    assert payload["request_id"] == "abc123"
+    assert payload["latency_ms"] == 12.5
+    assert "args" not in payload and "msecs" not in payload
+
+
+def test_sampling_filter_only_drops_configured_info_events():
+    sampler = SamplingFilter({"drafts.generated": 0.0}, rng=random.Random(0))
+    assert not sampler.filter(_record("drafts.generated"))
+    assert sampler.filter(_record("drafts.generated", level=logging.WARNING))
+    assert sampler.filter(_record("drafts.cache.hit"))
+
+    half = SamplingFilter({"drafts.generated": 0.5}, rng=random.Random(0))
+    kept = sum(half.filter(_record("drafts.generated")) for _ in range(1000))
+    assert 400 < kept < 600
+
+
+def test_configure_logging_writes_json_off_thread(restore_root_logger, capsys):
+    configure_logging(sample_rates={"drafts.generated": 0.0})
+    logger = logging.getLogger("app.services.llm")
+    logger.info("drafts.generated", extra={"request_id": "dropped"})
+    logger.info("openai.responses.success", extra={"request_id": "r1", "attempt": 2})
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("drafts.failed")
+    stop_logging()
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [line["message"] for line in lines] == ["openai.responses.success", "drafts.failed"]
+    assert lines[0]["request_id"] == "r1" and lines[0]["attempt"] == 2
+    assert "ValueError: boom" in lines[1]["exc_info"]
+
+
+def test_dropped_records_are_exported_and_reported_at_shutdown(restore_root_logger, capsys):
+    configure_logging(queue_size=1)
+    before = dropped_log_records()
+    queue_handler = logging.getLogger().handlers[0]
+    # A one-slot queue cannot keep up with a tight burst from this thread.
+    for _ in range(100):
+        queue_handler.enqueue(_record("drafts.generated"))
+    assert queue_handler.dropped >= 1
+    dropped = queue_handler.dropped
+    assert dropped_log_records() == before + dropped
+    assert f"smart_reply_log_records_dropped_total {before + dropped}" in REGISTRY.render()
+
+    stop_logging()
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert lines[-1]["message"] == "logging.records_dropped"
+    assert lines[-1]["dropped"] == dropped
+    assert dropped_log_records() == before + dropped
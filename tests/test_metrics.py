@@ -0,0 +1,116 @@
+import threading
+
+from fastapi.testclient import TestClient
+import pytest
+
+from app.core.config import reset_settings_cache
+from app.core.metrics import Counter, Histogram, MetricsRegistry, REGISTRY
+from app.main import create_app
+from app.middleware.rate_limit import reset_rate_limit_cache
+from app.services.cache import reset_response_cache
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    monkeypatch.setenv("API_KEY", "secret")
+    reset_settings_cache()
+    reset_rate_limit_cache()
+    reset_response_cache()
+    REGISTRY.reset()
+    c = TestClient(create_app())
+    c.headers.update({"x-api-key": "secret"})
+    return c
+
+
+def test_counters_merge_per_thread_shards():
+    registry = MetricsRegistry()
+    counter = Counter(registry, "jobs_total", "Jobs.", ("kind",))
+
+    def work():
+        for _ in range(1000):
+            counter.inc("a")
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter.inc("b", amount=2)
+    assert counter.values() == {("a",): 4000, ("b",): 2}
+    assert 'jobs_total{kind="a"} 4000' in registry.render()
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = Histogram(registry, "latency_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, "upstream")
+    lines = registry.render().splitlines()
+    assert "# TYPE latency_seconds histogram" in lines
+    assert 'latency_seconds_bucket{stage="upstream",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{stage="upstream",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{stage="upstream",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{stage="upstream"} 4' in lines
+    assert 'latency_seconds_sum{stage="upstream"} 4.05' in lines
+
+
+def test_metrics_endpoint_reports_requests_and_stages(client):
+    payload = {"incoming_message": "Can you share the Q1 metrics?", "channel": "slack", "tone": "concise"}
+    assert client.post("/v1/reply/draft", json=payload).status_code == 200
+    assert client.post("/v1/reply/draft", json=payload).status_code == 200
+    client.post("/v1/reply/draft", json=payload, headers={"x-api-key": "wrong"})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert (
+        'smart_reply_requests_total{route="/v1/reply/draft",method="POST",channel="slack",tone="concise",status="200"} 2'
+        in body
+    )
+    assert 'route="/v1/reply/draft",method="POST",channel="",tone="",status="401"} 1' in body
+    for stage in ("auth", "rate_limit", "generation", "constraints", "formatting"):
+        assert f'smart_reply_stage_duration_seconds_count{{stage="{stage}"}}' in body
+    assert "smart_reply_response_cache_hit_ratio 0.5" in body
+    assert "smart_reply_requests_in_flight 1" in body  # the scrape itself
+
+
+def test_metrics_require_api_key(client):
+    assert client.get("/metrics", headers={"x-api-key": "wrong"}).status_code == 401
+
+
+def test_metrics_can_be_disabled(client, monkeypatch):
+    monkeypatch.setenv("SMART_REPLY_METRICS_ENABLED", "false")
+    reset_settings_cache()
+    assert TestClient(create_app()).get("/metrics", headers={"x-api-key": "secret"}).status_code == 404
+
+
+def test_upstream_retries_and_stages_are_counted(fake_openai):
+    import asyncio
+    import json
+
+    from app.api.schemas import DraftRequest
+    from app.core.metrics import STAGE_SECONDS, UPSTREAM_RETRIES
+    from app.services.llm import generate_reply_drafts
+
+    REGISTRY.reset()
+    fake_openai.reply(
+        "not json",
+        json.dumps(
+            {
+                "request_id": "r",
+                "detected_tone": "professional",
+                "channel_applied": "email",
+                "drafts": [{"label": label, "text": "One"} for label in ("A", "B", "C")],
+                "notes": "ok",
+                "confidence_score": 0.9,
+            }
+        ),
+    )
+    asyncio.run(generate_reply_drafts(DraftRequest(incoming_message="Test msg")))
+
+    assert UPSTREAM_RETRIES.values() == {(): 1}
+    stages = STAGE_SECONDS.values()
+    assert stages[("upstream",)][-1] == 2
+    assert stages[("parse",)][-1] == 2
+    assert stages[("generation",)][-1] == 1
@@ -0,0 +1,130 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+from starlette.requests import Request
+import pytest
+
+from app.core.config import Settings, reset_settings_cache
+from app.main import create_app
+from app.middleware.quotas import QuotaConfig, Tier, TierIndex, client_identity, hash_client_id, load_tier_index
+from app.middleware.rate_limit import SlidingWindowRateLimiter, TieredRateLimiter, reset_rate_limit_cache
+from app.services.cache import reset_response_cache
+
+TIERS = {
+    "default_tier": "free",
+    "tiers": {
+        "free": {"requests_per_minute": 2},
+        "pro": {"requests_per_minute": 100, "daily_quota": 5, "burst": 3},
+    },
+    "clients": {"acme": "pro"},
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_request(headers: dict[str, str], host: str = "10.0.0.1") -> Request:
+    return Request(
+        {
+            "type": "http",
+            "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+            "client": (host, 1234),
+        }
+    )
+
+
+def test_tier_file_is_indexed_by_hashed_client_id(tmp_path):
+    path = tmp_path / "tiers.json"
+    path.write_text(json.dumps(TIERS))
+    index = load_tier_index(Settings(rate_limit_tiers_file=str(path)))
+    assert index.lookup(hash_client_id("acme")).name == "pro"
+    assert index.lookup(hash_client_id("someone-else")).name == "free"
+    assert set(index.tiers) == {"free", "pro"}
+
+
+def test_default_tier_uses_rate_limit_per_minute():
+    index = load_tier_index(Settings(rate_limit_per_minute=42))
+    assert index.lookup("anyone").requests_per_minute == 42
+
+
+def test_unknown_tier_reference_is_rejected():
+    with pytest.raises(ValidationError):
+        QuotaConfig.model_validate({**TIERS, "clients": {"acme": "gold"}})
+
+
+def test_client_identity_sources():
+    request = make_request({"x-api-key": "k1", "x-rapidapi-user": "alice"})
+    assert client_identity(request, Settings(rate_limit_key_source="ip")) == "ip:10.0.0.1"
+    assert client_identity(request, Settings(rate_limit_key_source="api_key")) == hash_client_id("k1")
+    assert client_identity(request, Settings(rate_limit_key_source="header")) == hash_client_id("alice")
+    # Missing header falls back to the peer IP.
+    assert client_identity(make_request({}), Settings(rate_limit_key_source="header")) == "ip:10.0.0.1"
+
+
+def test_tiered_limiter_enforces_burst_minute_and_daily():
+    clock = FakeClock()
+    pro = Tier(name="pro", requests_per_minute=100, daily_quota=5, burst=3)
+    index = TierIndex(Tier(name="free", requests_per_minute=2), {"acme": pro})
+    limiter = TieredRateLimiter(
+        index, lambda window: SlidingWindowRateLimiter(1, window_seconds=window, clock=clock)
+    )
+
+    async def hits(identity, count):
+        return [(await limiter.acquire(identity)).allowed for _ in range(count)]
+
+    assert asyncio.run(hits("acme", 4)) == [True, True, True, False]  # burst of 3/s
+    clock.now = 5
+    assert asyncio.run(hits("acme", 3)) == [True, True, False]  # daily quota of 5
+    assert asyncio.run(hits("stranger", 3)) == [True, True, False]  # free tier 2/min
+
+
+def test_daily_rejection_does_not_charge_shorter_windows():
+    clock = FakeClock()
+    pro = Tier(name="pro", requests_per_minute=10, daily_quota=2, burst=5)
+    limiter = TieredRateLimiter(
+        TierIndex(Tier(name="free", requests_per_minute=2), {"acme": pro}),
+        lambda window: SlidingWindowRateLimiter(1, window_seconds=window, clock=clock),
+    )
+
+    async def hits(count):
+        return [await limiter.acquire("acme") for _ in range(count)]
+
+    first, second = asyncio.run(hits(2))
+    assert second.remaining == 8
+    clock.now = 5  # past the burst window, same minute
+    rejected, again = asyncio.run(hits(2))
+    assert not rejected.allowed and rejected.limit == 2  # the daily quota rejected it
+    assert not again.allowed
+    # The minute and burst windows were refunded, so their remaining counts are unchanged.
+    assert limiter.per_minute.check("acme", cost=0, limit=10).remaining == 8
+    assert limiter.per_second.check("acme", cost=0, limit=5).remaining == 5
+
+
+def test_clients_behind_one_proxy_get_separate_budgets(monkeypatch, tmp_path):
+    path = tmp_path / "tiers.json"
+    path.write_text(json.dumps(TIERS))
+    monkeypatch.setenv("API_KEY", "secret")
+    monkeypatch.setenv("SMART_REPLY_RATE_LIMIT_KEY_SOURCE", "header")
+    monkeypatch.setenv("SMART_REPLY_RATE_LIMIT_TIERS_FILE", str(path))
+    reset_settings_cache()
+    reset_rate_limit_cache()
+    reset_response_cache()
+    client = TestClient(create_app())
+    client.headers.update({"x-api-key": "secret"})
+
+    def post(user):
+        return client.post("/v1/reply/draft", json={"incoming_message": "Hi"}, headers={"x-rapidapi-user": user})
+
+    assert [post("bob").status_code for _ in range(3)] == [200, 200, 429]
+    acme = post("acme")
+    assert acme.status_code == 200
+    assert acme.headers["X-RateLimit-Limit"] == "100"
+    reset_settings_cache()
+    reset_rate_limit_cache()
@@ -0,0 +1,87 @@
+from fastapi.testclient import TestClient
+
+from app.core.config import reset_settings_cache
+from app.main import create_app
+from app.middleware.rate_limit import SlidingWindowRateLimiter, reset_rate_limit_cache
+from app.services.cache import reset_response_cache
+
+
+class FakeClock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_sliding_window_weights_previous_window():
+    clock = FakeClock()
+    limiter = SlidingWindowRateLimiter(10, window_seconds=60, clock=clock)
+    for _ in range(10):
+        assert limiter.check("ip").allowed
+    rejected = limiter.check("ip")
+    assert not rejected.allowed
+    assert rejected.remaining == 0
+    assert rejected.retry_after > 0
+
+    # 15s into the next window, 75% of the previous window still counts: 7.5 used.
+    clock.now = 75
+    decisions = [limiter.check("ip") for _ in range(3)]
+    assert [d.allowed for d in decisions] == [True, True, False]
+
+
+def test_retry_after_points_at_first_allowed_moment():
+    clock = FakeClock()
+    limiter = SlidingWindowRateLimiter(4, window_seconds=60, clock=clock)
+    for _ in range(4):
+        limiter.check("ip")
+    clock.now = 70
+    rejected = limiter.check("ip")
+    assert not rejected.allowed
+    clock.now += rejected.retry_after
+    assert limiter.check("ip").allowed
+
+
+def test_cost_counts_batches_and_rejected_hits_are_free():
+    limiter = SlidingWindowRateLimiter(5, clock=FakeClock())
+    assert limiter.check("ip", cost=3).remaining == 2
+    assert not limiter.check("ip", cost=3).allowed
+    assert limiter.check("ip", cost=2).allowed
+
+
+def test_key_table_is_capped_and_idle_keys_are_swept():
+    clock = FakeClock()
+    limiter = SlidingWindowRateLimiter(5, window_seconds=60, max_keys=3, sweep_interval_seconds=30, clock=clock)
+    for key in ("a", "b", "c", "d"):
+        limiter.check(key)
+    assert len(limiter) == 3  # "a" was evicted as least recently used
+
+    clock.now = 200  # every key is now older than the previous window
+    limiter.check("e")
+    assert len(limiter) == 1
+
+
+def test_rate_limit_headers_on_responses(monkeypatch):
+    monkeypatch.setenv("API_KEY", "secret")
+    monkeypatch.setenv("SMART_REPLY_RATE_LIMIT_PER_MINUTE", "2")
+    reset_settings_cache()
+    reset_rate_limit_cache()
+    reset_response_cache()
+    client = TestClient(create_app())
+    client.headers.update({"x-api-key": "secret"})
+
+    payload = {"incoming_message": "Ping?"}
+    first = client.post("/v1/reply/draft", json=payload)
+    assert first.headers["X-RateLimit-Limit"] == "2"
+    assert first.headers["X-RateLimit-Remaining"] == "1"
+    assert int(first.headers["X-RateLimit-Reset"]) <= 60
+
+    streamed = client.post("/v1/reply/draft:stream", json=payload)
+    assert streamed.headers["X-RateLimit-Remaining"] == "0"
+
+    rejected = client.post("/v1/reply/draft", json=payload)
+    assert rejected.status_code == 429
+    assert rejected.headers["X-RateLimit-Remaining"] == "0"
+    assert int(rejected.headers["Retry-After"]) >= 1
+    reset_settings_cache()
+    reset_rate_limit_cache()
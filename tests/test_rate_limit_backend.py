@@ -0,0 +1,269 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+import pytest
+
+from app.core.config import reset_settings_cache
+from app.main import create_app
+from app.middleware.rate_limit import RateLimitBackendError, reset_rate_limit_cache
+from app.middleware.redis_rate_limit import REFUND_SCRIPT, SLIDING_WINDOW_SCRIPT, RedisRateLimitBackend, RespPool
+from app.services.cache import reset_response_cache
+
+
+class FakeRespServer:
+    """
+    Minimal local stand-in for a Redis server: the limiter only sends EVAL of its two scripts.
+    There is no Lua here, so EVAL runs Python mirrors of SLIDING_WINDOW_SCRIPT and REFUND_SCRIPT.
+    Counts network round-trips.
+    """
+
+    def __init__(self):
+        self.data: dict[str, int] = {}
+        self.commands: list[list[str]] = []
+        self.round_trips = 0
+        self.fail_next = False
+        self._server = None
+
+    async def start(self) -> int:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _read_command(self, reader):
+        header = await reader.readline()
+        if not header:
+            return None
+        parts = []
+        for _ in range(int(header[1:-2])):
+            length = int((await reader.readline())[1:-2])
+            parts.append((await reader.readexactly(length + 2))[:-2].decode())
+        return parts
+
+    def _sliding_window(self, keys: list[str], argv: list[str]) -> bytes:
+        pending, cost, limit, elapsed = int(argv[0]), int(argv[1]), int(argv[2]), float(argv[3])
+        current = self.data.get(keys[0], 0) + pending
+        previous = self.data.get(keys[1], 0)
+        admitted = int(previous * (1 - elapsed) + current + cost <= limit)
+        delta = pending + admitted * cost
+        if delta > 0:
+            self.data[keys[0]] = current = self.data.get(keys[0], 0) + delta
+        return b"*3\r\n:%d\r\n:%d\r\n:%d\r\n" % (admitted, current, previous)
+
+    def _refund(self, keys: list[str], argv: list[str]) -> bytes:
+        if keys[0] not in self.data:
+            return b":0\r\n"
+        self.data[keys[0]] = left = max(0, self.data[keys[0]] - int(argv[0]))
+        return b":%d\r\n" % left
+
+    def _execute(self, command: list[str]) -> bytes:
+        name = command[0].upper()
+        if name == "EVAL":
+            if self.fail_next:
+                self.fail_next = False
+                return b"-ERR injected failure\r\n"
+            scripts = {SLIDING_WINDOW_SCRIPT: self._sliding_window, REFUND_SCRIPT: self._refund}
+            if command[1] not in scripts:
+                return b"-ERR unknown script\r\n"
+            count = int(command[2])
+            return scripts[command[1]](command[3 : 3 + count], command[3 + count :])
+        return b"-ERR unknown command\r\n"
+
+    async def _handle(self, reader, writer):
+        while True:
+            command = await self._read_command(reader)
+            if command is None:
+                break
+            self.commands.append(command)
+            writer.write(self._execute(command))
+            self.round_trips += 1
+            await writer.drain()
+        writer.close()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_instances_share_one_quota():
+    async def scenario():
+        server = FakeRespServer()
+        port = await server.start()
+        url = f"redis://127.0.0.1:{port}/0"
+        clock = lambda: 1_000.0  # noqa: E731 - start of a window
+        first = RedisRateLimitBackend(3, RespPool(url), clock=clock)
+        second = RedisRateLimitBackend(3, RespPool(url), clock=clock)
+        try:
+            decisions = [
+                await first.acquire("client"),
+                await second.acquire("client"),
+                await first.acquire("client"),
+                await second.acquire("client"),
+            ]
+        finally:
+            await first.close()
+            await second.close()
+            await server.stop()
+        return server, decisions
+
+    server, decisions = run(scenario())
+    assert [d.allowed for d in decisions] == [True, True, True, False]
+    assert decisions[2].remaining == 0
+    assert decisions[3].retry_after > 0
+    # The rejected hit was never recorded.
+    assert sum(server.data.values()) == 3
+    # One atomic EVAL round-trip per check, rejections included.
+    assert [c[0] for c in server.commands] == ["EVAL"] * 4
+    assert server.round_trips == 4
+
+
+def test_local_pre_aggregation_skips_network_hops():
+    async def scenario():
+        server = FakeRespServer()
+        port = await server.start()
+        now = [1_000.0]
+        backend = RedisRateLimitBackend(
+            100,
+            RespPool(f"redis://127.0.0.1:{port}"),
+            local_batch=5,
+            sync_interval_seconds=1.0,
+            clock=lambda: now[0],
+        )
+        try:
+            for _ in range(6):
+                assert (await backend.acquire("client")).allowed
+            trips_before_sync = server.round_trips
+            now[0] += 2  # lease expired: the next hit flushes the locally admitted ones
+            await backend.acquire("client")
+        finally:
+            await backend.close()
+            await server.stop()
+        return server, trips_before_sync
+
+    server, trips_before_sync = run(scenario())
+    assert trips_before_sync == 1
+    assert server.round_trips == 2
+    assert sum(server.data.values()) == 7
+
+
+def test_locally_admitted_hits_survive_a_failed_sync():
+    async def scenario():
+        server = FakeRespServer()
+        port = await server.start()
+        now = [1_000.0]
+        backend = RedisRateLimitBackend(
+            100,
+            RespPool(f"redis://127.0.0.1:{port}"),
+            local_batch=5,
+            sync_interval_seconds=1.0,
+            clock=lambda: now[0],
+        )
+        try:
+            for _ in range(4):  # one sync, then three hits admitted locally
+                assert (await backend.acquire("client")).allowed
+            now[0] += 2
+            server.fail_next = True  # the flush fails
+            with pytest.raises(RateLimitBackendError):
+                await backend.acquire("client")
+            await backend.acquire("client")
+        finally:
+            await backend.close()
+            await server.stop()
+        return server
+
+    server = run(scenario())
+    # 1 synced + 3 local (restored after the failed flush) + the final hit.
+    assert sum(server.data.values()) == 5
+
+
+def test_refund_gives_back_synced_and_local_hits():
+    async def scenario():
+        server = FakeRespServer()
+        port = await server.start()
+        backend = RedisRateLimitBackend(
+            100, RespPool(f"redis://127.0.0.1:{port}"), local_batch=5, clock=lambda: 1_000.0
+        )
+        try:
+            synced = await backend.acquire("client")
+            local = await backend.acquire("client")  # admitted locally
+            await backend.refund("client", local)  # drops the local hit
+            await backend.refund("client", synced)  # decrements the window on the server
+            local_pending = backend._leases["client"].pending
+        finally:
+            await backend.close()
+            await server.stop()
+        return server, local_pending
+
+    server, local_pending = run(scenario())
+    assert local_pending == 0
+    assert sum(server.data.values()) == 0
+
+
+def test_refund_across_a_window_boundary_keeps_the_new_window():
+    async def scenario():
+        server = FakeRespServer()
+        port = await server.start()
+        now = [1_019.0]  # one second before the boundary of a 60s window
+        backend = RedisRateLimitBackend(100, RespPool(f"redis://127.0.0.1:{port}"), clock=lambda: now[0])
+        try:
+            before = await backend.acquire("client")
+            now[0] = 1_021.0
+            await backend.acquire("client")
+            await backend.refund("client", before)
+            await backend.refund("client", before)  # clamped: never below zero
+        finally:
+            await backend.close()
+            await server.stop()
+        return server
+
+    server = run(scenario())
+    # The refund went to the window that was charged, not the one current at refund time.
+    assert server.data == {"smart-reply:rl:client:16": 0, "smart-reply:rl:client:17": 1}
+
+
+def test_refund_does_not_recreate_an_expired_window():
+    async def scenario():
+        server = FakeRespServer()
+        port = await server.start()
+        backend = RedisRateLimitBackend(100, RespPool(f"redis://127.0.0.1:{port}"), clock=lambda: 1_000.0)
+        try:
+            decision = await backend.acquire("client")
+            server.data.clear()  # the window's TTL ran out
+            await backend.refund("client", decision)
+        finally:
+            await backend.close()
+            await server.stop()
+        return server
+
+    server = run(scenario())
+    assert server.data == {}
+
+
+def test_unreachable_backend_raises_backend_error():
+    async def scenario():
+        backend = RedisRateLimitBackend(5, RespPool("redis://127.0.0.1:1"), timeout_seconds=0.5)
+        with pytest.raises(RateLimitBackendError):
+            await backend.acquire("client")
+
+    run(scenario())
+
+
+@pytest.mark.parametrize("mode,expected", [("open", 200), ("closed", 503)])
+def test_failure_mode_policy(monkeypatch, mode, expected):
+    monkeypatch.setenv("API_KEY", "secret")
+    monkeypatch.setenv("SMART_REPLY_RATE_LIMIT_BACKEND", "redis")
+    monkeypatch.setenv("SMART_REPLY_RATE_LIMIT_REDIS_URL", "redis://127.0.0.1:1/0")
+    monkeypatch.setenv("SMART_REPLY_RATE_LIMIT_FAILURE_MODE", mode)
+    reset_settings_cache()
+    reset_rate_limit_cache()
+    reset_response_cache()
+    client = TestClient(create_app())
+
+    response = client.post("/v1/reply/draft", json={"incoming_message": "Hi"}, headers={"x-api-key": "secret"})
+    assert response.status_code == expected
+    if expected == 503:
+        assert response.json()["detail"] == "Rate limiter unavailable."
+    reset_settings_cache()
+    reset_rate_limit_cache()
@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+from pydantic import ValidationError
+import pytest
+
+from app.api.schemas import DraftRequest
+from app.core.metrics import REGISTRY, UPSTREAM_REPAIRS, UPSTREAM_RETRIES
+from app.services.llm import generate_reply_drafts
+from app.services.repair import coerce_draft_response, load_json
+
+_DEFAULTS = {"request_id": "resp_1", "detected_tone": "friendly", "channel_applied": "slack", "notes": ""}
+
+
+def _payload(**overrides) -> dict:
+    payload = {
+        "request_id": "r",
+        "detected_tone": "professional",
+        "channel_applied": "email",
+        "drafts": [{"label": label, "text": f"Draft {label}"} for label in ("A", "B", "C")],
+        "notes": "ok",
+        "confidence_score": 0.9,
+    }
+    payload.update(overrides)
+    return payload
+
+
+def test_load_json_fast_path_reports_no_repairs():
+    text = json.dumps(_payload())
+    assert load_json(text) == (_payload(), [])
+
+
+@pytest.mark.parametrize(
+    ("text", "repairs"),
+    [
+        ('{"a": [1, 2,], "b": {"c": 1,},}', ["trailing_comma"]),
+        ('Sure! Here you go:\n```json\n{"a": [1, 2]}\n```\nLet me know.', ["extracted"]),
+        ('{"a": [1, 2], "b": {"c": "done"', ["unclosed"]),
+        ('{"a": "line one\nline two"}', ["control_chars"]),
+        ('```json\n{"a": [1, 2,],', ["extracted", "trailing_comma", "unclosed"]),
+    ],
+)
+def test_load_json_repairs_common_defects(text, repairs):
+    data, applied = load_json(text)
+    assert applied == repairs
+    assert "a" in data
+
+
+def test_load_json_keeps_braces_inside_strings():
+    data, applied = load_json('{"a": "x}, {y\\"", "b": [1,]}')
+    assert data == {"a": 'x}, {y"', "b": [1]}
+    assert applied == ["trailing_comma"]
+
+
+def test_load_json_raises_when_unrepairable():
+    with pytest.raises(json.JSONDecodeError):
+        load_json("I cannot help with that.")
+    with pytest.raises(json.JSONDecodeError):
+        load_json('{"a": }')
+
+
+def test_output_cut_off_inside_a_draft_is_not_repaired():
+    text = json.dumps(_payload())
+    cut = text.index("Draft C") + len("Dra")
+    with pytest.raises(json.JSONDecodeError):
+        load_json(text[:cut])
+    # Cut off after the drafts are complete, the closing braces are restored.
+    data, applied = load_json(text[: text.index('"notes"')])
+    assert applied == ["unclosed"]
+    assert [draft["text"] for draft in data["drafts"]] == ["Draft A", "Draft B", "Draft C"]
+
+
+def test_coerce_fixes_near_miss_shapes():
+    data = _payload(
+        drafts=["First", {"label": "B", "text": "Second"}, "Third", "Fourth"],
+        confidence_score="1.4",
+        channel_applied="Email",
+    )
+    del data["notes"]
+    result, applied = coerce_draft_response(data, _DEFAULTS)
+    assert [draft.text for draft in result.drafts] == ["First", "Second", "Third"]
+    assert result.drafts[0].label == "Option 1"
+    assert result.confidence_score == 1.0
+    assert result.channel_applied == "email"
+    assert result.notes == ""
+    assert applied == ["draft_strings", "drafts_trimmed", "confidence_clamped", "defaults_filled", "channel_corrected"]
+
+
+def test_coerce_leaves_too_few_drafts_to_validation():
+    with pytest.raises(ValidationError):
+        coerce_draft_response(_payload(drafts=[{"label": "A", "text": "Only one"}]), _DEFAULTS)
+
+
+def test_repaired_payload_skips_the_upstream_retry(fake_openai, monkeypatch):
+    monkeypatch.setenv("SMART_REPLY_RESPONSE_CACHE_ENABLED", "false")
+    REGISTRY.reset()
+    payload = _payload(drafts=[{"label": str(index), "text": f"Draft {index}"} for index in range(4)])
+    fake_openai.reply(json.dumps(payload)[:-1] + ",}")
+    result = asyncio.run(generate_reply_drafts(DraftRequest(incoming_message="Hi", channel="email")))
+
+    assert len(fake_openai.calls) == 1
+    assert len(result.drafts) == 3
+    assert UPSTREAM_RETRIES.values() == {}
+    assert UPSTREAM_REPAIRS.values() == {("trailing_comma",): 1, ("drafts_trimmed",): 1}
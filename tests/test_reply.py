@@ -1,6 +1,6 @@
+import asyncio
 import json
-import sys
-import types
+import time
 
 from fastapi.testclient import TestClient
 import pytest
@@ -8,9 +8,20 @@ import pytest
 from app.main import create_app
 from app.core.config import reset_settings_cache
 from app.middleware.rate_limit import reset_rate_limit_cache
-from app.api.schemas import DraftRequest
-from app.services.prompts import build_user_prompt, SYSTEM_PROMPT
+from app.api.schemas import DraftRequest, DraftResponse
+from app.services.prompts import (
+    DRAFT_RESPONSE_FORMAT,
+    DRAFT_RESPONSE_SCHEMA,
+    SYSTEM_PROMPT,
+    build_prompt,
+    build_user_prompt,
+    precompile_prompts,
+    prompt_prefix,
+)
 from app.services.llm import generate_reply_drafts
+from app.services.cache import reset_response_cache
+from app.services.openai_client import reset_openai_client
+from app.services.tokens import estimate_tokens
 
 
 @pytest.fixture()
@@ -21,6 +32,8 @@ def client(monkeypatch):
     monkeypatch.setenv("API_KEY", "secret")
     reset_settings_cache()
     reset_rate_limit_cache()
+    reset_openai_client()
+    reset_response_cache()
     c = TestClient(create_app())
     c.headers.update({"x-api-key": "secret"})
     return c
@@ -138,71 +151,85 @@ def test_build_user_prompt_is_deterministic():
     )
     prompt = build_user_prompt(request)
 
-    expected_snippet = (
+    expected = (
         "Generate reply drafts for the following input.\n"
-        "- channel: email\n"
-        "- tone: friendly\n"
+        "- channel: email (complete sentences with a greeting and a sign-off)\n"
+        "- tone: friendly (warm and approachable)\n"
         "- language: UK English (default)\n"
-        "- message: Hello there\n"
-        "- context: Thread with ops\n"
         "- constraints:\n"
         "- max_words: 50\n"
         "- must_include_question: true\n"
-        "- avoid_phrases: ['ASAP', 'FYI']"
+        "- avoid_phrases: ['ASAP', 'FYI']\n"
+        "- context: Thread with ops\n"
+        "- message: Hello there"
+    )
+    assert prompt == expected
+    # the output shape travels as a structured-output schema, not in the prompt
+    assert "schema" not in prompt
+    assert prompt == build_user_prompt(request)
+
+
+def test_prompt_starts_with_the_static_variant_prefix():
+    first = DraftRequest(incoming_message="Hello there", channel="slack", tone="concise")
+    second = DraftRequest(incoming_message="Different", context="Other thread", channel="slack", tone="concise")
+    prefix = prompt_prefix("slack", "concise", "UK English (default)")
+    for request in (first, second):
+        built = build_prompt(request)
+        assert built.text.startswith(prefix.text)
+        assert built.prefix_tokens < built.tokens
+    assert build_prompt(first).prefix_tokens == build_prompt(second).prefix_tokens
+    assert precompile_prompts() == 84
+    assert prompt_prefix.cache_info().currsize >= 84
+
+
+def test_build_user_prompt_can_inline_schema():
+    request = DraftRequest(incoming_message="Hello there", channel="email", tone="friendly")
+    prompt = build_user_prompt(request, include_schema=True)
+    schema_line = prompt.splitlines()[2]
+    assert json.loads(schema_line) == DRAFT_RESPONSE_SCHEMA
+    # the schema sits in the static prefix, ahead of anything request-specific
+    assert prompt.index(schema_line) < prompt.index("- message: Hello there")
+
+
+def test_response_schema_is_strict_and_matches_model():
+    assert DRAFT_RESPONSE_SCHEMA["additionalProperties"] is False
+    assert DRAFT_RESPONSE_SCHEMA["required"] == list(DraftResponse.model_fields)
+    assert DRAFT_RESPONSE_SCHEMA["$defs"]["Draft"]["additionalProperties"] is False
+    assert DRAFT_RESPONSE_SCHEMA["properties"]["drafts"]["description"] == "Exactly 3 items."
+    assert "minItems" not in json.dumps(DRAFT_RESPONSE_SCHEMA)
+
+
+def test_generate_reply_drafts_uses_openai_and_returns_valid(fake_openai):
+    fake_openai.reply(
+        json.dumps(
+            {
+                "request_id": "resp_123",
+                "detected_tone": "professional",
+                "channel_applied": "email",
+                "drafts": [
+                    {"label": "Option 1", "text": "Draft one"},
+                    {"label": "Option 2", "text": "Draft two"},
+                    {"label": "Option 3", "text": "Draft three"},
+                ],
+                "notes": "unit-test",
+                "confidence_score": 0.9,
+            }
+        )
     )
-    assert expected_snippet in prompt
-    # ensure schema block is present
-    assert '"drafts": [' in prompt
-    assert "- Return JSON only." in prompt
-
-
-def test_generate_reply_drafts_uses_openai_and_returns_valid(monkeypatch):
-    # Force OpenAI path
-    monkeypatch.setenv("SMART_REPLY_OPENAI_API_KEY", "test-key")
-    reset_settings_cache()
-
-    captured: dict = {}
-
-    class FakeResponses:
-        def create(self, **kwargs):
-            captured.update(kwargs)
-
-            class Resp:
-                id = "resp_123"
-                output_text = json.dumps(
-                    {
-                        "request_id": "resp_123",
-                        "detected_tone": "professional",
-                        "channel_applied": "email",
-                        "drafts": [
-                            {"label": "Option 1", "text": "Draft one"},
-                            {"label": "Option 2", "text": "Draft two"},
-                            {"label": "Option 3", "text": "Draft three"},
-                        ],
-                        "notes": "unit-test",
-                        "confidence_score": 0.9,
-                    }
-                )
-
-            return Resp()
-
-    class FakeOpenAI:
-        def __init__(self, api_key, base_url=None):
-            captured["init"] = {"api_key": api_key, "base_url": base_url}
-            self.responses = FakeResponses()
-
-    fake_module = types.SimpleNamespace(OpenAI=FakeOpenAI)
-    monkeypatch.setitem(sys.modules, "openai", fake_module)
 
     request = DraftRequest(incoming_message="Test msg", channel="email", tone="professional")
-    result = generate_reply_drafts(request)
+    result = asyncio.run(generate_reply_drafts(request))
 
     assert result.drafts[0].text == "Draft one"
-    # Ensure client was initialized with our API key
-    assert captured["init"]["api_key"] == "test-key"
+    # Ensure client was initialized with our API key and a pooled transport
+    (client,) = fake_openai.clients
+    assert client.api_key == "test-key"
+    assert client.http_client is not None
     # Ensure system prompt is sent first
-    assert captured["input"][0]["content"] == SYSTEM_PROMPT
-    assert captured["response_format"]["type"] == "json_object"
+    (sent,) = fake_openai.calls
+    assert sent["input"][0]["content"] == SYSTEM_PROMPT
+    assert sent["text"]["format"] == DRAFT_RESPONSE_FORMAT
+    assert sent["text"]["format"]["strict"] is True
 
 
 def test_confidence_high_with_constraints_and_context(client):
@@ -297,3 +324,69 @@ def test_uk_english_can_be_disabled_in_prompt():
     )
     prompt = build_user_prompt(req)
     assert "User-specified language" in prompt
+
+
+def test_generate_reply_drafts_runs_upstream_calls_concurrently(fake_openai):
+    payload = json.dumps(
+        {
+            "request_id": "resp_456",
+            "detected_tone": "professional",
+            "channel_applied": "email",
+            "drafts": [
+                {"label": "Option 1", "text": "Draft one"},
+                {"label": "Option 2", "text": "Draft two"},
+                {"label": "Option 3", "text": "Draft three"},
+            ],
+            "notes": "unit-test",
+            "confidence_score": 0.8,
+        }
+    )
+
+    fake_openai.reply(payload, delay=0.2)
+
+    async def run_batch():
+        requests = [
+            DraftRequest(incoming_message=f"Message {i}", channel="email", tone="professional")
+            for i in range(10)
+        ]
+        return await asyncio.gather(*(generate_reply_drafts(r) for r in requests))
+
+    start = time.perf_counter()
+    results = asyncio.run(run_batch())
+    elapsed = time.perf_counter() - start
+
+    assert len(results) == 10
+    # Ten 200ms upstream calls must overlap rather than run back to back.
+    assert elapsed < 1.0
+
+
+def test_openai_client_is_shared_and_pooled(monkeypatch):
+    monkeypatch.setenv("SMART_REPLY_OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("SMART_REPLY_OPENAI_MAX_CONNECTIONS", "7")
+    monkeypatch.setenv("SMART_REPLY_OPENAI_MAX_KEEPALIVE_CONNECTIONS", "3")
+    reset_settings_cache()
+    reset_openai_client()
+    reset_response_cache()
+
+    def transport_for(app_client):
+        http_client = app_client._client
+        return http_client._transport._pool
+
+    with TestClient(create_app()):
+        from app.services import openai_client
+
+        shared = openai_client.get_openai_client()
+        assert shared is openai_client.get_openai_client()
+        pool = transport_for(shared)
+        assert pool._max_connections == 7
+        assert pool._max_keepalive_connections == 3
+    # Lifespan shutdown closes and releases the shared client.
+    assert openai_client._client is None
+    reset_settings_cache()
+
+
+def test_estimate_tokens_is_local_and_monotonic():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("Hi, team!") == 4
+    short = estimate_tokens("Can we meet next week?")
+    assert short < estimate_tokens("Can we meet next week to review the quarterly numbers?")
@@ -0,0 +1,123 @@
+import asyncio
+import json
+
+import pytest
+
+from app.api.schemas import DraftRequest
+from app.core.deadline import DeadlineExceeded, check_deadline, remaining, run_within_deadline, set_deadline
+from app.core.timing import start_timings, stop_timings
+from app.services.llm import generate_reply_drafts
+from app.services.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+        return flight, results
+
+    flight, results = asyncio.run(main())
+    assert calls == 1
+    assert [value for value, _ in results] == ["done"] * 5
+    assert sum(shared for _, shared in results) == 4
+    assert len(flight) == 0
+
+
+def test_errors_propagate_to_every_waiter():
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    async def main():
+        flight = SingleFlight()
+        return await asyncio.gather(*(flight.do("k", boom) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_cancelled_waiter_does_not_cancel_shared_call():
+    async def work():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def main():
+        flight = SingleFlight()
+        first = asyncio.ensure_future(flight.do("k", work))
+        second = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == ("ok", True)
+
+
+def test_each_waiter_enforces_its_own_deadline():
+    seen: list[float | None] = []
+
+    async def work():
+        await asyncio.sleep(0.1)
+        check_deadline()
+        seen.append(remaining())
+        return "ok"
+
+    async def caller(flight: SingleFlight, seconds: float):
+        set_deadline(seconds)
+        return await run_within_deadline(flight.do("k", work))
+
+    async def main():
+        flight = SingleFlight()
+        # The short deadline starts the shared call; it must not cut it short for the other waiter.
+        short = asyncio.ensure_future(caller(flight, 0.02))
+        await asyncio.sleep(0)
+        long = asyncio.ensure_future(caller(flight, 60))
+        return await asyncio.gather(short, long, return_exceptions=True)
+
+    short, long = asyncio.run(main())
+    assert isinstance(short, DeadlineExceeded)
+    assert long == ("ok", True)
+    assert seen == [None]
+
+
+def test_identical_concurrent_drafts_hit_upstream_once(fake_openai, monkeypatch):
+    monkeypatch.setenv("SMART_REPLY_RESPONSE_CACHE_ENABLED", "false")
+    payload = json.dumps(
+        {
+            "request_id": "resp_1",
+            "detected_tone": "professional",
+            "channel_applied": "email",
+            "drafts": [{"label": f"Option {i}", "text": f"Draft {i}"} for i in range(3)],
+            "notes": "unit-test",
+            "confidence_score": 0.8,
+        }
+    )
+
+    fake_openai.reply(payload, delay=0.1)
+
+    async def draft(request: DraftRequest):
+        timings, token = start_timings()
+        try:
+            return await generate_reply_drafts(request), timings.spans
+        finally:
+            stop_timings(token)
+
+    async def burst():
+        request = DraftRequest(incoming_message="Same message", channel="email", tone="professional")
+        return await asyncio.gather(*(draft(request) for _ in range(8)))
+
+    results, spans = zip(*asyncio.run(burst()))
+    assert len(fake_openai.calls) == 1
+    # Every waiter sees the shared generation's stages in its own timings.
+    assert all(any(stage == "generation" for stage, _ in request_spans) for request_spans in spans)
+    assert all(r.drafts == results[0].drafts for r in results)
+    assert len({r.request_id for r in results}) == 8
@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from app.core.config import reset_settings_cache
+from app.core.metrics import REGISTRY
+from app.core.startup import get_startup_timings, mark_ready, reset_startup_timings
+from app.main import create_app
+from app.openapi import SCHEMA_PATH, render_schema, use_static_schema
+from app.services import openai_client
+from app.services.openai_client import close_openai_client, init_openai_client, reset_openai_client
+
+
+def test_committed_openapi_schema_is_current():
+    generated = render_schema(create_app(static_openapi=False).openapi())
+    assert SCHEMA_PATH.read_text() == generated, "run `python -m app.openapi` to refresh openapi.json"
+
+
+def test_static_schema_is_served_without_regenerating(tmp_path):
+    path = tmp_path / "openapi.json"
+    path.write_text(json.dumps({"openapi": "3.1.0", "info": {"title": "static", "version": "0"}, "paths": {}}))
+    app = create_app(static_openapi=False)
+    use_static_schema(app, path)
+    client = TestClient(app)
+    assert client.get("/openapi.json").json()["info"]["title"] == "static"
+    assert client.get("/docs").status_code == 200
+
+
+def test_missing_static_schema_falls_back_to_generating(tmp_path):
+    app = create_app(static_openapi=False)
+    use_static_schema(app, tmp_path / "missing.json")
+    assert "/v1/reply/draft" in TestClient(app).get("/openapi.json").json()["paths"]
+
+
+def test_lifespan_reports_startup_timings(monkeypatch):
+    monkeypatch.delenv("SMART_REPLY_OPENAI_API_KEY", raising=False)
+    reset_settings_cache()
+    reset_startup_timings()
+    with TestClient(create_app()):
+        timings = get_startup_timings()
+        assert set(timings.steps) == {
+            "settings", "logging", "openai_client", "rate_limiter", "stub_executor", "prompts", "caches",
+        }
+        assert 0 < timings.startup_seconds <= timings.ready_seconds
+        fields = timings.as_log_fields()
+        assert fields["startup_ms"] == round(timings.startup_seconds * 1000, 2)
+    assert "smart_reply_startup_ready_seconds " in REGISTRY.render()
+    # Only the cold start counts towards readiness.
+    ready = timings.ready_seconds
+    mark_ready()
+    assert get_startup_timings().ready_seconds == ready
+    reset_settings_cache()
+
+
+def test_openai_client_warmup_modes(fake_openai, monkeypatch):
+    async def start(mode: str) -> bool:
+        monkeypatch.setenv("SMART_REPLY_OPENAI_CLIENT_WARMUP", mode)
+        reset_settings_cache()
+        reset_openai_client()
+        await init_openai_client()
+        created_during_startup = openai_client._client is not None
+        if mode == "background":
+            await openai_client._warmup
+            assert openai_client._client is fake_openai.clients[-1]
+        await close_openai_client()
+        return created_during_startup
+
+    assert asyncio.run(start("startup")) is True
+    assert asyncio.run(start("background")) is False
+    assert asyncio.run(start("lazy")) is False
+    assert len(fake_openai.clients) == 2
+
+
+def test_background_warmup_and_first_request_share_one_client(fake_openai, monkeypatch):
+    monkeypatch.setenv("SMART_REPLY_OPENAI_CLIENT_WARMUP", "background")
+
+    async def run():
+        await init_openai_client()
+        client = openai_client.get_openai_client()
+        await openai_client._warmup
+        assert openai_client.get_openai_client() is client
+        await close_openai_client()
+
+    asyncio.run(run())
+    assert len(fake_openai.clients) == 1
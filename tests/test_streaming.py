@@ -0,0 +1,197 @@
+import asyncio
+import json
+import types
+
+from fastapi.testclient import TestClient
+import pytest
+
+from app.api.schemas import DraftRequest
+from app.core.config import reset_settings_cache
+from app.main import create_app
+from app.middleware.rate_limit import reset_rate_limit_cache
+from app.services.cache import reset_response_cache
+from app.services.llm import generate_reply_drafts, stream_reply_drafts
+from app.services.streaming import DraftArrayScanner, format_sse
+
+
+def parse_sse(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    monkeypatch.setenv("API_KEY", "secret")
+    reset_settings_cache()
+    reset_rate_limit_cache()
+    reset_response_cache()
+    c = TestClient(create_app())
+    c.headers.update({"x-api-key": "secret"})
+    return c
+
+
+def test_format_sse_framing():
+    assert format_sse("draft", {"text": "Hi"}) == 'event: draft\ndata: {"text": "Hi"}\n\n'
+
+
+def test_scanner_emits_drafts_as_they_complete():
+    document = json.dumps(
+        {
+            "request_id": "r",
+            "drafts": [{"label": "A", "text": "one, {brace}"}, {"label": "B", "text": "two ]"}],
+            "notes": "n",
+        }
+    )
+    scanner = DraftArrayScanner()
+    seen = []
+    for i in range(0, len(document), 7):
+        seen.extend(scanner.feed(document[i : i + 7]))
+    assert [(index, d["label"]) for index, d in seen] == [(0, "A"), (1, "B")]
+    assert scanner.text == document
+
+
+def test_stream_endpoint_emits_drafts_then_summary(client):
+    payload = {
+        "incoming_message": "Can you share the latest metrics for Q1?",
+        "context": "Finance review thread",
+        "channel": "email",
+        "constraints": {"max_words": 100, "must_include_question": True},
+    }
+    response = client.post("/v1/reply/draft:stream", json=payload)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = parse_sse(response.text)
+    assert [name for name, _ in events] == ["draft", "draft", "draft", "summary"]
+    assert [data["label"] for _, data in events[:3]] == ["Direct", "Friendly", "Action-oriented"]
+    assert all(data["text"].startswith("Hi there,") for _, data in events[:3])
+
+    summary = events[-1][1]
+    non_streamed = asyncio.run(generate_reply_drafts(DraftRequest(**payload)))
+    assert summary["confidence_score"] == non_streamed.confidence_score
+    assert summary["notes"] == non_streamed.notes
+    assert summary["request_id"] != non_streamed.request_id
+
+
+def test_stream_requires_api_key(client):
+    response = client.post(
+        "/v1/reply/draft:stream", json={"incoming_message": "Hi"}, headers={"x-api-key": "nope"}
+    )
+    assert response.status_code == 401
+
+
+def _stream_events(fake_openai, events) -> None:
+    async def create(**kwargs):
+        return events()
+
+    fake_openai.create = create
+
+
+def _collect(request: DraftRequest) -> list:
+    async def collect():
+        return [event async for event in stream_reply_drafts(request)]
+
+    return asyncio.run(collect())
+
+
+def test_stream_openai_emits_deltas_and_drafts(fake_openai):
+    document = json.dumps(
+        {
+            "request_id": "resp_1",
+            "detected_tone": "professional",
+            "channel_applied": "slack",
+            "drafts": [{"label": f"Option {i}", "text": f"Draft {i}"} for i in range(3)],
+            "notes": "streamed",
+            "confidence_score": 0.7,
+        }
+    )
+
+    async def events():
+        yield types.SimpleNamespace(type="response.created")
+        for i in range(0, len(document), 16):
+            yield types.SimpleNamespace(type="response.output_text.delta", delta=document[i : i + 16])
+        yield types.SimpleNamespace(type="response.completed")
+
+    _stream_events(fake_openai, events)
+    events = _collect(DraftRequest(incoming_message="Stream me", channel="slack"))
+    names = [name for name, _ in events]
+    assert fake_openai.calls[0]["stream"] is True
+    assert "".join(data["text"] for name, data in events if name == "delta") == document
+    assert [data["text"] for name, data in events if name == "draft"] == ["Draft 0", "Draft 1", "Draft 2"]
+    # The first draft is available before the model finishes the payload.
+    assert names.index("draft") < len(names) - 2
+    assert events[-1] == (
+        "summary",
+        {
+            "request_id": "resp_1",
+            "detected_tone": "professional",
+            "channel_applied": "slack",
+            "notes": "streamed",
+            "confidence_score": 0.7,
+        },
+    )
+
+
+def test_stream_upstream_failure_mid_stream_ends_with_error_event(fake_openai):
+    async def events():
+        yield types.SimpleNamespace(type="response.output_text.delta", delta='{"drafts": [')
+        raise ConnectionError("upstream connection reset")
+
+    _stream_events(fake_openai, events)
+    events_seen = _collect(DraftRequest(incoming_message="Stream me", channel="slack"))
+    assert events_seen[0] == ("delta", {"text": '{"drafts": ['})
+    assert events_seen[-1] == ("error", {"detail": "Draft generation failed."})
+
+
+def test_stream_openai_formats_and_constrains_each_draft(fake_openai):
+    document = json.dumps(
+        {
+            "request_id": "resp_1",
+            "detected_tone": "professional",
+            "channel_applied": "email",
+            "drafts": [{"label": f"Option {i}", "text": f"We will circle back on draft {i} ASAP."} for i in range(3)],
+            "notes": "streamed",
+            "confidence_score": 0.7,
+        }
+    )
+
+    async def events():
+        for i in range(0, len(document), 16):
+            yield types.SimpleNamespace(type="response.output_text.delta", delta=document[i : i + 16])
+
+    _stream_events(fake_openai, events)
+    request = DraftRequest(
+        incoming_message="Stream me",
+        channel="email",
+        constraints={"must_include_question": True, "avoid_phrases": ["ASAP"]},
+    )
+    drafts = [data["text"] for name, data in _collect(request) if name == "draft"]
+    assert len(drafts) == 3
+    for text in drafts:
+        assert text.startswith("Hi there,")
+        assert "?" in text
+        assert "ASAP" not in text
+
+
+def test_stream_openai_emits_each_draft_of_a_mixed_array_once(fake_openai):
+    document = json.dumps(
+        {
+            "request_id": "resp_1",
+            "drafts": ["Bare draft", {"label": "B", "text": "Second"}, {"label": "C", "text": "Third"}],
+            "notes": "mixed",
+            "confidence_score": 0.7,
+        }
+    )
+
+    async def events():
+        for i in range(0, len(document), 16):
+            yield types.SimpleNamespace(type="response.output_text.delta", delta=document[i : i + 16])
+
+    _stream_events(fake_openai, events)
+    events_seen = _collect(DraftRequest(incoming_message="Stream me", channel="slack"))
+    drafts = [(data["index"], data["text"]) for name, data in events_seen if name == "draft"]
+    # Objects stream as they complete; the bare string follows once the payload is repaired.
+    assert drafts == [(1, "Second"), (2, "Third"), (0, "Bare draft")]
@@ -0,0 +1,93 @@
+import logging
+
+from fastapi.testclient import TestClient
+import pytest
+
+from app.core.config import reset_settings_cache
+from app.core.metrics import REGISTRY, STAGE_SECONDS
+from app.core.timing import collect_timings, current_timings, record_timings, span, start_timings, stop_timings
+from app.main import create_app
+from app.middleware.rate_limit import reset_rate_limit_cache
+from app.services.cache import reset_response_cache
+from app.services.executor import reset_stub_executor
+
+
+@pytest.fixture()
+def make_client(monkeypatch):
+    def build(**env):
+        monkeypatch.setenv("API_KEY", "secret")
+        for key, value in env.items():
+            monkeypatch.setenv(f"SMART_REPLY_{key.upper()}", value)
+        reset_settings_cache()
+        reset_rate_limit_cache()
+        reset_response_cache()
+        reset_stub_executor()
+        c = TestClient(create_app())
+        c.headers.update({"x-api-key": "secret"})
+        return c
+
+    yield build
+    reset_stub_executor()
+
+
+def _stages(header: str) -> dict[str, float]:
+    entries = (part.strip().split(";dur=") for part in header.split(","))
+    return {name: float(duration) for name, duration in entries}
+
+
+def test_span_feeds_request_timings_and_stage_histogram():
+    REGISTRY.reset()
+    timings, token = start_timings()
+    try:
+        with span("formatting"):
+            pass
+        with span("formatting"):
+            pass
+    finally:
+        stop_timings(token)
+    assert current_timings() is None
+    assert [stage for stage, _ in timings.spans] == ["formatting", "formatting"]
+    assert set(_stages(timings.server_timing())) == {"formatting", "total"}
+    assert STAGE_SECONDS.values()[("formatting",)][-1] == 2
+
+
+def test_spans_from_worker_processes_are_merged():
+    def work():
+        with span("constraints"):
+            return "done"
+
+    result, spans = collect_timings(work)
+    assert result == "done" and [stage for stage, _ in spans] == ["constraints"]
+
+    timings, token = start_timings()
+    try:
+        record_timings(spans)
+    finally:
+        stop_timings(token)
+    assert timings.spans == spans
+
+
+@pytest.mark.parametrize("mode", ["inline", "thread"])
+def test_server_timing_header_lists_pipeline_stages(make_client, mode):
+    client = make_client(server_timing_enabled="true", stub_executor_mode=mode)
+    response = client.post("/v1/reply/draft", json={"incoming_message": "Can you share the Q1 metrics?"})
+    assert response.status_code == 200
+    stages = _stages(response.headers["server-timing"])
+    for stage in ("auth", "rate_limit", "generation", "base_drafts", "constraints", "formatting", "total"):
+        assert stage in stages
+    assert stages["total"] >= stages["generation"]
+
+
+def test_server_timing_header_is_off_by_default(make_client):
+    response = make_client().post("/v1/reply/draft", json={"incoming_message": "Hello there"})
+    assert "server-timing" not in response.headers
+
+
+def test_timings_are_sampled_into_logs(make_client, caplog):
+    client = make_client(timing_log_sample_rate="1.0")
+    with caplog.at_level(logging.INFO, logger="app.middleware.timing"):
+        response = client.post("/v1/reply/draft", json={"incoming_message": "Hello there"})
+    assert "server-timing" not in response.headers
+    record = next(r for r in caplog.records if r.getMessage() == "request.timings")
+    assert record.route == "/v1/reply/draft"
+    assert "formatting" in record.stages_ms